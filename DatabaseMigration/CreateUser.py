@@ -1,61 +1,197 @@
-from datetime import datetime, timezone
-from typing import Any
-import uuid
-from sqlalchemy import create_engine, insert
+import argparse
+from itertools import batched
+import logging
+import sys
+from typing import Any, Iterable, Iterator
+from sqlalchemy import Table, create_engine, select
 from sqlalchemy.orm import Session
 from data_context import Tag, TagCategory, User
-from helpers import datetime_to_ticks
+from helpers import print_timings
+from ticks import now_ticks
+from ids import new_id
+from instrumentation import LOG_LEVELS, Instrumentation, configure_logging
+from bulk_load import insert_rows
 import en_zh_dict
 
 # === Configuration ===
 DB_PATH = "bear_words.db"
 DB_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(DB_URL, echo=True)
-DT_NOW = datetime_to_ticks(datetime.now(timezone.utc))
-
 USER_TO_CREATE = ["admin"]
+ROOTS_CATEGORY = "en wordroots"
 
+# Rows passed to one executemany call
+CHUNK_SIZE = 10_000
 
-# === Main ===
-with Session(engine) as session:
-    # Create users
-    users: list[dict[str, str | int]] = []
-    for user in USER_TO_CREATE:
-        users.append({"UserName": user, "CreatedAt": DT_NOW})
-
-    session.execute(insert(User), users)
-    session.commit()
-
-    # Prepare tag data
-    tags = en_zh_dict.get_word_roots(en_zh_dict.ROOTS_PATH)
-
-    # Add root tags for users
-    for user in USER_TO_CREATE:
-        tag_cat_id = str(uuid.uuid4())
-        session.add(
-            TagCategory(
-                TagCategoryId=tag_cat_id,
-                CategoryName="en wordroots",
-                UserName=user,
-                ModifiedAt=DT_NOW,
-                DeleteFlag=False,
-            )
+USER_COLUMNS = ["UserName", "CreatedAt"]
+TAG_CATEGORY_COLUMNS = [
+    "TagCategoryId",
+    "CategoryName",
+    "UserName",
+    "ModifiedAt",
+    "DeleteFlag",
+]
+TAG_COLUMNS = [
+    "TagId",
+    "TagName",
+    "TagCategoryId",
+    "Description",
+    "ModifiedAt",
+    "DeleteFlag",
+]
+
+logger = logging.getLogger(__name__)
+
+
+# === Functions ===
+def read_user_names(lines: Iterable[str]) -> list[str]:
+    # one user per line; blank lines and # comments are skipped, repeated
+    # names are kept once
+    names: dict[str, None] = {}
+    for line in lines:
+        name = line.split("#", 1)[0].strip()
+        if name != "":
+            names[name] = None
+    return list(names)
+
+
+def existing_user_names(session: Session, names: list[str]) -> set[str]:
+    existing: set[str] = set()
+    for chunk in batched(names, CHUNK_SIZE):
+        existing.update(
+            session.execute(select(User.UserName).where(User.UserName.in_(chunk)))
+            .scalars()
+            .all()
         )
-        session.commit()
-
-        tag_data: list[dict[str, Any]] = []
-        for k, v in tags.items():
-            tag_data.append(
-                {
-                    "TagId": str(uuid.uuid4()),
-                    "TagName": k,
-                    "TagCategoryId": tag_cat_id,
-                    "Description": v,
-                    "ModifiedAt": DT_NOW,
-                    "DeleteFlag": False,
-                }
-            )
-
-        session.execute(insert(Tag), tag_data)
-        session.commit()
+    return existing
+
+
+def insert_chunked(
+    session: Session,
+    table: Table,
+    columns: list[str],
+    rows: Iterable[tuple[Any, ...]],
+) -> None:
+    for chunk in batched(rows, CHUNK_SIZE):
+        insert_rows(session, table, columns, chunk)
+
+
+def provision_users(
+    session: Session,
+    names: list[str],
+    roots: dict[str, str],
+    created_at: int,
+    instrumentation: Instrumentation,
+) -> dict[str, int]:
+    # Users, their word-root category and its tags, in the caller's
+    # transaction. Categories are inserted before the tags referencing them.
+    category_ids = {name: new_id() for name in names}
+
+    def user_rows() -> Iterator[tuple[Any, ...]]:
+        for name in names:
+            yield (name, created_at)
+
+    def category_rows() -> Iterator[tuple[Any, ...]]:
+        for name, category_id in category_ids.items():
+            yield (category_id, ROOTS_CATEGORY, name, created_at, False)
+
+    def tag_rows() -> Iterator[tuple[Any, ...]]:
+        for category_id in category_ids.values():
+            for root, description in roots.items():
+                yield (
+                    new_id(),
+                    root,
+                    category_id,
+                    description,
+                    created_at,
+                    False,
+                )
+
+    with instrumentation.phase("insert users"):
+        insert_chunked(
+            session,
+            User.__table__,
+            USER_COLUMNS,
+            instrumentation.count("users", user_rows()),
+        )
+        insert_chunked(
+            session,
+            TagCategory.__table__,
+            TAG_CATEGORY_COLUMNS,
+            instrumentation.count("tag categories", category_rows()),
+        )
+    with instrumentation.phase("insert tags"):
+        insert_chunked(
+            session,
+            Tag.__table__,
+            TAG_COLUMNS,
+            instrumentation.count("tags", tag_rows()),
+        )
+
+    return {
+        "users": len(names),
+        "tag categories": len(category_ids),
+        "tags": len(category_ids) * len(roots),
+    }
+
+
+# === Main ===
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Create users in bear_words.db")
+    arg_parser.add_argument(
+        "names", nargs="*", help=f"user names (default: {', '.join(USER_TO_CREATE)})"
+    )
+    arg_parser.add_argument(
+        "--from-file",
+        metavar="PATH",
+        help="read user names from this file, one per line ('-' for stdin)",
+    )
+    arg_parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="leave users that already exist alone instead of failing",
+    )
+    arg_parser.add_argument(
+        "--echo", action="store_true", help="log every SQL statement (slow)"
+    )
+    arg_parser.add_argument("--log-level", choices=LOG_LEVELS, default="INFO")
+    args = arg_parser.parse_args()
+    configure_logging(args.log_level)
+
+    lines: list[str] = list(args.names)
+    if args.from_file == "-":
+        lines.extend(sys.stdin)
+    elif args.from_file is not None:
+        with open(args.from_file, "r", encoding="utf-8") as f:
+            lines.extend(f)
+    names = read_user_names(lines) if len(lines) > 0 else USER_TO_CREATE
+
+    engine = create_engine(DB_URL, echo=args.echo)
+    instrumentation = Instrumentation()
+    created_at = now_ticks()
+
+    # Word roots are parsed once for every user
+    with instrumentation.phase("parse word roots"):
+        roots = en_zh_dict.get_word_roots(en_zh_dict.ROOTS_PATH)
+
+    # One transaction: either every user is provisioned or none is
+    with Session(engine) as session, session.begin():
+        if args.skip_existing:
+            existing = existing_user_names(session, names)
+            if len(existing) > 0:
+                logger.info("Skipping %d existing users", len(existing))
+            names = [name for name in names if name not in existing]
+        stats = provision_users(session, names, roots, created_at, instrumentation)
+
+    print_timings(instrumentation.timings)
+    for name, count in stats.items():
+        print(f"{name:<24}{count:>10}")
+    seconds = sum(
+        instrumentation.phases[name].seconds for name in ("insert users", "insert tags")
+    )
+    if seconds > 0:
+        print(f"{'inserted rows/s':<24}{sum(stats.values()) / seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,110 @@
-import json
+import argparse
+import logging
 import os
-from datetime import datetime, timezone
-from typing import Any
-from sqlalchemy import create_engine, func, select, insert
+from collections import Counter
+from dataclasses import dataclass
+from functools import partial
+from itertools import batched
+from typing import Any, Callable, Iterable, Iterator, Sequence
+from sqlalchemy import Engine, create_engine, func, select, text
 from sqlalchemy.orm import Session
-from data_context import Base, Dictionary, Language, Translation
-from helpers import datetime_to_ticks, merge_without_overwrite
+from data_context import Base, Build, Dictionary, Language, Translation
+from helpers import ATTRIBUTE, DETAILS, FORM, POSITION, SYNSET, print_timings
+from instrumentation import LOG_LEVELS, Instrumentation, configure_logging
+from parallel_parse import iter_job_results, shard_ranges
+from parse_cache import ParseCache
+from ticks import now_ticks
+import bulk_load
+from bulk_load import insert_rows
 import ru_en_dict, en_zh_dict, ja_ja_dict
+import fts
+import json_stream
+import compression
+import translation_body
+from prefix_index import write_prefix_index
+from shards import SHARD_DIR, shard_name, write_shards
+from reading_index import build_reading_index
+from word_attributes import FREQUENCY_COLUMNS
+import word_ids
 
 # === Configuration ===
 DB_PATH = "bear_words.db"
 DB_URL = f"sqlite:///{DB_PATH}"
+# Copy of DB_PATH written by --dedupe and --compress, whose translations only
+# readers of TranslationBody and TranslationBlob can show (translation_text,
+# snapshot). DB_PATH keeps the plain TranslationText that BearWordsAPI syncs
+# to clients.
+COMPACT_DB_PATH = "bear_words.compact.db"
+COMPACT_DB_URL = f"sqlite:///{COMPACT_DB_PATH}"
+PREFIX_INDEX_PATH = "bear_words.prefix"
+REPORT_PATH = "bear_words.report.json"
+PARSE_CACHE_DIR = ".parse_cache"
+WORD_MAP_PATH = "bear_words.wordmap"
 EN_EN_PATH = "data/eedict/dictionary.json"
 EN_PRON_PATH = "data/eedict/en_US.json"
 EN_JA_PATH = "data/ejdict/ejdict.json"
+RU_SOURCES = [
+    (ru_en_dict.ADJ_PATH, ru_en_dict.ADJ_FIELDS),
+    (ru_en_dict.NOUNS_PATH, ru_en_dict.NOUNS_FIELDS),
+    (ru_en_dict.VERBS_PATH, ru_en_dict.VERBS_FIELDS),
+    (ru_en_dict.OTHERS_PATH, ru_en_dict.OTHERS_FIELDS),
+]
 
-# === Setup ===
-if os.path.exists(DB_PATH):
-    os.remove(DB_PATH)
+# Rows held in memory at once while staging and inserting
+CHUNK_SIZE = 10_000
 
-engine = create_engine(DB_URL, echo=True)
-Base.metadata.create_all(engine)
-print("Blank database created.")
+# The Dictionary columns clients sync (snapshot.TABLES exports the same).
+# ModifiedAt changes only when one of these does: the columns derived at
+# build time (Collins, Oxford, BncRank, CocaRank, Rank) are updated without
+# touching it, as they would otherwise send sync deltas with no visible change.
+DICTIONARY_COLUMNS = [
+    "WordId",
+    "Word",
+    "SourceLanguage",
+    "Pronounce",
+    "ModifiedAt",
+    "DeleteFlag",
+]
+TRANSLATION_COLUMNS = [
+    "WordId",
+    "TargetLanguage",
+    "TranslationText",
+    "ModifiedAt",
+    "DeleteFlag",
+]
 
-DT_NOW = datetime_to_ticks(datetime.now(timezone.utc))
+# Build flags that leave TranslationText empty, by the column the rows use
+# instead. Incremental builds compare the plain text, so they cannot update
+# such a database (a COMPACT_DB_PATH copy, or a DB_PATH built with them
+# in place): every translation would look changed.
+COMPACT_COLUMNS = {"--dedupe": "BodyHash", "--compress": "TranslationBlob"}
+
+DT_NOW = now_ticks()
+
+logger = logging.getLogger(__name__)
 
 
 # === Functions ===
-def load_json(path: str) -> dict[str, str]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def load_json(path: str) -> Iterator[tuple[str, str]]:
+    # streamed, see json_stream; a repeated key is yielded again and the
+    # staging tables keep its last value, as json.load would
+    yield from json_stream.iter_object(path)
+
+
+def copy_database(engine: Engine, path: str) -> None:
+    # VACUUM INTO writes a defragmented copy, it refuses an existing file
+    if os.path.exists(path):
+        os.remove(path)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM INTO ?", (path,))
+
+
+def create_missing_indexes(engine: Engine) -> None:
+    # create_all skips the indexes of tables that already exist
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
 
 def get_max_word_id(session: Session) -> int:
@@ -37,111 +112,940 @@ def get_max_word_id(session: Session) -> int:
     return result if result is not None else 0
 
 
+# Parsed rows are staged in a temp table keyed by (Name, Word), so that
+# deduplication and sorting happen inside SQLite instead of in python dicts.
+# Each Name plays the role of one of the former in-memory dicts.
+def create_stage(
+    session: Session,
+    word_map_path: str = "",
+    word_map_kib: int = word_ids.CACHE_SIZE_KIB,
+) -> None:
+    # first, ATTACH cannot run inside a transaction
+    word_ids.attach_word_map(session, word_map_path, word_map_kib)
+    session.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS Stage ("
+            "Name TEXT NOT NULL, Word TEXT NOT NULL, Value TEXT, "
+            "PRIMARY KEY (Name, Word)) WITHOUT ROWID"
+        )
+    )
+    # (word, inflected form) rows of ru_en_dict.get_word_forms. Rows of
+    # the tables below resolve to the word of their SourceLanguage.
+    session.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS StageForm ("
+            "SourceLanguage TEXT NOT NULL, Word TEXT NOT NULL, "
+            "Form TEXT NOT NULL, BareForm TEXT NOT NULL, Tag TEXT NOT NULL)"
+        )
+    )
+    # (word, key, value) rows of the get_word_attributes parsers
+    session.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS StageAttribute ("
+            "SourceLanguage TEXT NOT NULL, Word TEXT NOT NULL, "
+            "Key TEXT NOT NULL, Value TEXT NOT NULL)"
+        )
+    )
+    # Frequency signals of the sources without frequency fields, see
+    # assign_ranks
+    session.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS StageRank ("
+            "SourceLanguage TEXT NOT NULL, Kind TEXT NOT NULL, "
+            "Source TEXT NOT NULL, Word TEXT NOT NULL, Value NOT NULL)"
+        )
+    )
+
+
+def stage_rows(
+    session: Session, name: str, rows: Iterable[tuple[str, str | None]]
+) -> None:
+    # later rows of the same word win, as with dict assignment
+    stmt = text("INSERT OR REPLACE INTO Stage VALUES (:name, :word, :value)")
+    for chunk in batched(rows, CHUNK_SIZE):
+        session.execute(stmt, [{"name": name, "word": w, "value": v} for w, v in chunk])
+
+
+def merge_stage_without_overwrite(session: Session, base: str, new: str) -> None:
+    # same semantics as helpers.merge_without_overwrite
+    session.execute(
+        text(
+            "INSERT OR IGNORE INTO Stage "
+            "SELECT :base, Word, Value FROM Stage WHERE Name = :new"
+        ),
+        {"base": base, "new": new},
+    )
+
+
+def drop_stage(session: Session, *names: str) -> None:
+    for name in names:
+        session.execute(text("DELETE FROM Stage WHERE Name = :name"), {"name": name})
+
+
+def iter_staged_words(
+    session: Session, trans_name: str, pron_name: str
+) -> Iterator[tuple[str, str, str | None]]:
+    # the primary key yields rows ordered by Word (binary collation, i.e. the
+    # same code point order as sorted() on str) without a separate sort
+    result = session.execute(
+        text(
+            "SELECT t.Word, t.Value, p.Value FROM Stage t "
+            "LEFT JOIN Stage p ON p.Name = :pron AND p.Word = t.Word "
+            "WHERE t.Name = :trans ORDER BY t.Word"
+        ),
+        {"trans": trans_name, "pron": pron_name},
+    )
+    for word, trans, pron in result:
+        yield (word, trans, pron)
+
+
+def assign_word_ids(
+    session: Session,
+    chunk: Sequence[tuple[str, str, str | None]],
+    source_lang: str,
+    word_id_acc: int,
+) -> tuple[dict[str, int], int]:
+    # Resolve the WordId of each (word, translation, pronounce) row, inserting
+    # a Dictionary row for words of source_lang seen for the first time
+    word_id_map = word_ids.resolve(session, source_lang, [word for word, _, _ in chunk])
+
+    new_words: list[tuple[Any, ...]] = []
+    for word, _, pron in chunk:
+        if word not in word_id_map:
+            word_id_acc += 1
+            new_words.append((word_id_acc, word, source_lang, pron, DT_NOW, False))
+            word_id_map[word] = word_id_acc
+
+    if len(new_words) > 0:
+        insert_rows(session, Dictionary.__table__, DICTIONARY_COLUMNS, new_words)
+        word_ids.add(session, source_lang, ((w[1], w[0]) for w in new_words))
+
+    return (word_id_map, word_id_acc)
+
+
 def insert_words_and_translations(
     session: Session,
-    word_trans_dict: dict[str, str],
-    pron_dict: dict[str, str],
+    rows: Iterable[tuple[str, str, str | None]],
     source_lang: str,
     target_lang: str,
     word_id_acc: int,
-    word_id_map: dict[str, int],
 ) -> int:
-    new_words: list[dict[str, Any]] = []
-    new_translations: list[dict[str, Any]] = []
+    # rows are (word, translation, pronounce), sorted by word and unique
+    for chunk in batched(rows, CHUNK_SIZE):
+        word_id_map, word_id_acc = assign_word_ids(
+            session, chunk, source_lang, word_id_acc
+        )
+        insert_rows(
+            session,
+            Translation.__table__,
+            TRANSLATION_COLUMNS,
+            [
+                (word_id_map[word], target_lang, trans, DT_NOW, False)
+                for word, trans, _ in chunk
+            ],
+        )
 
-    for word in sorted(word_trans_dict.keys()):
-        if word not in word_id_map.keys():
-            word_id_acc += 1
-            new_words.append(
-                {
-                    "WordId": word_id_acc,
-                    "Word": word,
-                    "SourceLanguage": source_lang,
-                    "Pronounce": pron_dict.get(word),
-                    "ModifiedAt": DT_NOW,
-                }
+    session.commit()
+    return word_id_acc
+
+
+# Incremental mode keeps the existing WordIds and only touches changed rows,
+# so that clients pulling by ModifiedAt receive a small delta.
+def get_compact_flags(session: Session) -> list[str]:
+    # the COMPACT_COLUMNS flags the existing database was built with
+    return [
+        flag
+        for flag, column in COMPACT_COLUMNS.items()
+        if session.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM Translation WHERE {column} IS NOT NULL)"
             )
-            word_id_map[word] = word_id_acc
-        new_translations.append(
-            {
-                "WordId": word_id_map[word],
-                "TargetLanguage": target_lang,
-                "TranslationText": word_trans_dict[word],
-                "ModifiedAt": DT_NOW,
-            }
+        ).scalar_one()
+    ]
+
+
+def create_incremental_stage(session: Session) -> None:
+    word_ids.load_existing(session)
+    # (WordId, TargetLanguage) of every translation present in the sources
+    session.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS SeenTranslation ("
+            "WordId INTEGER NOT NULL, TargetLanguage TEXT NOT NULL, "
+            "PRIMARY KEY (WordId, TargetLanguage)) WITHOUT ROWID"
+        )
+    )
+
+
+def upsert_words_and_translations(
+    session: Session,
+    rows: Iterable[tuple[str, str, str | None]],
+    source_lang: str,
+    target_lang: str,
+    word_id_acc: int,
+    stats: Counter[str],
+) -> int:
+    for chunk in batched(rows, CHUNK_SIZE):
+        word_id_map, new_word_id_acc = assign_word_ids(
+            session, chunk, source_lang, word_id_acc
+        )
+        stats["Dictionary inserted"] += new_word_id_acc - word_id_acc
+        word_id_acc = new_word_id_acc
+
+        ids = [word_id_map[word] for word, _, _ in chunk]
+        existing_words: dict[int, tuple[str | None, bool]] = {
+            word_id: (pron, delete_flag)
+            for word_id, pron, delete_flag in session.execute(
+                select(
+                    Dictionary.WordId, Dictionary.Pronounce, Dictionary.DeleteFlag
+                ).where(
+                    Dictionary.SourceLanguage == source_lang,
+                    Dictionary.WordId.in_(ids),
+                )
+            )
+        }
+        existing_trans: dict[int, tuple[str, bool]] = {
+            word_id: (trans, delete_flag)
+            for word_id, trans, delete_flag in session.execute(
+                select(
+                    Translation.WordId,
+                    Translation.TranslationText,
+                    Translation.DeleteFlag,
+                ).where(
+                    Translation.TargetLanguage == target_lang,
+                    Translation.WordId.in_(ids),
+                )
+            )
+        }
+
+        word_updates: list[dict[str, Any]] = []
+        trans_updates: list[dict[str, Any]] = []
+        new_translations: list[tuple[Any, ...]] = []
+
+        for (word, trans, pron), word_id in zip(chunk, ids):
+            # pronounce is owned by the word's own source language
+            if word_id in existing_words and existing_words[word_id] != (pron, False):
+                word_updates.append({"word_id": word_id, "pron": pron, "now": DT_NOW})
+
+            if word_id not in existing_trans:
+                new_translations.append((word_id, target_lang, trans, DT_NOW, False))
+            elif existing_trans[word_id] != (trans, False):
+                trans_updates.append(
+                    {
+                        "word_id": word_id,
+                        "target": target_lang,
+                        "trans": trans,
+                        "now": DT_NOW,
+                    }
+                )
+
+        if len(word_updates) > 0:
+            session.execute(
+                text(
+                    "UPDATE Dictionary SET Pronounce = :pron, ModifiedAt = :now, "
+                    "DeleteFlag = 0 WHERE WordId = :word_id"
+                ),
+                word_updates,
+            )
+        if len(trans_updates) > 0:
+            session.execute(
+                text(
+                    "UPDATE Translation SET TranslationText = :trans, "
+                    "ModifiedAt = :now, DeleteFlag = 0 "
+                    "WHERE WordId = :word_id AND TargetLanguage = :target"
+                ),
+                trans_updates,
+            )
+        insert_rows(
+            session, Translation.__table__, TRANSLATION_COLUMNS, new_translations
         )
+        session.execute(
+            text("INSERT OR IGNORE INTO SeenTranslation VALUES (:word_id, :target)"),
+            [{"word_id": word_id, "target": target_lang} for word_id in ids],
+        )
+
+        stats["Dictionary updated"] += len(word_updates)
+        stats["Translation updated"] += len(trans_updates)
+        stats["Translation inserted"] += len(new_translations)
 
-    session.execute(insert(Dictionary), new_words)
-    session.execute(insert(Translation), new_translations)
     session.commit()
     return word_id_acc
 
 
-# === Main Logic ===
-with Session(engine) as session:
-    # Insert supported languages
-    session.add_all(
-        [
-            Language(LanguageCode="en", LanguageName="English"),
-            Language(LanguageCode="ja", LanguageName="日本語"),
-            Language(LanguageCode="ru", LanguageName="Русский"),
-            Language(LanguageCode="zh-Hans", LanguageName="简体中文"),
-            Language(LanguageCode="@none", LanguageName="None"),
-        ]
+def soft_delete_unseen(session: Session, stats: Counter[str]) -> None:
+    # rows no longer produced by any source are flagged, never removed,
+    # so that the deletion is synced to clients
+    result = session.execute(
+        text(
+            "UPDATE Translation SET DeleteFlag = 1, ModifiedAt = :now "
+            "WHERE DeleteFlag = 0 AND NOT EXISTS (SELECT 1 FROM SeenTranslation s "
+            "WHERE s.WordId = Translation.WordId "
+            "AND s.TargetLanguage = Translation.TargetLanguage)"
+        ),
+        {"now": DT_NOW},
+    )
+    stats["Translation deleted"] += result.rowcount
+
+    result = session.execute(
+        text(
+            "UPDATE Dictionary SET DeleteFlag = 1, ModifiedAt = :now "
+            "WHERE DeleteFlag = 0 "
+            "AND WordId NOT IN (SELECT WordId FROM SeenTranslation)"
+        ),
+        {"now": DT_NOW},
     )
+    stats["Dictionary deleted"] += result.rowcount
     session.commit()
 
-    word_id_acc = get_max_word_id(session)
-    word_id_map: dict[str, int] = {}
 
-    # English-Chinese data preparation
-    en_pron_alt, en_en_alt, en_zh = en_zh_dict.get_word_prons_and_details(
-        en_zh_dict.WORDS_PATH, en_zh_dict.FIELDS
-    )
+def stage_ecdict_rows(
+    session: Session, rows: Iterable[tuple[str, str | None, str | None, str]]
+) -> None:
+    # ECDICT is parsed once and fanned out into three staged dicts
+    for chunk in batched(rows, CHUNK_SIZE):
+        stage_rows(
+            session, "en_pron_alt", ((w, p) for w, p, _, _ in chunk if p is not None)
+        )
+        stage_rows(
+            session, "en_en_alt", ((w, d) for w, _, d, _ in chunk if d is not None)
+        )
+        stage_rows(session, "en_zh", ((w, t) for w, _, _, t in chunk))
+
+
+def stage_ru_rows(session: Session, rows: Iterable[tuple[str, str, str]]) -> None:
+    for chunk in batched(rows, CHUNK_SIZE):
+        stage_rows(session, "ru_pron", ((w, p) for w, p, _ in chunk))
+        stage_rows(session, "ru_en", ((w, d) for w, _, d in chunk))
 
-    # English-English
-    en_pron = load_json(EN_PRON_PATH)
-    merge_without_overwrite(en_pron, en_pron_alt)
 
-    en_en = load_json(EN_EN_PATH)
-    merge_without_overwrite(en_en, en_en_alt)
+def stage_form_rows(
+    session: Session, source_lang: str, rows: Iterable[tuple[str, str, str, str]]
+) -> None:
+    stmt = text("INSERT INTO StageForm VALUES (:lang, :word, :form, :bare, :tag)")
+    for chunk in batched(rows, CHUNK_SIZE):
+        session.execute(
+            stmt,
+            [
+                {"lang": source_lang, "word": w, "form": f, "bare": b, "tag": t}
+                for w, f, b, t in chunk
+            ],
+        )
+
 
-    word_id_acc = insert_words_and_translations(
-        session, en_en, en_pron, "en", "en", word_id_acc, word_id_map
+def insert_word_forms(session: Session) -> int:
+    # Forms resolve to the WordId their word was given in Dictionary. The
+    # table is derived from the sources, so it is rebuilt on every run.
+    session.execute(text("DELETE FROM WordForm"))
+    result = session.execute(
+        text(
+            "INSERT OR IGNORE INTO WordForm (BareForm, WordId, Tag, Form) "
+            "SELECT s.BareForm, m.WordId, s.Tag, s.Form FROM StageForm s "
+            f"JOIN {word_ids.TABLE} m USING (SourceLanguage, Word)"
+        )
     )
+    session.execute(text("DELETE FROM StageForm"))
+    session.commit()
+    return result.rowcount
+
+
+def stage_attribute_rows(
+    session: Session, source_lang: str, rows: Iterable[tuple[str, str, str]]
+) -> None:
+    stmt = text("INSERT INTO StageAttribute VALUES (:lang, :word, :key, :value)")
+    for chunk in batched(rows, CHUNK_SIZE):
+        session.execute(
+            stmt,
+            [
+                {"lang": source_lang, "word": w, "key": k, "value": v}
+                for w, k, v in chunk
+            ],
+        )
+
+
+def insert_word_attributes(session: Session) -> tuple[int, int]:
+    # Frequency fields go to their Dictionary columns, the other attributes
+    # to WordAttribute (rebuilt on every run, as WordForm). Returns the
+    # WordAttribute row count and the number of Dictionary rows updated.
+    keys = ", ".join(f"'{key}'" for key in FREQUENCY_COLUMNS)
+    columns = FREQUENCY_COLUMNS.values()
 
-    # English-Japanese
-    en_ja = load_json(EN_JA_PATH)
-    word_id_acc = insert_words_and_translations(
-        session, en_ja, en_pron, "en", "ja", word_id_acc, word_id_map
+    session.execute(text("DELETE FROM WordAttribute"))
+    attributes = session.execute(
+        text(
+            "INSERT OR IGNORE INTO WordAttribute (Key, Value, WordId) "
+            "SELECT s.Key, s.Value, m.WordId FROM StageAttribute s "
+            f"JOIN {word_ids.TABLE} m USING (SourceLanguage, Word) "
+            f"WHERE s.Key NOT IN ({keys})"
+        )
+    ).rowcount
+
+    # frequencies per word, one column each (NULL if not ranked)
+    pivot = ", ".join(
+        f"min(CASE s.Key WHEN '{key}' THEN CAST(s.Value AS INTEGER) END) AS {column}"
+        for key, column in FREQUENCY_COLUMNS.items()
+    )
+    session.execute(
+        text(
+            "CREATE TEMP TABLE StageFrequency AS "
+            f"SELECT m.WordId, {pivot} FROM StageAttribute s "
+            f"JOIN {word_ids.TABLE} m USING (SourceLanguage, Word) "
+            f"WHERE s.Key IN ({keys}) "
+            "GROUP BY m.WordId"
+        )
     )
+    # only rows whose frequencies changed are updated, ModifiedAt is left
+    # alone (see DICTIONARY_COLUMNS)
+    changed = " OR ".join(f"Dictionary.{c} IS NOT f.{c}" for c in columns)
+    updated = session.execute(
+        text(
+            "UPDATE Dictionary SET "
+            + ", ".join(f"{c} = f.{c}" for c in columns)
+            + " FROM StageFrequency f "
+            f"WHERE Dictionary.WordId = f.WordId AND ({changed})"
+        )
+    ).rowcount
+    # words no longer ranked by any source
+    ranked = " OR ".join(f"{c} IS NOT NULL" for c in columns)
+    updated += session.execute(
+        text(
+            "UPDATE Dictionary SET "
+            + ", ".join(f"{c} = NULL" for c in columns)
+            + f" WHERE ({ranked}) "
+            "AND WordId NOT IN (SELECT WordId FROM StageFrequency)"
+        )
+    ).rowcount
 
-    # # English-Chinese
-    word_id_acc = insert_words_and_translations(
-        session, en_zh, en_pron, "en", "zh-Hans", word_id_acc, word_id_map
+    session.execute(text("DROP TABLE StageFrequency"))
+    session.execute(text("DELETE FROM StageAttribute"))
+    session.commit()
+    return (attributes, updated)
+
+
+def stage_rank_as(
+    kind: str, source: str, source_lang: str
+) -> Callable[[Session, Iterable[Any]], None]:
+    def stage(session: Session, rows: Iterable[tuple[str, Any]]) -> None:
+        stmt = text(
+            "INSERT INTO StageRank VALUES (:lang, :kind, :source, :word, :value)"
+        )
+        for chunk in batched(rows, CHUNK_SIZE):
+            session.execute(
+                stmt,
+                [
+                    {
+                        "lang": source_lang,
+                        "kind": kind,
+                        "source": source,
+                        "word": w,
+                        "value": v,
+                    }
+                    for w, v in chunk
+                ],
+            )
+
+    return stage
+
+
+def assign_ranks(session: Session) -> int:
+    # Rank = position of the word within its SourceLanguage, most common
+    # first, by the best signal available:
+    # - en: the better of the COCA and BNC ranks, then Collins stars and
+    #   Oxford 3000 membership
+    # - ru: row position in the (frequency ordered) OpenRussian file, as a
+    #   fraction of the file length, so the per-POS files interleave
+    # - ja: number of WordNet synsets, more first
+    # Words without a signal follow, shorter words first.
+    session.execute(
+        text(
+            "CREATE TEMP TABLE RankScore AS "
+            "SELECT m.WordId, min(s.Score) AS Score FROM ("
+            "SELECT SourceLanguage, Word, "
+            "CAST(Value AS REAL) / count(*) OVER (PARTITION BY Source) "
+            "AS Score FROM StageRank WHERE Kind = 'position' "
+            "UNION ALL "
+            "SELECT SourceLanguage, Word, -count(DISTINCT Value) FROM StageRank "
+            "WHERE Kind = 'synset' GROUP BY SourceLanguage, Word"
+            f") s JOIN {word_ids.TABLE} m USING (SourceLanguage, Word) GROUP BY m.WordId"
+        )
     )
+    score = "coalesce(min(d.CocaRank, d.BncRank), d.CocaRank, d.BncRank, s.Score)"
+    # ModifiedAt is left alone (see DICTIONARY_COLUMNS). Adding one common
+    # word shifts the Rank of every word after it.
+    result = session.execute(
+        text(
+            "UPDATE Dictionary SET Rank = r.Rank FROM ("
+            "SELECT d.WordId, row_number() OVER (PARTITION BY d.SourceLanguage "
+            f"ORDER BY {score} IS NULL, {score}, "
+            "-coalesce(d.Collins, 0) - coalesce(d.Oxford, 0), "
+            "length(d.Word), d.Word) AS Rank "
+            "FROM Dictionary d LEFT JOIN RankScore s ON s.WordId = d.WordId"
+            ") r WHERE Dictionary.WordId = r.WordId AND Dictionary.Rank IS NOT r.Rank"
+        )
+    )
+
+    session.execute(text("DROP TABLE RankScore"))
+    session.execute(text("DELETE FROM StageRank"))
+    session.commit()
+    return result.rowcount
+
+
+def stage_as(name: str) -> Callable[[Session, Iterable[Any]], None]:
+    return lambda session, rows: stage_rows(session, name, rows)
+
+
+def stage_attributes_as(source_lang: str) -> Callable[[Session, Iterable[Any]], None]:
+    return lambda session, rows: stage_attribute_rows(session, source_lang, rows)
+
+
+def stage_forms_as(source_lang: str) -> Callable[[Session, Iterable[Any]], None]:
+    return lambda session, rows: stage_form_rows(session, source_lang, rows)
+
+
+def stage_tagged(
+    stages: dict[str, Callable[[Session, Iterable[Any]], None]],
+) -> Callable[[Session, Iterable[Any]], None]:
+    # (tag, row) pairs of a get_tagged_rows parser, each row staged by the
+    # function of its tag, a chunk at a time
+    def stage(session: Session, rows: Iterable[tuple[str, Any]]) -> None:
+        for chunk in batched(rows, CHUNK_SIZE):
+            by_tag: dict[str, list[Any]] = {tag: [] for tag in stages}
+            for tag, row in chunk:
+                by_tag[tag].append(row)
+            for tag, tag_rows in by_tag.items():
+                if len(tag_rows) > 0:
+                    stages[tag](session, tag_rows)
+
+    return stage
+
+
+@dataclass
+class ParseTask:
+    parser: Callable[..., Iterable[Any]]
+    args: tuple[Any, ...]
+    stage: Callable[[Session, Iterable[Any]], None]
 
-    # Japanese-Japanese
-    ja_ja = ja_ja_dict.get_word_details(ja_ja_dict.WORDS_PATH)
-    ja_pron = ja_ja_dict.get_word_prons(ja_ja_dict.PRONS_PATH)
-    word_id_acc = insert_words_and_translations(
-        session, ja_ja, ja_pron, "ja", "ja", word_id_acc, word_id_map
+
+def get_parse_tasks(shard: bool) -> list[ParseTask]:
+    # Tasks are staged in list order. Stage names are distinct per source,
+    # so only the order of tasks sharing a name matters (ru_en).
+    ecdict_ranges: list[tuple[int, int] | None] = [None]
+    ja_ranges: list[tuple[int, int] | None] = [None]
+    if shard:
+        ecdict_ranges = [*shard_ranges(en_zh_dict.WORDS_PATH)]
+        ja_ranges = [*shard_ranges(ja_ja_dict.WORDS_PATH)]
+
+    # Each file (or range of it) is read once, its parser yields every kind
+    # of row the file holds, tagged, see stage_tagged
+    tasks: list[ParseTask] = []
+    for r in ecdict_ranges:
+        tasks.append(
+            ParseTask(
+                en_zh_dict.get_tagged_rows,
+                (en_zh_dict.WORDS_PATH, en_zh_dict.FIELDS, r),
+                stage_tagged(
+                    {DETAILS: stage_ecdict_rows, ATTRIBUTE: stage_attributes_as("en")}
+                ),
+            )
+        )
+
+    tasks.append(ParseTask(load_json, (EN_PRON_PATH,), stage_as("en_pron")))
+    tasks.append(ParseTask(load_json, (EN_EN_PATH,), stage_as("en_en")))
+    tasks.append(ParseTask(load_json, (EN_JA_PATH,), stage_as("en_ja")))
+
+    for r in ja_ranges:
+        tasks.append(
+            ParseTask(
+                ja_ja_dict.get_tagged_rows,
+                (ja_ja_dict.WORDS_PATH, r),
+                stage_tagged(
+                    {
+                        DETAILS: stage_as("ja_ja"),
+                        ATTRIBUTE: stage_attributes_as("ja"),
+                        SYNSET: stage_rank_as("synset", ja_ja_dict.WORDS_PATH, "ja"),
+                    }
+                ),
+            )
+        )
+    tasks.append(
+        ParseTask(
+            ja_ja_dict.get_word_prons, (ja_ja_dict.PRONS_PATH,), stage_as("ja_pron")
+        )
     )
 
-    # Russian-English
-    ru_pron: dict[str, str] = {}
-    ru_en: dict[str, str] = {}
+    for path, fields in RU_SOURCES:
+        tasks.append(
+            ParseTask(
+                ru_en_dict.get_tagged_rows,
+                (path, fields, ru_en_dict.PARTS_OF_SPEECH.get(path)),
+                stage_tagged(
+                    {
+                        DETAILS: stage_ru_rows,
+                        FORM: stage_forms_as("ru"),
+                        ATTRIBUTE: stage_attributes_as("ru"),
+                        POSITION: stage_rank_as("position", path, "ru"),
+                    }
+                ),
+            )
+        )
+
+    return tasks
 
-    for path, fields in [
-        (ru_en_dict.ADJ_PATH, ru_en_dict.ADJ_FIELDS),
-        (ru_en_dict.NOUNS_PATH, ru_en_dict.NOUNS_FIELDS),
-        (ru_en_dict.VERBS_PATH, ru_en_dict.VERBS_FIELDS),
-        (ru_en_dict.OTHERS_PATH, ru_en_dict.OTHERS_FIELDS),
-    ]:
-        p, e = ru_en_dict.get_word_prons_and_details(path, fields)
-        ru_pron.update(p)
-        ru_en.update(e)
 
-    word_id_acc = insert_words_and_translations(
-        session, ru_en, ru_pron, "ru", "en", word_id_acc, word_id_map
+def run_parse_tasks(
+    session: Session,
+    tasks: list[ParseTask],
+    workers: int,
+    instrumentation: Instrumentation | None = None,
+    cache: ParseCache | None = None,
+) -> None:
+    # with a cache, each job is cache.rows(parser, args) instead
+    jobs: list[tuple[Callable[..., Iterable[Any]], tuple[Any, ...]]] = [
+        (t.parser, t.args) if cache is None else (cache.rows, (t.parser, t.args))
+        for t in tasks
+    ]
+
+    def stage(task: ParseTask, rows: Iterable[Any]) -> None:
+        if instrumentation is not None:
+            # rows per parser and source file, summed over the shards
+            name = f"{task.parser.__name__} {os.path.basename(task.args[0])}"
+            rows = instrumentation.count(name, rows)
+        task.stage(session, rows)
+
+    if workers <= 1:
+        for task, (parser, args) in zip(tasks, jobs):
+            stage(task, parser(*args))
+        return
+
+    results = iter_job_results(jobs, workers)
+    for task, rows in zip(tasks, results):
+        stage(task, rows)
+
+
+# === Main Logic ===
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Build bear_words.db")
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="parse the sources in N processes, sharding the large files (default: 1)",
+    )
+    mode = arg_parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--bulk-load",
+        action="store_true",
+        help="load with tuned PRAGMAs and build indexes afterwards "
+        "(faster, uses more memory)",
+    )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="update an existing database in place, keeping WordIds and "
+        "touching ModifiedAt of changed rows only",
+    )
+    arg_parser.add_argument(
+        "--memory-temp",
+        action="store_true",
+        help="with --bulk-load, keep the staging tables in memory rather than "
+        "in temp files (faster, but memory grows with the sources)",
+    )
+    arg_parser.add_argument(
+        "--fts",
+        action="store_true",
+        help="build FTS5 full-text indexes over words, pronunciations and "
+        "translations (see fts.py)",
+    )
+    arg_parser.add_argument(
+        "--romaji",
+        action="store_true",
+        help="also index Japanese readings by their Hepburn romanization",
     )
+    arg_parser.add_argument(
+        "--compress",
+        nargs="?",
+        const=compression.default_codec(),
+        choices=compression.CODECS.keys(),
+        help=f"also write {COMPACT_DB_PATH}, a copy storing TranslationText "
+        "as blobs compressed with a shared dictionary (zstd if installed, else "
+        "zlib). Its readers must decode TranslationBlob, see compression.py",
+    )
+    arg_parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help=f"also write {COMPACT_DB_PATH}, a copy storing each TranslationText "
+        "shared by several rows once, in TranslationBody. Its readers must "
+        "follow BodyHash, see translation_body.py",
+    )
+    arg_parser.add_argument(
+        "--shards",
+        nargs="?",
+        const=SHARD_DIR,
+        help="also write one database per language pair to this directory "
+        f"(default: {SHARD_DIR}), see shards.py",
+    )
+    arg_parser.add_argument(
+        "--parse-cache",
+        default=PARSE_CACHE_DIR,
+        help="reuse the parser output of unchanged sources from this "
+        f"directory (default: {PARSE_CACHE_DIR})",
+    )
+    arg_parser.add_argument(
+        "--parse-cache-mb",
+        type=int,
+        default=2048,
+        help="disk budget of the parse cache, least recently used entries "
+        "are evicted beyond it (default: 2048)",
+    )
+    arg_parser.add_argument(
+        "--no-parse-cache", action="store_true", help="always parse every source"
+    )
+    arg_parser.add_argument(
+        "--word-map-mb",
+        type=int,
+        default=word_ids.CACHE_SIZE_KIB // 1024,
+        help="memory of the word -> WordId map, which spills to "
+        f"{WORD_MAP_PATH} beyond it (default: {word_ids.CACHE_SIZE_KIB // 1024})",
+    )
+    arg_parser.add_argument(
+        "--echo", action="store_true", help="log every SQL statement (slow)"
+    )
+    arg_parser.add_argument("--log-level", choices=LOG_LEVELS, default="INFO")
+    arg_parser.add_argument(
+        "--report",
+        default=REPORT_PATH,
+        help=f"where to write the JSON build report (default: {REPORT_PATH})",
+    )
+    args = arg_parser.parse_args()
+    configure_logging(args.log_level)
+    if args.compress is not None and args.fts:
+        # the copy would carry the index of the plain TranslationText
+        arg_parser.error("--compress cannot be combined with --fts")
+    if args.memory_temp and not args.bulk_load:
+        arg_parser.error("--memory-temp requires --bulk-load")
+    if args.dedupe and args.fts:
+        arg_parser.error("--dedupe cannot be combined with --fts")
+    instrumentation = Instrumentation()
+    phase = instrumentation.phase
+    stats: Counter[str] = Counter()
+
+    if os.path.exists(DB_PATH) and not args.incremental:
+        os.remove(DB_PATH)
+    # the copy of an earlier build would no longer match DB_PATH
+    if os.path.exists(COMPACT_DB_PATH):
+        os.remove(COMPACT_DB_PATH)
+
+    with phase("create tables"):
+        engine = create_engine(DB_URL, echo=args.echo)
+        if args.bulk_load:
+            bulk_load.use_bulk_pragmas(engine, memory_temp=args.memory_temp)
+            bulk_load.create_tables_without_indexes(engine)
+        else:
+            Base.metadata.create_all(engine)
+            if args.incremental:
+                create_missing_indexes(engine)
+    logger.info("Blank database created.")
+
+    if args.incremental:
+        with Session(engine) as session:
+            compact_flags = get_compact_flags(session)
+        if len(compact_flags) > 0:
+            arg_parser.error(
+                f"{DB_PATH} was built with {', '.join(compact_flags)}, which "
+                "--incremental cannot update; rebuild it without --incremental"
+            )
+
+    with Session(engine) as session:
+        # Insert supported languages
+        for language in [
+            Language(LanguageCode="en", LanguageName="English"),
+            Language(LanguageCode="ja", LanguageName="日本語"),
+            Language(LanguageCode="ru", LanguageName="Русский"),
+            Language(LanguageCode="zh-Hans", LanguageName="简体中文"),
+            Language(LanguageCode="@none", LanguageName="None"),
+        ]:
+            session.merge(language)
+        session.commit()
+
+        create_stage(session, WORD_MAP_PATH, args.word_map_mb * 1024)
+        word_id_acc = get_max_word_id(session)
+
+        load_pair: Callable[..., int] = insert_words_and_translations
+        if args.incremental:
+            create_incremental_stage(session)
+            load_pair = partial(upsert_words_and_translations, stats=stats)
+
+        # Parse all sources into the stage
+        with phase("parse"):
+            tasks = get_parse_tasks(args.workers > 1)
+            cache: ParseCache | None = None
+            if not args.no_parse_cache:
+                cache = ParseCache(args.parse_cache, args.parse_cache_mb * 1024**2)
+                stats["parse cache hits"] = sum(
+                    cache.has(t.parser, t.args) for t in tasks
+                )
+                stats["parse cache misses"] = len(tasks) - stats["parse cache hits"]
+            run_parse_tasks(session, tasks, args.workers, instrumentation, cache)
+            if cache is not None:
+                cache.evict()
+
+        # ECDICT fills the gaps of the dedicated English sources
+        with phase("dedupe"):
+            merge_stage_without_overwrite(session, "en_pron", "en_pron_alt")
+            merge_stage_without_overwrite(session, "en_en", "en_en_alt")
+            drop_stage(session, "en_pron_alt", "en_en_alt")
+
+        # English-English
+        with phase("insert en-en"):
+            word_id_acc = load_pair(
+                session,
+                instrumentation.count(
+                    "en-en rows",
+                    iter_staged_words(session, "en_en", "en_pron"),
+                ),
+                "en",
+                "en",
+                word_id_acc,
+            )
+
+        # English-Japanese
+        with phase("insert en-ja"):
+            word_id_acc = load_pair(
+                session,
+                instrumentation.count(
+                    "en-ja rows",
+                    iter_staged_words(session, "en_ja", "en_pron"),
+                ),
+                "en",
+                "ja",
+                word_id_acc,
+            )
+
+        # # English-Chinese
+        with phase("insert en-zh-Hans"):
+            word_id_acc = load_pair(
+                session,
+                instrumentation.count(
+                    "en-zh-Hans rows",
+                    iter_staged_words(session, "en_zh", "en_pron"),
+                ),
+                "en",
+                "zh-Hans",
+                word_id_acc,
+            )
+            drop_stage(session, "en_en", "en_ja", "en_zh", "en_pron")
+
+        # Japanese-Japanese
+        with phase("insert ja-ja"):
+            word_id_acc = load_pair(
+                session,
+                instrumentation.count(
+                    "ja-ja rows",
+                    iter_staged_words(session, "ja_ja", "ja_pron"),
+                ),
+                "ja",
+                "ja",
+                word_id_acc,
+            )
+            drop_stage(session, "ja_ja", "ja_pron")
+
+        # Russian-English
+        with phase("insert ru-en"):
+            word_id_acc = load_pair(
+                session,
+                instrumentation.count(
+                    "ru-en rows",
+                    iter_staged_words(session, "ru_en", "ru_pron"),
+                ),
+                "ru",
+                "en",
+                word_id_acc,
+            )
+            drop_stage(session, "ru_en", "ru_pron")
+            stats["WordForm rows"] = insert_word_forms(session)
+
+        # Structured fields of all sources, once every word has its WordId
+        with phase("word attributes"):
+            attributes, frequencies = insert_word_attributes(session)
+            stats["WordAttribute rows"] = attributes
+            stats["Dictionary frequencies"] = frequencies
+
+        # Precomputed commonness order for top-N suggestions
+        with phase("rank"):
+            stats["Dictionary ranks"] = assign_ranks(session)
+
+        if args.incremental:
+            with phase("soft delete"):
+                soft_delete_unseen(session, stats)
+
+        word_ids.detach_word_map(session)
+    os.remove(WORD_MAP_PATH)
+
+    # Kana (and romaji) reading -> WordId, for lookups by reading
+    with phase("reading index"):
+        with engine.begin() as conn:
+            stats["WordReading rows"] = build_reading_index(conn, args.romaji)
+
+    if args.bulk_load:
+        with phase("create indexes"):
+            with engine.begin() as conn:
+                bulk_load.create_deferred_indexes(conn)
+        with phase("foreign key check"):
+            with engine.connect() as conn:
+                bulk_load.check_foreign_keys(conn)
+
+    if args.fts:
+        with phase("full-text index"):
+            with engine.begin() as conn:
+                fts.create_fts(conn)
+
+    if args.bulk_load:
+        with phase("analyze"):
+            bulk_load.analyze(engine)
+        with phase("vacuum"):
+            bulk_load.vacuum(engine)
+
+    # Last write to DB_PATH: the rows stamped DT_NOW are all committed now
+    with Session(engine) as session:
+        session.add(Build(StartedAt=DT_NOW, CompletedAt=now_ticks()))
+        session.commit()
+
+    # Deduplicated and compressed in a copy, see COMPACT_DB_PATH
+    shard_engine = engine
+    if args.dedupe or args.compress is not None:
+        with phase("compact copy"):
+            copy_database(engine, COMPACT_DB_PATH)
+            shard_engine = create_engine(COMPACT_DB_URL, echo=args.echo)
+        # before compression, which leaves the shared bodies as they are
+        if args.dedupe:
+            with phase("dedupe translations"):
+                with shard_engine.begin() as conn:
+                    stats.update(translation_body.dedupe_translations(conn))
+        if args.compress is not None:
+            with phase("compress translations"):
+                with shard_engine.begin() as conn:
+                    stats.update(compression.compress_translations(conn, args.compress))
+        # VACUUM is what returns the space freed by dedupe and compression
+        with phase("vacuum compact copy"):
+            bulk_load.vacuum(shard_engine)
+        stats["compact database bytes"] = os.path.getsize(COMPACT_DB_PATH)
+
+    # Sorted word table for autocomplete, served without SQL (prefix_index.py)
+    with phase("prefix index"):
+        with engine.connect() as conn:
+            write_prefix_index(conn, PREFIX_INDEX_PATH)
+
+    # Per-pair databases for clients that need only some pairs
+    if args.shards is not None:
+        with phase("shards"):
+            for source, target in write_shards(shard_engine, args.shards):
+                path = os.path.join(args.shards, shard_name(source, target))
+                stats[f"{source}-{target} shard bytes"] = os.path.getsize(path)
+
+    stats["database bytes"] = os.path.getsize(DB_PATH)
+    instrumentation.write_report(args.report, stats)
+    print_timings(instrumentation.timings)
+    for name, count in sorted(stats.items()):
+        print(f"{name:<24}{count:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from data_context import Base
+import fts
+
+# Latin, Cyrillic and kana/kanji words, so every script the app ships is hit
+ALPHABETS = [
+    "abcdefghijklmnopqrstuvwxyz",
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    "あいうえおかきくけこさしすせそたちつてとなにぬねの日本語学生先漢字言葉",
+]
+
+
+def random_word(rng: random.Random) -> str:
+    alphabet = rng.choice(ALPHABETS)
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 10)))
+
+
+def populate(connection: Connection, words: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    vocabulary = [random_word(rng) for _ in range(2_000)]
+
+    connection.exec_driver_sql(
+        "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+    )
+    word_rows = [
+        (i, f"{random_word(rng)}{i}", f"/{random_word(rng)}/") for i in range(words)
+    ]
+    connection.exec_driver_sql(
+        "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+        "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', ?, 0, 0)",
+        word_rows,
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO Translation (WordId, TargetLanguage, TranslationText, "
+        "ModifiedAt, DeleteFlag) VALUES (?, 'en', ?, 0, 0)",
+        [(i, " ".join(rng.choices(vocabulary, k=12))) for i in range(words)],
+    )
+    return [w for _, w, _ in word_rows] + vocabulary
+
+
+def time_queries(func: Callable[[str], Any], queries: list[str]) -> float:
+    # queries per second
+    start = time.perf_counter()
+    for q in queries:
+        func(q)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="FTS5 vs LIKE lookups")
+    arg_parser.add_argument("--words", type=int, default=100_000)
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--json", help="write the results to this file")
+    args = arg_parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    results: dict[str, float] = {}
+
+    with engine.begin() as conn:
+        samples = populate(conn, args.words, args.seed)
+
+        start = time.perf_counter()
+        fts.create_fts(conn)
+        results["fts build seconds"] = time.perf_counter() - start
+
+        rng = random.Random(args.seed + 1)
+        queries = []
+        for s in rng.sample(samples, args.queries):
+            start_at = rng.randint(0, max(0, len(s) - 4))
+            queries.append(s[start_at : start_at + 4])
+
+        def like_words(q: str) -> Any:
+            return conn.exec_driver_sql(
+                "SELECT WordId FROM Dictionary "
+                "WHERE Word LIKE ? OR Pronounce LIKE ? LIMIT 50",
+                (f"%{q}%", f"%{q}%"),
+            ).all()
+
+        def like_translations(q: str) -> Any:
+            return conn.exec_driver_sql(
+                "SELECT WordId FROM Translation WHERE TranslationText LIKE ? LIMIT 50",
+                (f"%{q}%",),
+            ).all()
+
+        results["word substring LIKE q/s"] = time_queries(like_words, queries)
+        results["word substring FTS q/s"] = time_queries(
+            lambda q: fts.search_words(conn, q), queries
+        )
+        results["meaning LIKE q/s"] = time_queries(like_translations, queries)
+        results["meaning FTS q/s"] = time_queries(
+            lambda q: fts.search_translations(conn, q), queries
+        )
+
+    for name, value in results.items():
+        print(f"{name:<28}{value:>12.2f}")
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"words": args.words, **results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from itertools import batched
+from typing import Any, Callable
+import ids
+
+# Rows per executemany, as bulk_load.insert_rows is used
+CHUNK_SIZE = 10_000
+
+# How each kind of id is made and stored: random UUID4 text (the former
+# CreateUser.py ids), time-ordered text, and UUIDv7 as 16 bytes
+KINDS: dict[str, tuple[Callable[[], Any], str]] = {
+    "uuid4 text": (lambda: str(uuid.uuid4()), "TEXT"),
+    "uuid7 text": (ids.new_id, "TEXT"),
+    "ulid text": (ids.ulid, "TEXT"),
+    "uuid7 blob": (lambda: ids.uuid7().bytes, "BLOB"),
+}
+
+
+def bench_kind(
+    path: str, make_id: Callable[[], Any], column_type: str, rows: int, parents: int
+) -> dict[str, float]:
+    # A Tag-like table: a primary key plus a foreign key to a parent table,
+    # indexed as ix_tag_tagcategoryid_modifiedat is
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE Parent (Id {column_type} PRIMARY KEY)")
+    conn.execute(
+        f"CREATE TABLE Child (Id {column_type} PRIMARY KEY, "
+        f"ParentId {column_type} NOT NULL REFERENCES Parent (Id), "
+        "Name TEXT NOT NULL, ModifiedAt INTEGER NOT NULL)"
+    )
+    conn.execute("CREATE INDEX ix_child_parentid ON Child (ParentId, ModifiedAt)")
+
+    parent_ids = [make_id() for _ in range(parents)]
+    conn.executemany("INSERT INTO Parent VALUES (?)", [(p,) for p in parent_ids])
+    conn.commit()
+
+    start = time.perf_counter()
+    for chunk in batched(range(rows), CHUNK_SIZE):
+        conn.executemany(
+            "INSERT INTO Child VALUES (?, ?, ?, 0)",
+            [(make_id(), parent_ids[i % parents], f"tag {i}") for i in chunk],
+        )
+        conn.commit()
+    seconds = time.perf_counter() - start
+
+    sizes = dict(
+        conn.execute(
+            "SELECT name, SUM(pgsize) FROM dbstat "
+            "WHERE name IN ('sqlite_autoindex_Child_1', 'ix_child_parentid') "
+            "GROUP BY name"
+        ).fetchall()
+    )
+    conn.close()
+    return {
+        "rows/s": rows / seconds,
+        "primary key MiB": sizes["sqlite_autoindex_Child_1"] / 2**20,
+        "foreign key index MiB": sizes["ix_child_parentid"] / 2**20,
+        "file MiB": os.path.getsize(path) / 2**20,
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Insert throughput and index size per kind of id"
+    )
+    arg_parser.add_argument("--rows", type=int, default=1_000_000)
+    arg_parser.add_argument("--parents", type=int, default=1_000)
+    arg_parser.add_argument("--json", help="write the results to this file")
+    args = arg_parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind, (make_id, column_type) in KINDS.items():
+            path = os.path.join(tmp, kind.replace(" ", "_") + ".db")
+            results[kind] = bench_kind(
+                path, make_id, column_type, args.rows, args.parents
+            )
+
+    columns = list(next(iter(results.values())))
+    print(f"{'':<14}" + "".join(f"{c:>24}" for c in columns))
+    for kind, result in results.items():
+        print(f"{kind:<14}" + "".join(f"{result[c]:>24.2f}" for c in columns))
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rows": args.rows, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Iterable
+import ja_ja_dict
+import json_stream
+import synthetic_data
+
+try:
+    import orjson
+except ImportError:  # optional, the orjson cases are skipped
+    orjson = None
+
+
+def load_whole(path: str, encoding: str) -> Iterable[Any]:
+    # the former parsers: the whole file as one document
+    with open(path, "r", encoding=encoding) as f:
+        return json.load(f)
+
+
+def load_whole_orjson(path: str, encoding: str) -> Iterable[Any]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data.decode(encoding))
+
+
+def decode_entries_dict(path: str) -> Iterable[Any]:
+    # the former JSON-lines decoding: json.loads, then ItemEntry(**data)
+    with open(path, "r", encoding="utf-8") as f:
+        next(f)
+        for line in f:
+            yield ja_ja_dict.ItemEntry(**json.loads(line))
+
+
+def measure(func: Callable[[], Iterable[Any]], memory: bool) -> float:
+    # seconds to consume every item, or the peak of traced memory in MiB
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    deque(func(), maxlen=0)
+    seconds = time.perf_counter() - start
+    if not memory:
+        return seconds
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="JSON ingestion: whole-file loads vs json_stream"
+    )
+    arg_parser.add_argument("--entries", type=int, default=300_000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--json", help="write the results to this file")
+    args = arg_parser.parse_args()
+
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # the formats of JmdictFurigana.json, the eedict/ejdict objects and
+        # the WordNet JSON lines, see synthetic_data
+        furigana = os.path.join(tmp, "furigana.json")
+        synthetic_data.write_furigana(furigana, args.entries)
+        words = os.path.join(tmp, "dictionary.json")
+        synthetic_data._write_json_object(
+            words,
+            (
+                (synthetic_data.make_word(i, synthetic_data.LATIN), f"meaning {i}")
+                for i in range(args.entries)
+            ),
+        )
+        wordnet = os.path.join(tmp, "wordnet.txt")
+        synthetic_data.write_wordnet(wordnet, args.entries, random.Random(args.seed))
+
+        cases: list[tuple[str, str, Callable[[], Iterable[Any]]]] = [
+            ("array", "json.load", lambda: load_whole(furigana, "utf-8-sig")),
+            (
+                "array",
+                "iter_array",
+                lambda: json_stream.iter_array(furigana, "utf-8-sig"),
+            ),
+            ("object", "json.load", lambda: load_whole(words, "utf-8").items()),
+            ("object", "iter_object", lambda: json_stream.iter_object(words)),
+            ("lines", "json.loads + **data", lambda: decode_entries_dict(wordnet)),
+            ("lines", "iter_entries", lambda: ja_ja_dict.iter_entries(wordnet)),
+        ]
+        if orjson is not None:
+            cases += [
+                (
+                    "array",
+                    "orjson.loads",
+                    lambda: load_whole_orjson(furigana, "utf-8-sig"),
+                ),
+                (
+                    "object",
+                    "orjson.loads",
+                    lambda: load_whole_orjson(words, "utf-8").items(),
+                ),
+            ]
+
+        for fmt, name, func in sorted(cases, key=lambda c: c[0]):
+            seconds = measure(func, memory=False)
+            peak_mib = measure(func, memory=True)
+            results.append(
+                {
+                    "format": fmt,
+                    "reader": name,
+                    "seconds": seconds,
+                    "peak MiB": peak_mib,
+                }
+            )
+            print(f"{fmt:<8}{name:<24}{seconds:>8.2f}s{peak_mib:>10.1f} MiB")
+
+        # the stdlib fallback of json_stream
+        json_stream.orjson = None
+        for fmt, name, func in cases:
+            if name in ("iter_array", "iter_object"):
+                seconds = measure(func, memory=False)
+                name += " (stdlib)"
+                results.append({"format": fmt, "reader": name, "seconds": seconds})
+                print(f"{fmt:<8}{name:<24}{seconds:>8.2f}s")
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"entries": args.entries, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
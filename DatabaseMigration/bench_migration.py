@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Iterable
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from data_context import Language
+import DatabaseMigration as dm
+import bulk_load
+import en_zh_dict, ja_ja_dict, ru_en_dict
+from synthetic_data import write_corpus
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "5m": 5_000_000}
+
+# Pairs loaded with insert_words_and_translations, in build order
+PAIRS = [
+    ("en_zh", "en_pron", "en", "zh-Hans"),
+    ("ja_ja", "ja_pron", "ja", "ja"),
+    ("ru_en", "ru_pron", "ru", "en"),
+]
+
+# Read queries, timed per query over a sample of words
+QUERIES = {
+    "exact lookup": (
+        "SELECT WordId, Pronounce FROM Dictionary "
+        "WHERE Word = :word AND SourceLanguage = :lang"
+    ),
+    "prefix": (
+        "SELECT Word, WordId FROM Dictionary WHERE Word >= :prefix "
+        "AND Word < :prefix || char(1114111) AND SourceLanguage = :lang "
+        "ORDER BY Word LIMIT 10"
+    ),
+    "top by COCA rank": (
+        "SELECT WordId, Word FROM Dictionary WHERE CocaRank IS NOT NULL "
+        "ORDER BY CocaRank LIMIT 5000"
+    ),
+    "top by rank": (
+        "SELECT WordId, Word FROM Dictionary WHERE SourceLanguage = :lang "
+        "AND Rank IS NOT NULL ORDER BY Rank LIMIT 10"
+    ),
+    "attribute": (
+        "SELECT WordId FROM WordAttribute WHERE Key = :key AND Value = :value"
+    ),
+    "sync delta": "SELECT * FROM Dictionary WHERE ModifiedAt >= :since",
+    "sync delta translations": "SELECT * FROM Translation WHERE ModifiedAt >= :since",
+}
+
+# Share of the rows touched after the build, i.e. the size of a sync delta
+DELTA_SHARE = 0.001
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.results: list[dict[str, Any]] = []
+
+    def record(self, name: str, target: str, seconds: float, rows: int) -> None:
+        self.results.append(
+            {
+                "name": name,
+                "target": target,
+                "seconds": round(seconds, 6),
+                "rows": rows,
+                "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+            }
+        )
+        print(f"{target:<8}{name:<36}{seconds:>10.3f}s{rows:>12}")
+
+    def time_rows(self, name: str, target: str, rows: Iterable[Any]) -> None:
+        start = time.perf_counter()
+        count = sum(1 for _ in rows)
+        self.record(name, target, time.perf_counter() - start, count)
+
+
+def bench_parsers(recorder: Recorder) -> None:
+    # the single passes of the build, every kind of row of a file at once
+    parsers: list[tuple[str, Callable[[], Iterable[Any]]]] = [
+        (
+            "parse ECDICT",
+            lambda: en_zh_dict.get_tagged_rows(
+                en_zh_dict.WORDS_PATH, en_zh_dict.FIELDS
+            ),
+        ),
+        ("parse WordNet", lambda: ja_ja_dict.get_tagged_rows(ja_ja_dict.WORDS_PATH)),
+        ("parse furigana", lambda: ja_ja_dict.get_word_prons(ja_ja_dict.PRONS_PATH)),
+        ("parse json", lambda: dm.load_json(dm.EN_EN_PATH)),
+        (
+            "parse OpenRussian nouns",
+            lambda: ru_en_dict.get_tagged_rows(
+                ru_en_dict.NOUNS_PATH,
+                ru_en_dict.NOUNS_FIELDS,
+                ru_en_dict.PARTS_OF_SPEECH[ru_en_dict.NOUNS_PATH],
+            ),
+        ),
+    ]
+    for name, parser in parsers:
+        recorder.time_rows(name, "-", parser())
+
+
+def bench_database(recorder: Recorder, target: str, url: str, seed: int) -> None:
+    engine = create_engine(url)
+    bulk_load.use_bulk_pragmas(engine)
+    bulk_load.create_tables_without_indexes(engine)
+
+    with Session(engine) as session:
+        session.add_all(
+            [
+                Language(LanguageCode=code, LanguageName=code)
+                for code in ["en", "ja", "ru", "zh-Hans"]
+            ]
+        )
+        session.commit()
+        dm.create_stage(session)
+
+        start = time.perf_counter()
+        dm.run_parse_tasks(session, dm.get_parse_tasks(False), 1)
+        staged = session.execute(text("SELECT count(*) FROM Stage")).scalar_one()
+        recorder.record("parse and stage", target, time.perf_counter() - start, staged)
+
+        word_id_acc = 0
+        for trans, pron, source, dest in PAIRS:
+            start = time.perf_counter()
+            new_acc = dm.insert_words_and_translations(
+                session,
+                dm.iter_staged_words(session, trans, pron),
+                source,
+                dest,
+                word_id_acc,
+            )
+            recorder.record(
+                f"insert {source}-{dest}",
+                target,
+                time.perf_counter() - start,
+                new_acc - word_id_acc,
+            )
+            word_id_acc = new_acc
+
+        start = time.perf_counter()
+        attributes, _ = dm.insert_word_attributes(session)
+        recorder.record(
+            "word attributes", target, time.perf_counter() - start, attributes
+        )
+        start = time.perf_counter()
+        ranked = dm.assign_ranks(session)
+        recorder.record("rank", target, time.perf_counter() - start, ranked)
+
+    with engine.begin() as conn:
+        start = time.perf_counter()
+        bulk_load.create_deferred_indexes(conn)
+        recorder.record(
+            "create indexes", target, time.perf_counter() - start, word_id_acc
+        )
+
+        # a small delta, as left by an incremental update
+        since = dm.DT_NOW + 1
+        conn.exec_driver_sql(
+            "UPDATE Dictionary SET ModifiedAt = ? WHERE WordId % ? = 0",
+            (since, int(1 / DELTA_SHARE)),
+        )
+        conn.exec_driver_sql(
+            "UPDATE Translation SET ModifiedAt = ? WHERE TranslationId % ? = 0",
+            (since, int(1 / DELTA_SHARE)),
+        )
+        conn.exec_driver_sql("ANALYZE;")
+
+    rng = random.Random(seed)
+    with engine.connect() as conn:
+        words = conn.exec_driver_sql(
+            "SELECT Word, SourceLanguage FROM Dictionary WHERE WordId IN ({})".format(
+                ", ".join(str(rng.randint(1, word_id_acc)) for _ in range(1000))
+            )
+        ).all()
+        params: dict[str, list[dict[str, Any]]] = {
+            "exact lookup": [{"word": w, "lang": lang} for w, lang in words],
+            "prefix": [{"prefix": w[:2], "lang": lang} for w, lang in words],
+            "top by COCA rank": [{}] * 20,
+            "top by rank": [{"lang": lang} for lang in ["en", "ja", "ru"]] * 20,
+            "attribute": [{"key": "pos", "value": pos} for pos in ["n", "v", "a"]],
+            "sync delta": [{"since": since}] * 20,
+            "sync delta translations": [{"since": since}] * 20,
+        }
+        for name, sql in QUERIES.items():
+            start = time.perf_counter()
+            rows = 0
+            for p in params[name]:
+                rows += len(conn.execute(text(sql), p).all())
+            seconds = time.perf_counter() - start
+            recorder.record(f"query {name}", target, seconds, rows)
+
+    engine.dispose()
+
+
+def compare(results: list[dict[str, Any]], baseline_path: str, tolerance: float) -> int:
+    # number of results slower than the baseline by more than tolerance
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["name"], r["target"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    for r in results:
+        base = baseline.get((r["name"], r["target"]))
+        if base is None or base["seconds"] <= 0:
+            continue
+        ratio = r["seconds"] / base["seconds"]
+        if ratio > 1 + tolerance:
+            regressions += 1
+            print(f"REGRESSION {r['target']} {r['name']}: {ratio:.2f}x baseline")
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Migration benchmark suite")
+    arg_parser.add_argument("--scale", choices=SCALES.keys(), default="10k")
+    arg_parser.add_argument("--words", type=int, help="overrides --scale")
+    arg_parser.add_argument(
+        "--target", choices=["memory", "disk", "both"], default="both"
+    )
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument(
+        "--corpus", help="reuse (or keep) the synthetic corpus in this directory"
+    )
+    arg_parser.add_argument("--json", help="write the results to this file")
+    arg_parser.add_argument("--baseline", help="results JSON to compare against")
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against --baseline (default: 0.25 = 25%%)",
+    )
+    args = arg_parser.parse_args()
+    words = args.words if args.words is not None else SCALES[args.scale]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus if args.corpus is not None else tmp
+        if not os.path.exists(os.path.join(corpus, en_zh_dict.WORDS_PATH)):
+            start = time.perf_counter()
+            write_corpus(corpus, words, args.seed)
+            print(f"corpus written in {time.perf_counter() - start:.1f}s")
+
+        # the parsers read the module path constants, relative to the corpus
+        cwd = os.getcwd()
+        os.chdir(corpus)
+        recorder = Recorder()
+        try:
+            bench_parsers(recorder)
+            if args.target in ["memory", "both"]:
+                bench_database(recorder, "memory", "sqlite:///:memory:", args.seed)
+            if args.target in ["disk", "both"]:
+                url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+                bench_database(recorder, "disk", url, args.seed)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "words": words,
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "results": recorder.results,
+    }
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        sys.exit(1 if compare(recorder.results, args.baseline, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Callable
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from data_context import Base
+from prefix_index import PrefixIndex, write_prefix_index
+from read_only import create_read_only_engine
+
+LIMIT = 10
+
+# Sorts after every other character, the SQL counterpart of prefix_index.END
+MAX_CHAR = "\U0010ffff"
+
+
+def populate(connection: Connection, words: int, seed: int) -> None:
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    connection.exec_driver_sql(
+        "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+    )
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO Dictionary (WordId, Word, SourceLanguage, "
+        "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', NULL, 0, 0)",
+        [
+            (i, "".join(rng.choices(alphabet, k=rng.randint(3, 12))))
+            for i in range(words)
+        ],
+    )
+
+
+def time_queries(func: Callable[[str], Any], queries: list[str]) -> float:
+    # queries per second
+    start = time.perf_counter()
+    for q in queries:
+        func(q)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description="Prefix index vs SQL lookups")
+    arg_parser.add_argument("--db", help="an existing bear_words.db to query")
+    arg_parser.add_argument("--language", default="en")
+    arg_parser.add_argument("--words", type=int, default=500_000)
+    arg_parser.add_argument("--queries", type=int, default=20_000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--json", help="write the results to this file")
+    args = arg_parser.parse_args()
+
+    if args.db is not None:
+        engine = create_read_only_engine(args.db)
+    else:
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            populate(conn, args.words, args.seed)
+
+    results: dict[str, float] = {}
+    with engine.connect() as conn, tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.prefix")
+        start = time.perf_counter()
+        write_prefix_index(conn, path)
+        results["write seconds"] = time.perf_counter() - start
+        results["file MiB"] = os.path.getsize(path) / 2**20
+
+        # what a user types: the first 1-4 characters of existing words
+        rng = random.Random(args.seed + 1)
+        words = [
+            w
+            for (w,) in conn.exec_driver_sql(
+                "SELECT Word FROM Dictionary WHERE SourceLanguage = ?",
+                (args.language,),
+            )
+        ]
+        queries = [w[: rng.randint(1, 4)] for w in rng.choices(words, k=args.queries)]
+
+        def sql_range(q: str) -> Any:
+            # the same range scan the index does, on uq_dictionary
+            return conn.exec_driver_sql(
+                "SELECT Word, WordId FROM Dictionary "
+                "WHERE Word >= ? AND Word < ? AND SourceLanguage = ? "
+                "ORDER BY Word LIMIT ?",
+                (q, q + MAX_CHAR, args.language, LIMIT),
+            ).all()
+
+        def sql_like(q: str) -> Any:
+            return conn.exec_driver_sql(
+                "SELECT Word, WordId FROM Dictionary "
+                "WHERE Word LIKE ? AND SourceLanguage = ? ORDER BY Word LIMIT ?",
+                (q + "%", args.language, LIMIT),
+            ).all()
+
+        with PrefixIndex(path) as index:
+            results["prefix index q/s"] = time_queries(
+                lambda q: index.complete(args.language, q, LIMIT), queries
+            )
+        results["SQL range q/s"] = time_queries(sql_range, queries)
+        results["SQL LIKE q/s"] = time_queries(sql_like, queries[:1000])
+
+    for name, value in results.items():
+        print(f"{name:<20}{value:>12.2f}")
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"words": len(words), **results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Any
+from sqlalchemy import Engine, create_engine
+from data_context import Base
+from read_only import create_read_only_engine
+
+THREADS = [1, 2, 4, 8, 16]
+
+WORD_QUERY = (
+    "SELECT WordId, Pronounce FROM Dictionary "
+    "WHERE Word = ? AND SourceLanguage = 'en' AND DeleteFlag = 0"
+)
+TRANSLATION_QUERY = (
+    "SELECT TargetLanguage, TranslationText FROM Translation "
+    "WHERE WordId = ? AND DeleteFlag = 0"
+)
+
+
+def populate(path: str, words: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = [
+        "".join(rng.choices(alphabet, k=rng.randint(3, 12))) + str(i)
+        for i in range(words)
+    ]
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) "
+            "VALUES ('ja', 'Japanese')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, Pronounce, "
+            "ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', ?, 0, 0)",
+            [(i, w, f"/{w}/") for i, w in enumerate(vocabulary)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Translation (WordId, TargetLanguage, TranslationText, "
+            "ModifiedAt, DeleteFlag) VALUES (?, 'ja', ?, 0, 0)",
+            [(i, f"{w}の意味 " * rng.randint(1, 20)) for i, w in enumerate(vocabulary)],
+        )
+    engine.dispose()
+    return vocabulary
+
+
+def run_readers(engine: Engine, words: list[str], threads: int) -> dict[str, float]:
+    # Every lookup checks a connection out of the pool, as a request
+    # handler would, and reads a word and its translations
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def reader(n: int) -> None:
+        share = words[n::threads]
+        barrier.wait()
+        for word in share:
+            start = time.perf_counter()
+            with engine.connect() as conn:
+                row = conn.exec_driver_sql(WORD_QUERY, (word,)).first()
+                assert row is not None
+                conn.exec_driver_sql(TRANSLATION_QUERY, (row[0],)).all()
+            latencies[n].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=reader, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+
+    ordered = sorted(t for per_thread in latencies for t in per_thread)
+    return {
+        "lookups/s": len(ordered) / seconds,
+        "p50 us": ordered[len(ordered) // 2] * 1e6,
+        "p99 us": ordered[int(len(ordered) * 0.99)] * 1e6,
+    }
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Concurrent lookups: read-write vs read-only mmap engine"
+    )
+    arg_parser.add_argument("--db", help="an existing bear_words.db to query")
+    arg_parser.add_argument("--words", type=int, default=200_000)
+    arg_parser.add_argument("--lookups", type=int, default=50_000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--json", help="write the results to this file")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db
+        if path is None:
+            path = os.path.join(tmp, "bench.db")
+            vocabulary = populate(path, args.words, args.seed)
+        else:
+            engine = create_read_only_engine(path)
+            with engine.connect() as conn:
+                vocabulary = [
+                    w
+                    for (w,) in conn.exec_driver_sql(
+                        "SELECT Word FROM Dictionary WHERE SourceLanguage = 'en'"
+                    )
+                ]
+            engine.dispose()
+        rng = random.Random(args.seed + 1)
+        words = rng.choices(vocabulary, k=args.lookups)
+
+        engines: dict[str, Any] = {
+            "read-write": lambda n: create_engine(
+                f"sqlite:///{path}", pool_size=n, max_overflow=0
+            ),
+            "read-only": lambda n: create_read_only_engine(path, pool_size=n),
+            "read-only no mmap": lambda n: create_read_only_engine(
+                path, pool_size=n, mmap_bytes=0
+            ),
+        }
+        results: list[dict[str, Any]] = []
+        for name, make_engine in engines.items():
+            for threads in THREADS:
+                engine = make_engine(threads)
+                run_readers(engine, words[:1000], threads)  # warm up the pool
+                result = run_readers(engine, words, threads)
+                engine.dispose()
+                results.append({"engine": name, "threads": threads, **result})
+                print(
+                    f"{name:<20}{threads:>4} threads"
+                    f"{result['lookups/s']:>12.0f} lookups/s"
+                    f"{result['p50 us']:>10.0f} us p50"
+                    f"{result['p99 us']:>10.0f} us p99"
+                )
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"lookups": args.lookups, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
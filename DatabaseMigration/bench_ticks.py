@@ -0,0 +1,83 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable
+import ticks
+
+
+def float_datetime_to_ticks(dt: datetime) -> int:
+    # the former helpers.datetime_to_ticks
+    delta = dt - datetime(1, 1, 1, tzinfo=timezone.utc)
+    return int(delta.total_seconds() * 10_000_000)
+
+
+def measure(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Tick conversion: datetime floats vs exact and array paths"
+    )
+    arg_parser.add_argument("--values", type=int, default=1_000_000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--json", help="write the results to this file")
+    args = arg_parser.parse_args()
+
+    # ModifiedAt values between 2000 and 2100, at tick resolution
+    rng = random.Random(args.seed)
+    low = ticks.datetime_to_ticks(datetime(2000, 1, 1, tzinfo=timezone.utc))
+    high = ticks.datetime_to_ticks(datetime(2100, 1, 1, tzinfo=timezone.utc))
+    values = [rng.randint(low, high) for _ in range(args.values)]
+    datetimes = [ticks.ticks_to_datetime(v) for v in values]
+    ns = [ticks.ticks_to_unix_ns(v) for v in values]
+
+    inexact = sum(
+        float_datetime_to_ticks(dt) != ticks.datetime_to_ticks(dt) for dt in datetimes
+    )
+    print(f"float path wrong for {inexact} of {args.values} datetimes")
+
+    cases: dict[str, Callable[[], Any]] = {
+        "now: datetime floats": lambda: [
+            float_datetime_to_ticks(datetime.now(timezone.utc))
+            for _ in range(args.values)
+        ],
+        "now: now_ticks": lambda: [ticks.now_ticks() for _ in range(args.values)],
+        "datetime: floats": lambda: [float_datetime_to_ticks(dt) for dt in datetimes],
+        "datetime: exact": lambda: [ticks.datetime_to_ticks(dt) for dt in datetimes],
+        "ns -> ticks: scalar": lambda: [ticks.unix_ns_to_ticks(v) for v in ns],
+        "ns -> ticks: array": lambda: ticks.unix_ns_to_ticks_array(ns),
+        "ticks -> ns: scalar": lambda: [ticks.ticks_to_unix_ns(v) for v in values],
+        "ticks -> ns: array": lambda: ticks.ticks_to_unix_ns_array(values),
+    }
+    if ticks.numpy is not None:
+        # already in an int64 array, as a column read with numpy would be
+        array = ticks.numpy.array(values, dtype=ticks.numpy.int64)
+        cases["ticks -> ns: int64 array"] = lambda: ticks.ticks_to_unix_ns_array(array)
+
+    results: dict[str, float] = {}
+    for name, func in cases.items():
+        seconds = measure(func)
+        results[name] = seconds
+        print(f"{name:<28}{args.values / seconds:>16,.0f} values/s")
+
+    if args.json is not None:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "values": args.values,
+                    "numpy": ticks.numpy is not None,
+                    "float path wrong": inexact,
+                    "seconds": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+from typing import Any, Iterable
+from sqlalchemy import Engine, MetaData, Table, UniqueConstraint, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from data_context import Base, Dictionary, Translation
+
+# Tables whose secondary indexes are built after the load
+DEFERRED_TABLES = [Dictionary.__table__, Translation.__table__]
+
+# Negative cache_size is in KiB
+CACHE_SIZE_KIB = 512 * 1024
+
+BULK_PRAGMAS = [
+    "PRAGMA foreign_keys=OFF;",
+    "PRAGMA journal_mode=OFF;",
+    "PRAGMA synchronous=OFF;",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KIB};",
+]
+
+# Opt-in: keeps the temp Stage table, its indexes and the in-memory word map
+# in RAM for the whole build instead of spilling them to temp files, so peak
+# memory grows with the size of the sources
+MEMORY_TEMP_PRAGMA = "PRAGMA temp_store=MEMORY;"
+
+
+def use_bulk_pragmas(engine: Engine, memory_temp: bool = False) -> None:
+    # Runs after data_context._set_sqlite_pragma, so foreign keys stay off
+    # until check_foreign_keys. The database is unusable if the build
+    # crashes midway, which is fine since it is rebuilt from scratch.
+    pragmas = BULK_PRAGMAS + ([MEMORY_TEMP_PRAGMA] if memory_temp else [])
+
+    @event.listens_for(engine, "connect")
+    def _set_bulk_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def create_tables_without_indexes(engine: Engine) -> None:
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(metadata)
+
+    for table in DEFERRED_TABLES:
+        copy = metadata.tables[table.name]
+        for constraint in list(copy.constraints):
+            if isinstance(constraint, UniqueConstraint):
+                copy.constraints.remove(constraint)
+        copy.indexes.clear()
+
+    metadata.create_all(engine)
+
+
+def create_deferred_indexes(connection: Connection) -> None:
+    for table in DEFERRED_TABLES:
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                # same uniqueness, but as a standalone index
+                columns = ", ".join(c.name for c in constraint.columns)
+                connection.exec_driver_sql(
+                    f'CREATE UNIQUE INDEX "{constraint.name}" '
+                    f'ON "{table.name}" ({columns});'
+                )
+        for index in table.indexes:
+            index.create(connection)
+
+
+def insert_rows(
+    session: Session,
+    table: Table,
+    columns: list[str],
+    rows: Iterable[tuple[Any, ...]],
+) -> None:
+    # rows are passed straight to the DBAPI cursor, skipping the ORM
+    sql = (
+        f'INSERT INTO "{table.name}" ({", ".join(columns)}) '
+        f'VALUES ({", ".join("?" for _ in columns)})'
+    )
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.executemany(sql, rows)
+    finally:
+        cursor.close()
+
+
+def check_foreign_keys(connection: Connection) -> None:
+    violations = connection.exec_driver_sql("PRAGMA foreign_key_check;").all()
+    if len(violations) > 0:
+        raise RuntimeError(f"Foreign key violations: {violations[:10]}")
+
+
+def analyze(engine: Engine) -> None:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE;")
+        conn.commit()
+
+
+def vacuum(engine: Engine) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # the copy made by VACUUM is as large as the database, keep it on disk
+        # even with MEMORY_TEMP_PRAGMA
+        conn.exec_driver_sql("PRAGMA temp_store=FILE;")
+        conn.exec_driver_sql("VACUUM;")
@@ -0,0 +1,205 @@
+import re
+import time
+import zlib
+from collections import Counter
+from typing import Any, Protocol
+from sqlalchemy.engine import Connection
+
+try:
+    import zstandard
+except ImportError:  # optional, zlib with a preset dictionary is used instead
+    zstandard = None
+
+# Rows sampled to train the shared dictionary, and rows updated per batch
+SAMPLE_ROWS = 20_000
+CHUNK_SIZE = 10_000
+
+# zstd dictionaries are usually ~100 KiB; zlib can only refer back 32 KiB
+ZSTD_DICT_SIZE = 112 * 1024
+ZSTD_LEVEL = 19
+ZLIB_DICT_SIZE = 32 * 1024
+ZLIB_LEVEL = 9
+
+# Pieces of the parsers' boilerplate: field labels, separators, list markers
+__SEGMENT_PATTERN = re.compile(r"\[[^\]\n]{1,60}\] ?|\n-----\n|\n\| ?|\n")
+
+
+class Codec(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def decompress(self, data: bytes) -> bytes: ...
+
+
+class ZstdCodec:
+    def __init__(self, dictionary: bytes) -> None:
+        assert zstandard is not None
+        zdict = zstandard.ZstdCompressionDict(dictionary)
+        # no frame checksum: bodies are short, every byte counts
+        self._compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=zdict, write_checksum=False
+        )
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+
+class ZlibCodec:
+    # raw deflate (no header or checksum) primed with a preset dictionary
+    def __init__(self, dictionary: bytes) -> None:
+        self._dictionary = dictionary
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(ZLIB_LEVEL, wbits=-15, zdict=self._dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        decompressor = zlib.decompressobj(wbits=-15, zdict=self._dictionary)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+CODECS = {"zstd": ZstdCodec, "zlib": ZlibCodec}
+
+# Codecs by (codec, dictionary). Keyed by content rather than by
+# CompressionDictionaryId, which is only unique within one database.
+_codec_cache: dict[tuple[str, bytes], Codec] = {}
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def segment_dictionary(samples: list[bytes], size: int) -> bytes:
+    # Raw-content dictionary: the most valuable recurring segments, most
+    # valuable last since both codecs favor short (recent) match distances
+    counts: Counter[str] = Counter()
+    for sample in samples:
+        counts.update(__SEGMENT_PATTERN.findall(sample.decode("utf-8")))
+
+    segments: list[bytes] = []
+    total = 0
+    for segment, count in sorted(
+        counts.items(), key=lambda item: len(item[0]) * item[1], reverse=True
+    ):
+        encoded = segment.encode("utf-8")
+        if count < 2 or total + len(encoded) > size:
+            continue
+        segments.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(segments))
+
+
+def train_dictionary(codec: str, samples: list[bytes]) -> bytes:
+    if codec == "zlib":
+        # zlib has no trainer
+        return segment_dictionary(samples, ZLIB_DICT_SIZE)
+
+    assert zstandard is not None
+    try:
+        return zstandard.train_dictionary(ZSTD_DICT_SIZE, samples).as_bytes()
+    except zstandard.ZstdError:
+        # too few samples to train on, zstd also accepts raw content
+        return segment_dictionary(samples, ZSTD_DICT_SIZE)
+
+
+def get_codec(codec: str, dictionary: bytes) -> Codec:
+    key = (codec, dictionary)
+    if key not in _codec_cache:
+        _codec_cache[key] = CODECS[codec](dictionary)
+    return _codec_cache[key]
+
+
+def decompress(blob: bytes, codec: str, dictionary: bytes) -> str:
+    return get_codec(codec, dictionary).decompress(blob).decode("utf-8")
+
+
+def compress_translations(
+    connection: Connection, codec: str | None = None
+) -> dict[str, int]:
+    # Moves every TranslationText into TranslationBlob, compressed with a
+    # dictionary trained on a sample of the rows. TranslationText is left
+    # empty (it is NOT NULL). Rows sharing a TranslationBody are left as
+    # they are. Returns size and decode-latency numbers.
+    if codec is None:
+        codec = default_codec()
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression needs the zstandard package")
+
+    count = connection.exec_driver_sql(
+        "SELECT count(*) FROM Translation "
+        "WHERE TranslationBlob IS NULL AND BodyHash IS NULL"
+    ).scalar_one()
+    if count == 0:
+        return {}
+
+    # every n-th row, so the dictionary is the same for the same data
+    step = max(1, count // SAMPLE_ROWS)
+    samples = [
+        text.encode("utf-8")
+        for (text,) in connection.exec_driver_sql(
+            "SELECT TranslationText FROM Translation "
+            "WHERE TranslationBlob IS NULL AND BodyHash IS NULL "
+            "AND TranslationId % ? = 0",
+            (step,),
+        )
+    ]
+    dictionary = train_dictionary(codec, samples)
+    dictionary_id = connection.exec_driver_sql(
+        "INSERT INTO CompressionDictionary (Codec, Data) VALUES (?, ?)",
+        (codec, dictionary),
+    ).lastrowid
+    compressor = get_codec(codec, dictionary)
+
+    report: Counter[str] = Counter()
+    last_id = -1
+    while True:
+        rows = connection.exec_driver_sql(
+            "SELECT TranslationId, TranslationText FROM Translation "
+            "WHERE TranslationBlob IS NULL AND BodyHash IS NULL "
+            "AND TranslationId > ? "
+            "ORDER BY TranslationId LIMIT ?",
+            (last_id, CHUNK_SIZE),
+        ).all()
+        if len(rows) == 0:
+            break
+
+        updates: list[tuple[Any, ...]] = []
+        for translation_id, text in rows:
+            raw = text.encode("utf-8")
+            blob = compressor.compress(raw)
+            report["TranslationText bytes"] += len(raw)
+            report["TranslationBlob bytes"] += len(blob)
+            updates.append((blob, dictionary_id, translation_id))
+        connection.exec_driver_sql(
+            "UPDATE Translation SET TranslationText = '', TranslationBlob = ?, "
+            "CompressionDictionaryId = ? WHERE TranslationId = ?",
+            updates,
+        )
+        last_id = rows[-1][0]
+
+    report["dictionary bytes"] = len(dictionary)
+    report["decode ns/row"] = measure_decode(connection, step)
+    return dict(report)
+
+
+def measure_decode(connection: Connection, step: int) -> int:
+    # mean time to decompress one stored body, the cost paid per lookup
+    codecs = {
+        dictionary_id: get_codec(codec, data)
+        for dictionary_id, codec, data in connection.exec_driver_sql(
+            "SELECT CompressionDictionaryId, Codec, Data FROM CompressionDictionary"
+        )
+    }
+    rows = connection.exec_driver_sql(
+        "SELECT TranslationBlob, CompressionDictionaryId FROM Translation "
+        "WHERE TranslationBlob IS NOT NULL AND TranslationId % ? = 0",
+        (step,),
+    ).all()
+
+    start = time.perf_counter_ns()
+    for blob, dictionary_id in rows:
+        codecs[dictionary_id].decompress(blob).decode("utf-8")
+    return (time.perf_counter_ns() - start) // max(1, len(rows))
@@ -6,8 +6,11 @@ from sqlalchemy import (
     Integer,
     BigInteger,
     Boolean,
+    Index,
+    LargeBinary,
     UniqueConstraint,
     event,
+    text,
 )
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -83,8 +86,32 @@ class Dictionary(Base):
     Pronounce: Mapped[Optional[str]] = mapped_column(String)
     ModifiedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
     DeleteFlag: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
-
-    __table_args__ = (UniqueConstraint("Word", "SourceLanguage", name="uq_dictionary"),)
+    # ECDICT frequency data (en_zh_dict.FREQUENCY_FIELDS), NULL when unranked
+    Collins: Mapped[Optional[int]] = mapped_column(Integer)
+    Oxford: Mapped[Optional[int]] = mapped_column(Integer)
+    BncRank: Mapped[Optional[int]] = mapped_column(Integer)
+    CocaRank: Mapped[Optional[int]] = mapped_column(Integer)
+    # 1 = most common word of its SourceLanguage, set at build time
+    # (DatabaseMigration.assign_ranks)
+    Rank: Mapped[Optional[int]] = mapped_column(Integer)
+
+    # sync pulls filter by ModifiedAt >= lastPullTime. The BNC/COCA indexes
+    # are partial, most words are unranked.
+    __table_args__ = (
+        UniqueConstraint("Word", "SourceLanguage", name="uq_dictionary"),
+        Index("ix_dictionary_modifiedat", "ModifiedAt"),
+        Index("ix_dictionary_sourcelanguage_rank", "SourceLanguage", "Rank"),
+        Index(
+            "ix_dictionary_bncrank",
+            "BncRank",
+            sqlite_where=text("BncRank IS NOT NULL"),
+        ),
+        Index(
+            "ix_dictionary_cocarank",
+            "CocaRank",
+            sqlite_where=text("CocaRank IS NOT NULL"),
+        ),
+    )
 
     source_language: Mapped["Language"] = relationship(
         back_populates="dictionaries", passive_deletes="all"
@@ -95,6 +122,72 @@ class Dictionary(Base):
     bookmarks: Mapped[List["Bookmark"]] = relationship(
         back_populates="dictionary", passive_deletes="all"
     )
+    readings: Mapped[List["WordReading"]] = relationship(
+        back_populates="dictionary", passive_deletes="all"
+    )
+    forms: Mapped[List["WordForm"]] = relationship(
+        back_populates="dictionary", passive_deletes="all"
+    )
+    attributes: Mapped[List["WordAttribute"]] = relationship(
+        back_populates="dictionary", passive_deletes="all"
+    )
+
+
+# Derived from Dictionary at migration time (reading_index.py), not synced
+class WordReading(Base):
+    __tablename__ = "WordReading"
+
+    Reading: Mapped[str] = mapped_column(String, primary_key=True)
+    WordId: Mapped[int] = mapped_column(
+        ForeignKey("Dictionary.WordId", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    dictionary: Mapped["Dictionary"] = relationship(
+        back_populates="readings", passive_deletes="all"
+    )
+
+
+# Inflected forms of Russian words (ru_en_dict.get_word_forms), not synced.
+# BareForm is the stress-stripped lookup key (word_forms.bare_form).
+class WordForm(Base):
+    __tablename__ = "WordForm"
+
+    BareForm: Mapped[str] = mapped_column(String, primary_key=True)
+    WordId: Mapped[int] = mapped_column(
+        ForeignKey("Dictionary.WordId", ondelete="CASCADE"), primary_key=True
+    )
+    Tag: Mapped[str] = mapped_column(String, primary_key=True)
+    Form: Mapped[str] = mapped_column(String, nullable=False)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    dictionary: Mapped["Dictionary"] = relationship(
+        back_populates="forms", passive_deletes="all"
+    )
+
+
+# Structured fields of the sources (part of speech, tags, gender, aspect,
+# synonyms, ...), not synced. Keyed by (Key, Value) first, so that e.g. all
+# perfective verbs are a range of the primary key.
+class WordAttribute(Base):
+    __tablename__ = "WordAttribute"
+
+    Key: Mapped[str] = mapped_column(String, primary_key=True)
+    Value: Mapped[str] = mapped_column(String, primary_key=True)
+    WordId: Mapped[int] = mapped_column(
+        ForeignKey("Dictionary.WordId", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = (
+        Index("ix_wordattribute_wordid", "WordId"),
+        {"sqlite_with_rowid": False},
+    )
+
+    dictionary: Mapped["Dictionary"] = relationship(
+        back_populates="attributes", passive_deletes="all"
+    )
 
 
 class Translation(Base):
@@ -112,9 +205,19 @@ class Translation(Base):
     TranslationText: Mapped[str] = mapped_column(String, nullable=False)
     ModifiedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
     DeleteFlag: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Set in compressed builds (compression.py), TranslationText is '' then
+    TranslationBlob: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+    CompressionDictionaryId: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("CompressionDictionary.CompressionDictionaryId")
+    )
+    # Set in deduplicated builds (translation_body.py), likewise
+    BodyHash: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("TranslationBody.BodyHash")
+    )
 
     __table_args__ = (
         UniqueConstraint("WordId", "TargetLanguage", name="uq_translation"),
+        Index("ix_translation_modifiedat", "ModifiedAt"),
     )
 
     dictionary: Mapped["Dictionary"] = relationship(
@@ -123,8 +226,57 @@ class Translation(Base):
     target_language: Mapped["Language"] = relationship(
         back_populates="translations_target", passive_deletes="all"
     )
+    # translation_text.read_text resolves the text through these two
+    compression_dictionary: Mapped[Optional["CompressionDictionary"]] = relationship(
+        back_populates="translations"
+    )
+    body: Mapped[Optional["TranslationBody"]] = relationship(
+        back_populates="translations"
+    )
+
+
+# Shared dictionaries the TranslationBlob of compressed builds refer to
+class CompressionDictionary(Base):
+    __tablename__ = "CompressionDictionary"
+
+    CompressionDictionaryId: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True
+    )
+    Codec: Mapped[str] = mapped_column(String, nullable=False)
+    Data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    translations: Mapped[List["Translation"]] = relationship(
+        back_populates="compression_dictionary"
+    )
 
 
+# Bodies shared by several translations in deduplicated builds
+# (translation_body.py). Keyed by a hash of the text, so a body keeps its key
+# from one build to the next.
+class TranslationBody(Base):
+    __tablename__ = "TranslationBody"
+
+    BodyHash: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=False
+    )
+    BodyText: Mapped[str] = mapped_column(String, nullable=False)
+
+    translations: Mapped[List["Translation"]] = relationship(back_populates="body")
+
+
+# One row per completed build, written by its last transaction, not synced.
+# StartedAt is the ModifiedAt the build stamped on every row it changed, so
+# all rows up to it are committed (snapshot.current_version).
+class Build(Base):
+    __tablename__ = "Build"
+
+    BuildId: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    StartedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    CompletedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+# The String ids of the user tables are generated by whoever writes the rows,
+# time-ordered with ids.new_id
 class Phrase(Base):
     __tablename__ = "Phrase"
 
@@ -142,6 +294,7 @@ class Phrase(Base):
 
     __table_args__ = (
         UniqueConstraint("PhraseText", "PhraseLanguage", "UserName", name="uq_phrase"),
+        Index("ix_phrase_username_modifiedat", "UserName", "ModifiedAt"),
     )
 
     phrase_language: Mapped["Language"] = relationship(
@@ -167,7 +320,10 @@ class Bookmark(Base):
     ModifiedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
     DeleteFlag: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
-    __table_args__ = (UniqueConstraint("UserName", "WordId", name="uq_bookmark"),)
+    __table_args__ = (
+        UniqueConstraint("UserName", "WordId", name="uq_bookmark"),
+        Index("ix_bookmark_username_modifiedat", "UserName", "ModifiedAt"),
+    )
 
     user: Mapped["User"] = relationship(
         back_populates="bookmarks", passive_deletes="all"
@@ -194,6 +350,7 @@ class TagCategory(Base):
 
     __table_args__ = (
         UniqueConstraint("CategoryName", "UserName", name="uq_tagcategory"),
+        Index("ix_tagcategory_username_modifiedat", "UserName", "ModifiedAt"),
     )
 
     user: Mapped["User"] = relationship(
@@ -216,7 +373,11 @@ class Tag(Base):
     ModifiedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
     DeleteFlag: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
-    __table_args__ = (UniqueConstraint("TagName", "TagCategoryId", name="uq_tag"),)
+    # tags are owned through their category, so pulls join on TagCategoryId
+    __table_args__ = (
+        UniqueConstraint("TagName", "TagCategoryId", name="uq_tag"),
+        Index("ix_tag_tagcategoryid_modifiedat", "TagCategoryId", "ModifiedAt"),
+    )
 
     tag_category: Mapped["TagCategory"] = relationship(
         back_populates="tags", passive_deletes="all"
@@ -240,7 +401,10 @@ class BookmarkTag(Base):
     ModifiedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
     DeleteFlag: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
-    __table_args__ = (UniqueConstraint("BookmarkId", "TagId", name="uq_bookmark_tag"),)
+    __table_args__ = (
+        UniqueConstraint("BookmarkId", "TagId", name="uq_bookmark_tag"),
+        Index("ix_bookmarktag_bookmarkid_modifiedat", "BookmarkId", "ModifiedAt"),
+    )
 
     bookmark: Mapped["Bookmark"] = relationship(
         back_populates="tags", passive_deletes="all"
@@ -261,7 +425,10 @@ class PhraseTag(Base):
     ModifiedAt: Mapped[int] = mapped_column(BigInteger, nullable=False)
     DeleteFlag: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
-    __table_args__ = (UniqueConstraint("PhraseId", "TagId", name="uq_phrase_tag"),)
+    __table_args__ = (
+        UniqueConstraint("PhraseId", "TagId", name="uq_phrase_tag"),
+        Index("ix_phrasetag_phraseid_modifiedat", "PhraseId", "ModifiedAt"),
+    )
 
     phrase: Mapped["Phrase"] = relationship(
         back_populates="phrase_tags", passive_deletes="all"
@@ -1,6 +1,7 @@
 import csv
 import json
-from typing import Any
+from typing import Any, Iterator
+from helpers import ATTRIBUTE, DETAILS, iter_lines
 
 WORDS_PATH = "data/ecdict/ecdict.csv"
 SAMPLE_PATH = "data/ecdict/ecdict.mini.csv"
@@ -14,50 +15,116 @@ FIELDS = [
 ]
 
 
-def get_word_prons_and_details(
-    path: str, fields: list[tuple[str, str]]
-) -> tuple[dict[str, str], dict[str, str], dict[str, str]]:
-    word_pron: dict[str, str] = {}
-    word_def: dict[str, str] = {}
-    word_trans: dict[str, str] = {}
+# Integer fields, 0 or empty when the word is not ranked: Collins stars
+# (1-5), Oxford 3000 membership (1), BNC and COCA frequency ranks
+FREQUENCY_FIELDS = ["collins", "oxford", "bnc", "frq"]
+
 
+def iter_rows(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[dict[str, str]]:
     with open(path, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f, delimiter=",")
-        for row in reader:
-            word = row["word"].strip()
-            pron = row["phonetic"].strip()
-            w_def = row["definition"].strip()
-            trans = row["translation"].strip()
-
-            if type(word) is not str:
-                continue
-
-            if type(pron) is str and pron != "":
-                word_pron[word] = f"/{pron}/"
-
-            if type(w_def) is str and w_def != "":
-                word_def[word] = w_def
+        if byte_range is not None:
+            # rows of a shard, see helpers.split_line_ranges
+            # (ECDICT escapes newlines, so every row is a single line)
+            reader = csv.DictReader(
+                iter_lines(path, *byte_range),
+                fieldnames=reader.fieldnames,
+                delimiter=",",
+            )
+        yield from reader
+
+
+def row_details(
+    row: dict[str, str], fields: list[tuple[str, str]]
+) -> tuple[str, str | None, str | None, str] | None:
+    word = row["word"].strip()
+    pron = row["phonetic"].strip()
+    w_def = row["definition"].strip()
+    trans = row["translation"].strip()
+
+    if type(word) is not str:
+        return None
+
+    word_pron: str | None = None
+    if type(pron) is str and pron != "":
+        word_pron = f"/{pron}/"
+
+    word_def: str | None = None
+    if type(w_def) is str and w_def != "":
+        word_def = w_def
+
+    detail: str = ""
+    if type(trans) is str:
+        detail = trans.replace("\\n", "\n")
+
+    lines: list[str] = []
+    for field, field_desc in fields:
+        value = row[field].strip()
+        if type(value) is str and value != "" and value != "0":
+            lines.append(f"[{field_desc}] {value}")
+
+    fields_str = "\n".join(lines)
+    if len(lines) > 0:
+        if detail == "":
+            detail = fields_str
+        else:
+            detail += "\n-----\n" + fields_str
+
+    return (word, word_pron, word_def, detail)
+
+
+def row_attributes(row: dict[str, str]) -> Iterator[tuple[str, str, str]]:
+    # (word, key, value) of the structured fields: parts of speech
+    # ("n:46/v:54" -> n, v), exam tags ("zk gk cet4") and the frequencies
+    word = row["word"].strip()
+
+    for pos in row["pos"].split("/"):
+        pos = pos.split(":")[0].strip()
+        if pos != "":
+            yield (word, "pos", pos)
+
+    for tag in row["tag"].split():
+        yield (word, "tag", tag)
+
+    for field in FREQUENCY_FIELDS:
+        value = row[field].strip()
+        if value.isdigit() and int(value) > 0:
+            yield (word, field, value)
+
+
+def get_tagged_rows(
+    path: str,
+    fields: list[tuple[str, str]],
+    byte_range: tuple[int, int] | None = None,
+) -> Iterator[tuple[str, Any]]:
+    # ECDICT read once: the rows of get_word_prons_and_details (DETAILS) and
+    # of get_word_attributes (ATTRIBUTE) of every entry
+    for row in iter_rows(path, byte_range):
+        details = row_details(row, fields)
+        if details is not None:
+            yield (DETAILS, details)
+        for attribute in row_attributes(row):
+            yield (ATTRIBUTE, attribute)
 
-            detail: str = ""
-            if type(trans) is str:
-                detail = trans.replace("\\n", "\n")
 
-            lines: list[str] = []
-            for field, field_desc in fields:
-                value = row[field].strip()
-                if type(value) is str and value != "" and value != "0":
-                    lines.append(f"[{field_desc}] {value}")
-
-            fields_str = "\n".join(lines)
-            if len(lines) > 0:
-                if detail == "":
-                    detail = fields_str
-                else:
-                    detail += "\n-----\n" + fields_str
-
-            word_trans[word] = detail
-
-    return (word_pron, word_def, word_trans)
+def get_word_prons_and_details(
+    path: str,
+    fields: list[tuple[str, str]],
+    byte_range: tuple[int, int] | None = None,
+) -> Iterator[tuple[str, str | None, str | None, str]]:
+    for row in iter_rows(path, byte_range):
+        details = row_details(row, fields)
+        if details is not None:
+            yield details
+
+
+def get_word_attributes(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[tuple[str, str, str]]:
+    for row in iter_rows(path, byte_range):
+        yield from row_attributes(row)
 
 
 def get_word_roots(path: str) -> dict[str, str]:
@@ -0,0 +1,131 @@
+from sqlalchemy import Row
+from sqlalchemy.engine import Connection
+
+# trigram matches substrings in any script, so it also works for Japanese and
+# Chinese words, which unicode61 would treat as one long token
+TOKENIZER = "trigram"
+
+# Queries shorter than this cannot use a trigram index
+MIN_FTS_QUERY = 3
+
+# (fts table, content table, content rowid, indexed columns)
+FTS_TABLES = [
+    ("DictionaryFts", "Dictionary", "WordId", ["Word", "Pronounce"]),
+    ("TranslationFts", "Translation", "TranslationId", ["TranslationText"]),
+]
+
+
+def create_fts(connection: Connection, tokenizer: str = TOKENIZER) -> None:
+    # External content tables: the text is stored once, in the content table.
+    # The index is (re)built in one pass, then kept in sync by triggers.
+    for fts, table, rowid, columns in FTS_TABLES:
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{c}" for c in columns)
+        old_cols = ", ".join(f"old.{c}" for c in columns)
+
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{cols}, content='{table}', content_rowid='{rowid}', "
+            f"tokenize='{tokenizer}');"
+        )
+        connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild');")
+
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{rowid}, {new_cols}); "
+            f"END;"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+            f"VALUES ('delete', old.{rowid}, {old_cols}); "
+            f"END;"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+            f"VALUES ('delete', old.{rowid}, {old_cols}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{rowid}, {new_cols}); "
+            f"END;"
+        )
+
+
+def drop_fts(connection: Connection) -> None:
+    for fts, _, _, _ in FTS_TABLES:
+        for trigger in ["ai", "ad", "au"]:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{trigger};")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts};")
+
+
+def _phrase(query: str) -> str:
+    # a single FTS5 string, so operators in the query are matched literally
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _like(query: str, prefix_only: bool) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%" if prefix_only else "%" + escaped + "%"
+
+
+def search_words(
+    connection: Connection,
+    query: str,
+    source_language: str | None = None,
+    prefix_only: bool = False,
+    limit: int = 50,
+) -> list[Row]:
+    # (WordId, Word, SourceLanguage, Pronounce) of words whose Word or
+    # Pronounce starts with / contains the query
+    params: dict[str, object] = {"lang": source_language, "limit": limit}
+    conditions = ["d.DeleteFlag = 0", "(:lang IS NULL OR d.SourceLanguage = :lang)"]
+
+    if len(query) >= MIN_FTS_QUERY:
+        params["match"] = _phrase(query)
+        conditions.append(
+            "d.WordId IN "
+            "(SELECT rowid FROM DictionaryFts WHERE DictionaryFts MATCH :match)"
+        )
+    if prefix_only or len(query) < MIN_FTS_QUERY:
+        # LIKE with ESCAPE cannot use the trigram index, so prefixes are
+        # matched as substrings first and filtered afterwards
+        params["like"] = _like(query, prefix_only)
+        conditions.append(
+            "(d.Word LIKE :like ESCAPE '\\' OR d.Pronounce LIKE :like ESCAPE '\\')"
+        )
+
+    return connection.exec_driver_sql(
+        "SELECT d.WordId, d.Word, d.SourceLanguage, d.Pronounce FROM Dictionary d "
+        f"WHERE {' AND '.join(conditions)} "
+        "ORDER BY length(d.Word), d.Word LIMIT :limit",
+        params,
+    ).all()
+
+
+def search_translations(
+    connection: Connection,
+    query: str,
+    target_language: str | None = None,
+    limit: int = 50,
+) -> list[Row]:
+    # (WordId, Word, TargetLanguage, TranslationText) of translations
+    # containing the query, i.e. lookup by meaning
+    params: dict[str, object] = {"lang": target_language, "limit": limit}
+    conditions = ["t.DeleteFlag = 0", "(:lang IS NULL OR t.TargetLanguage = :lang)"]
+
+    if len(query) >= MIN_FTS_QUERY:
+        params["match"] = _phrase(query)
+        conditions.append(
+            "t.TranslationId IN "
+            "(SELECT rowid FROM TranslationFts WHERE TranslationFts MATCH :match)"
+        )
+    else:
+        params["like"] = _like(query, False)
+        conditions.append("t.TranslationText LIKE :like ESCAPE '\\'")
+
+    return connection.exec_driver_sql(
+        "SELECT t.WordId, d.Word, t.TargetLanguage, t.TranslationText "
+        "FROM Translation t JOIN Dictionary d ON d.WordId = t.WordId "
+        f"WHERE {' AND '.join(conditions)} "
+        "ORDER BY t.WordId LIMIT :limit",
+        params,
+    ).all()
@@ -1,12 +1,14 @@
-from datetime import datetime, timezone
+import os
 import string
+from typing import Iterator
 
-
-def datetime_to_ticks(dt: datetime) -> int:
-    epoch_start = datetime(1, 1, 1, tzinfo=timezone.utc)
-    ticks_per_second = 10_000_000
-    delta = dt - epoch_start
-    return int(delta.total_seconds() * ticks_per_second)
+# Tags of the (tag, row) pairs yielded by the parsers' get_tagged_rows, which
+# read a source once for every kind of row it holds
+DETAILS = "details"
+ATTRIBUTE = "attribute"
+FORM = "form"
+SYNSET = "synset"
+POSITION = "position"
 
 
 def merge_without_overwrite[K, V](
@@ -20,3 +22,46 @@ def merge_without_overwrite[K, V](
 
 def is_symbol_or_space_only(s: str):
     return all(c in string.punctuation or c.isspace() for c in s)
+
+
+def split_line_ranges(path: str, count: int, start: int = 0) -> list[tuple[int, int]]:
+    # split the bytes [start, EOF) of a file into up to `count` ranges that
+    # all begin at the start of a line
+    size = os.path.getsize(path)
+    bounds = [start]
+
+    with open(path, "rb") as f:
+        for i in range(1, count):
+            f.seek(start + (size - start) * i // count)
+            f.readline()
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+
+    bounds.append(size)
+    return [(s, e) for s, e in zip(bounds, bounds[1:]) if s < e]
+
+
+def iter_lines(path: str, start: int = 0, end: int | None = None) -> Iterator[str]:
+    # yield the decoded lines beginning in the byte range [start, end)
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        for line in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(line)
+            yield line.decode("utf-8")
+
+
+def header_end(path: str) -> int:
+    # byte offset of the second line
+    with open(path, "rb") as f:
+        f.readline()
+        return f.tell()
+
+
+def print_timings(timings: dict[str, float]) -> None:
+    for phase, seconds in timings.items():
+        print(f"{phase:<24}{seconds:>10.2f}s")
+    print(f"{'total':<24}{sum(timings.values()):>10.2f}s")
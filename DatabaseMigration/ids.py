@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+import uuid
+from typing import Any
+from sqlalchemy import LargeBinary
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import TypeDecorator
+
+# Crockford's base32, the ULID alphabet
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+class _Sequence:
+    # Strictly increasing (milliseconds, sequence) pairs. The sequence
+    # starts at a random value every millisecond and is incremented within
+    # it; once exhausted (or if the clock goes back) the next millisecond
+    # is borrowed.
+    def __init__(self, bits: int, seed_bits: int) -> None:
+        self._max = (1 << bits) - 1
+        self._seed_bits = seed_bits
+        self._lock = threading.Lock()
+        self._ms = 0
+        self._sequence = 0
+
+    def next(self) -> tuple[int, int]:
+        with self._lock:
+            ms = time.time_ns() // 1_000_000
+            if ms > self._ms:
+                self._ms = ms
+                self._sequence = _random_bits(self._seed_bits)
+            elif self._sequence < self._max:
+                self._sequence += 1
+            else:
+                self._ms += 1
+                self._sequence = 0
+            return (self._ms, self._sequence)
+
+
+def _random_bits(bits: int) -> int:
+    return int.from_bytes(os.urandom((bits + 7) // 8)) >> (-bits % 8)
+
+
+# rand_a of UUIDv7 is the counter of "Method 1" in RFC 9562, seeded with
+# one bit less so there is room to count
+_uuid7_sequence = _Sequence(12, 11)
+_ulid_sequence = _Sequence(80, 80)
+
+
+def uuid7() -> uuid.UUID:
+    # RFC 9562 UUIDv7: 48-bit Unix milliseconds, a 12-bit counter and 62
+    # random bits. Ids made by one process are strictly increasing.
+    ms, counter = _uuid7_sequence.next()
+    value = ms << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | _random_bits(62)
+    return uuid.UUID(int=value)
+
+
+def ulid() -> str:
+    # 26 characters: 48-bit Unix milliseconds and 80 random bits, which are
+    # incremented within a millisecond (monotonic ULID)
+    ms, randomness = _ulid_sequence.next()
+    value = ms << 80 | randomness
+    return "".join(ULID_ALPHABET[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def new_id() -> str:
+    # Primary keys of the user tables. Text in the canonical 8-4-4-4-12
+    # form, as the API stores Guid.ToString(), but time-ordered, so new
+    # rows land at the right edge of the key and foreign-key indexes.
+    return str(uuid7())
+
+
+def id_time_ms(id_: str) -> int:
+    # creation time of a new_id() id, in Unix milliseconds
+    return uuid.UUID(id_).int >> 80
+
+
+def to_blob(id_: str) -> bytes:
+    return uuid.UUID(id_).bytes
+
+
+def from_blob(blob: bytes) -> str:
+    return str(uuid.UUID(bytes=blob))
+
+
+class UuidBlob(TypeDecorator[str]):
+    # A UUID column stored as its 16 bytes instead of 36 characters of
+    # text, converted to and from the text form. The API reads ids as
+    # text, so the shared schema keeps String ids; see bench_ids.py.
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> bytes | None:
+        return None if value is None else to_blob(value)
+
+    def process_result_value(self, value: Any, dialect: Dialect) -> str | None:
+        return None if value is None else from_blob(value)
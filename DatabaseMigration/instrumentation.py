@@ -0,0 +1,134 @@
+import json
+import logging
+import platform
+import sqlite3
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Iterable, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows, peak RSS is not reported there
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# A progress line is logged every this many rows of a counted stream
+PROGRESS_ROWS = 100_000
+
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+
+def peak_rss_bytes() -> int | None:
+    # high-water mark of this process and of its finished children (the
+    # parse workers), whichever is larger
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class Phase:
+    name: str
+    seconds: float = 0.0
+    rows: int = 0
+    peak_rss_bytes: int | None = None
+
+    @property
+    def rows_per_sec(self) -> float | None:
+        return self.rows / self.seconds if self.rows and self.seconds > 0 else None
+
+
+class Instrumentation:
+    # Per-phase wall time, rows and peak RSS of a build, plus named row
+    # counters. Rows are counted by passing streams through count(), which
+    # yields them unchanged.
+    def __init__(self) -> None:
+        self.phases: dict[str, Phase] = {}
+        self.counters: Counter[str] = Counter()
+        self._current: Phase | None = None
+        self._start = time.perf_counter()
+
+    @property
+    def timings(self) -> dict[str, float]:
+        # phase -> seconds, as helpers.print_timings takes
+        return {name: phase.seconds for name, phase in self.phases.items()}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Phase]:
+        phase = self.phases.setdefault(name, Phase(name))
+        outer, self._current = self._current, phase
+        logger.debug("%s: started", name)
+        start = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            phase.seconds += time.perf_counter() - start
+            phase.peak_rss_bytes = peak_rss_bytes()
+            self._current = outer
+            logger.info("%s: %s", name, _describe(phase))
+
+    def count[T](self, name: str, rows: Iterable[T]) -> Iterator[T]:
+        phase = self._current
+        start = time.perf_counter()
+        n = 0
+        try:
+            for row in rows:
+                yield row
+                n += 1
+                if n % PROGRESS_ROWS == 0:
+                    elapsed = time.perf_counter() - start
+                    logger.info("%s: %d rows, %.0f rows/s", name, n, n / elapsed)
+        finally:
+            self.counters[name] += n
+            if phase is not None:
+                phase.rows += n
+            logger.debug("%s: %d rows", name, n)
+
+    def report(self, stats: dict[str, int] | None = None) -> dict[str, Any]:
+        return {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "seconds": round(time.perf_counter() - self._start, 3),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "phases": [
+                asdict(phase)
+                | {
+                    "seconds": round(phase.seconds, 6),
+                    "rows_per_sec": _round(phase.rows_per_sec),
+                }
+                for phase in self.phases.values()
+            ],
+            "counters": dict(self.counters),
+            "stats": dict(stats or {}),
+        }
+
+    def write_report(self, path: str, stats: dict[str, int] | None = None) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(stats), f, indent=2, ensure_ascii=False)
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
+
+
+def _describe(phase: Phase) -> str:
+    text = f"{phase.seconds:.2f}s"
+    if phase.rows_per_sec is not None:
+        text += f", {phase.rows} rows, {phase.rows_per_sec:.0f} rows/s"
+    if phase.peak_rss_bytes is not None:
+        text += f", peak RSS {phase.peak_rss_bytes / 2**20:.0f} MiB"
+    return text
+
+
+def configure_logging(level: str) -> None:
+    logging.basicConfig(level=level, format=LOG_FORMAT)
@@ -1,14 +1,20 @@
 from dataclasses import dataclass
-import json
 import re
-from typing import Any
+from typing import Any, Iterator
+from helpers import ATTRIBUTE, DETAILS, SYNSET, iter_lines
+import json_stream
+
+try:
+    import msgspec
+except ImportError:  # optional, records are decoded with json_stream.loads
+    msgspec = None
 
 WORDS_PATH = "data/jjdict/jpn_wn_lmf_glosses_json_v2.txt"
 PRONS_PATH = "data/jjdict/JmdictFurigana.json"
-__PATTERN = r'^[A-Za-z!"#$%&\'()*+,\-./:;<=>?@[\\\]^_`{|}~ ]+$'
+__PATTERN = re.compile(r'^[A-Za-z!"#$%&\'()*+,\-./:;<=>?@[\\\]^_`{|}~ ]+$')
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemEntry:
     id: str
     item: str
@@ -18,61 +24,108 @@ class ItemEntry:
     synonyms2: list[list[str]]
 
 
-def get_word_details(path: str) -> dict[str, str]:
-    word_trans: dict[str, str] = {}
-
-    with open(path, "r", encoding="utf-8") as f:
-        next(f)  # skip credit line
-
-        for line in f:
-            data = json.loads(line)
-            entry = ItemEntry(**data)
-
-            # skip English words, symbols
-            if re.fullmatch(__PATTERN, entry.item) is not None:
-                continue
-
-            if len(entry.glosses) == 1:
-                detail = entry.glosses[0]
-            else:
-                lines: list[str] = []
-                for i, g in enumerate(entry.glosses):
-                    lines.append(f"[{i + 1}] {g}")
-                detail = "\n".join(lines)
+# msgspec decodes a record straight into an ItemEntry, without the
+# intermediate dict
+_ENTRY_DECODER = msgspec.json.Decoder(ItemEntry) if msgspec is not None else None
 
-            lines: list[str] = []
-            if entry.pos != "":
-                lines.append(f"[品詞] {entry.pos}")
-            if len(entry.synonyms2) == 1 and len(entry.synonyms2[0]) > 0:
-                lines.append("[同義語・類義語] " + ", ".join(entry.synonyms))
-            elif len(entry.synonyms2) > 1:
-                syn_lines = ["[同義語・類義語]"]
-                for i, s in enumerate(entry.synonyms2):
-                    if len(s) > 0:
-                        syn_lines.append(f"| [{i + 1}] " + ", ".join(s))
 
-                if len(syn_lines) > 1:
-                    lines.extend(syn_lines)
+def decode_entry(line: str) -> ItemEntry:
+    if _ENTRY_DECODER is not None:
+        return _ENTRY_DECODER.decode(line)
+    return ItemEntry(**json_stream.loads(line))
 
-            fields_str = "\n".join(lines)
-            if len(lines) > 0:
-                if detail == "":
-                    detail = fields_str
-                else:
-                    detail += "\n-----\n" + fields_str
 
-            word_trans[entry.item] = detail
-
-    return word_trans
-
-
-def get_word_prons(path: str) -> dict[str, str]:
-    word_prons: dict[str, str] = {}
-
-    with open(path, "r", encoding="utf-8-sig") as f:
-        data: list[dict[str, Any]] = json.load(f)
-
-    for d in data:
-        word_prons[d["text"]] = d["reading"]
+def iter_entries(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[ItemEntry]:
+    with open(path, "r", encoding="utf-8") as f:
+        next(f)  # skip credit line
 
-    return word_prons
+        lines = f if byte_range is None else iter_lines(path, *byte_range)
+        for line in lines:
+            yield decode_entry(line)
+
+
+def iter_word_entries(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[ItemEntry]:
+    # skip English words, symbols
+    for entry in iter_entries(path, byte_range):
+        if __PATTERN.fullmatch(entry.item) is None:
+            yield entry
+
+
+def format_detail(entry: ItemEntry) -> str:
+    if len(entry.glosses) == 1:
+        detail = entry.glosses[0]
+    else:
+        detail = "\n".join([f"[{i}] {g}" for i, g in enumerate(entry.glosses, 1)])
+
+    lines: list[str] = []
+    if entry.pos != "":
+        lines.append(f"[品詞] {entry.pos}")
+    if len(entry.synonyms2) == 1 and len(entry.synonyms2[0]) > 0:
+        lines.append("[同義語・類義語] " + ", ".join(entry.synonyms))
+    elif len(entry.synonyms2) > 1:
+        syn_lines = [
+            f"| [{i}] " + ", ".join(s)
+            for i, s in enumerate(entry.synonyms2, 1)
+            if len(s) > 0
+        ]
+        if len(syn_lines) > 0:
+            lines.append("[同義語・類義語]")
+            lines.extend(syn_lines)
+
+    if len(lines) == 0:
+        return detail
+    fields_str = "\n".join(lines)
+    return fields_str if detail == "" else detail + "\n-----\n" + fields_str
+
+
+def entry_attributes(entry: ItemEntry) -> Iterator[tuple[str, str, str]]:
+    # (word, key, value) of the part of speech and of every synonym
+    if entry.pos != "":
+        yield (entry.item, "pos", entry.pos)
+    for synonym in entry.synonyms:
+        yield (entry.item, "synonym", synonym)
+
+
+def get_tagged_rows(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[tuple[str, Any]]:
+    # WordNet read once: the rows of get_word_details (DETAILS),
+    # get_word_attributes (ATTRIBUTE) and get_word_synsets (SYNSET)
+    for entry in iter_word_entries(path, byte_range):
+        yield (DETAILS, (entry.item, format_detail(entry)))
+        for attribute in entry_attributes(entry):
+            yield (ATTRIBUTE, attribute)
+        yield (SYNSET, (entry.item, entry.id))
+
+
+def get_word_details(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[tuple[str, str]]:
+    for entry in iter_word_entries(path, byte_range):
+        yield (entry.item, format_detail(entry))
+
+
+def get_word_attributes(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[tuple[str, str, str]]:
+    for entry in iter_word_entries(path, byte_range):
+        yield from entry_attributes(entry)
+
+
+def get_word_synsets(
+    path: str, byte_range: tuple[int, int] | None = None
+) -> Iterator[tuple[str, str]]:
+    # (word, synset id) of every entry. WordNet has no frequencies, but
+    # common words have many senses, so the synset count stands in for one.
+    for entry in iter_word_entries(path, byte_range):
+        yield (entry.item, entry.id)
+
+
+def get_word_prons(path: str) -> Iterator[tuple[str, str]]:
+    # streamed, the file is a single array of some 200k entries
+    for d in json_stream.iter_array(path, "utf-8-sig"):
+        yield (d["text"], d["reading"])
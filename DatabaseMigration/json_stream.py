@@ -0,0 +1,160 @@
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib decoder is used instead
+    orjson = None
+
+# Characters read from the file at once while streaming
+READ_SIZE = 1024 * 1024
+
+# Cut points tried per batch before decoding members one by one
+MAX_ATTEMPTS = 3
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = re.compile(r"[0-9.eE+\-]*")
+_DECODER = json.JSONDecoder()
+
+
+def loads(data: str | bytes) -> Any:
+    # one JSON document, e.g. a JSON-lines record
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class _Reader:
+    # A window of a JSON file. Members of the top-level container are
+    # decoded in batches: the buffer is cut after the last occurrence of the
+    # text seen between two members (e.g. '},{' or '",\n  "') and the part
+    # before it decoded with one loads() call. A cut inside a string or a
+    # nested value leaves an unterminated string or unbalanced brackets, so
+    # a batch that decodes is always made of whole members. When no cut
+    # works, members are decoded one at a time with raw_decode.
+    def __init__(self, f: TextIO) -> None:
+        self._f = f
+        self.buffer = ""
+        self.pos = 0
+        self.offset = 0  # position of buffer[0] in the file
+
+    def fill(self) -> bool:
+        chunk = self._f.read(READ_SIZE)
+        if chunk == "":
+            return False
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> str:
+        skipped = ""
+        while True:
+            match = _WHITESPACE.match(self.buffer, self.pos)
+            skipped += match.group()
+            self.pos = match.end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return skipped
+
+    def char(self) -> str:
+        # current character, "" at the end of the file
+        if self.pos == len(self.buffer):
+            self.fill()
+        return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.char() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        # raw_decode fails on a value cut off by the end of the buffer, or
+        # stops early on a number ("-15" of "-1.5e3"), so such values are
+        # decoded again after reading more
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            rest = _NUMBER_CHARS.match(self.buffer, end).end()
+            if rest == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def batch(self, opener: str, closer: str, separator: str) -> Any | None:
+        end = len(self.buffer)
+        for _ in range(MAX_ATTEMPTS):
+            i = self.buffer.rfind(separator, self.pos, end)
+            if i < 0:
+                return None
+            try:
+                container = loads(opener + self.buffer[self.pos : i + 1] + closer)
+            except ValueError:
+                end = i + len(separator) - 1
+                continue
+            # the separator ends with the first character of the next member
+            self.pos = i + len(separator) - 1
+            return container
+        return None
+
+
+def _iter_batches(f: TextIO, opener: str, closer: str) -> Iterator[Any]:
+    # members of the top-level container as lists (arrays) or dicts
+    # (objects) of one or more members
+    reader = _Reader(f)
+    reader.skip_whitespace()
+    reader.expect(opener)
+    reader.skip_whitespace()
+    if reader.char() == closer:
+        return
+
+    separator: str | None = None
+    fence = 0  # decode one by one up to here, no batch cut was found
+    while True:
+        if separator is not None and reader.offset + reader.pos >= fence:
+            batch = reader.batch(opener, closer, separator)
+            if batch is not None:
+                yield batch
+                continue
+            if len(reader.buffer) - reader.pos < 2 * READ_SIZE and reader.fill():
+                continue
+            fence = reader.offset + len(reader.buffer)
+
+        if opener == "[":
+            yield [reader.value()]
+        else:
+            key = reader.value()
+            reader.skip_whitespace()
+            reader.expect(":")
+            reader.skip_whitespace()
+            yield {key: reader.value()}
+
+        # learn the separator from the text between this member and the next
+        last = reader.buffer[reader.pos - 1]
+        before = reader.skip_whitespace()
+        if reader.char() == closer:
+            return
+        reader.expect(",")
+        after = reader.skip_whitespace()
+        separator = last + before + "," + after + reader.char()
+
+
+def iter_array(path: str, encoding: str = "utf-8") -> Iterator[Any]:
+    # elements of a top-level JSON array, read in batches of about
+    # READ_SIZE instead of loading the whole array
+    with open(path, "r", encoding=encoding) as f:
+        for batch in _iter_batches(f, "[", "]"):
+            yield from batch
+
+
+def iter_object(path: str, encoding: str = "utf-8") -> Iterator[tuple[str, Any]]:
+    # (key, value) pairs of a top-level JSON object, in file order. A
+    # repeated key is yielded again; the last value is the one json.load
+    # would keep.
+    with open(path, "r", encoding=encoding) as f:
+        for batch in _iter_batches(f, "{", "}"):
+            yield from batch.items()
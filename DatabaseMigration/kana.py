@@ -0,0 +1,106 @@
+import re
+import unicodedata
+
+# Katakana ァ..ヶ sit exactly 0x60 code points after hiragana ぁ..ゖ
+KATAKANA_START, KATAKANA_END = 0x30A1, 0x30F6
+KANA_SHIFT = 0x60
+
+_KATAKANA_TO_HIRAGANA = {
+    c: c - KANA_SHIFT for c in range(KATAKANA_START, KATAKANA_END + 1)
+}
+_HIRAGANA_TO_KATAKANA = {v: k for k, v in _KATAKANA_TO_HIRAGANA.items()}
+
+# Hiragana, katakana and the prolonged sound mark
+__KANA_PATTERN = re.compile(r"^[ぁ-ゖゝゞァ-ヺー]+$")
+
+# Dropped from readings: spaces and the separators used in katakana compounds
+__SEPARATORS = re.compile(r"[\s・=]")
+
+# Modified Hepburn
+ROMAJI = {
+    **dict(zip("あいうえお", ["a", "i", "u", "e", "o"])),
+    **dict(zip("かきくけこ", ["ka", "ki", "ku", "ke", "ko"])),
+    **dict(zip("がぎぐげご", ["ga", "gi", "gu", "ge", "go"])),
+    **dict(zip("さしすせそ", ["sa", "shi", "su", "se", "so"])),
+    **dict(zip("ざじずぜぞ", ["za", "ji", "zu", "ze", "zo"])),
+    **dict(zip("たちつてと", ["ta", "chi", "tsu", "te", "to"])),
+    **dict(zip("だぢづでど", ["da", "ji", "zu", "de", "do"])),
+    **dict(zip("なにぬねの", ["na", "ni", "nu", "ne", "no"])),
+    **dict(zip("はひふへほ", ["ha", "hi", "fu", "he", "ho"])),
+    **dict(zip("ばびぶべぼ", ["ba", "bi", "bu", "be", "bo"])),
+    **dict(zip("ぱぴぷぺぽ", ["pa", "pi", "pu", "pe", "po"])),
+    **dict(zip("まみむめも", ["ma", "mi", "mu", "me", "mo"])),
+    **dict(zip("やゆよ", ["ya", "yu", "yo"])),
+    **dict(zip("らりるれろ", ["ra", "ri", "ru", "re", "ro"])),
+    **dict(zip("わゐゑを", ["wa", "i", "e", "o"])),
+    "ん": "n",
+    "ゔ": "vu",
+    # small kana on their own
+    **dict(zip("ぁぃぅぇぉ", ["a", "i", "u", "e", "o"])),
+    **dict(zip("ゃゅょゎゕゖ", ["ya", "yu", "yo", "wa", "ka", "ke"])),
+}
+_SMALL_Y = set("ゃゅょ")
+_SMALL_VOWELS = set("ぁぃぅぇぉ")
+_SOKUON = "っ"
+_CHOON = "ー"
+_VOWELS = set("aeiou")
+
+
+def katakana_to_hiragana(text: str) -> str:
+    return text.translate(_KATAKANA_TO_HIRAGANA)
+
+
+def hiragana_to_katakana(text: str) -> str:
+    return text.translate(_HIRAGANA_TO_KATAKANA)
+
+
+def is_kana(text: str) -> bool:
+    return __KANA_PATTERN.match(text) is not None
+
+
+def normalize_reading(text: str) -> str:
+    # NFKC folds half-width katakana (ｶﾀｶﾅ) and full-width latin, then all
+    # kana are folded to hiragana, so カタカナ, ｶﾀｶﾅ and かたかな share a key
+    text = unicodedata.normalize("NFKC", text)
+    return __SEPARATORS.sub("", katakana_to_hiragana(text)).lower()
+
+
+def to_romaji(text: str) -> str:
+    # Hepburn romanization of a kana string, e.g. きょうと -> kyouto
+    # (long vowels are spelled out, so the result can be typed on a keyboard).
+    # Characters that are not kana are kept as they are.
+    kana = normalize_reading(text)
+    syllables: list[str] = []
+    for c in kana:
+        if c in _SMALL_Y and syllables and syllables[-1].endswith("i"):
+            # きゃ -> kya, しゃ -> sha, ちゃ -> cha, じゃ -> ja
+            base = syllables.pop()[:-1]
+            y = ROMAJI[c]
+            syllables.append(base + (y[1:] if base in ["sh", "ch", "j"] else y))
+        elif c in _SMALL_VOWELS and syllables and len(syllables[-1]) > 1:
+            # ふぁ -> fa, てぃ -> ti, しぇ -> she
+            syllables.append(syllables.pop()[:-1] + ROMAJI[c])
+        elif c == _CHOON and syllables and syllables[-1][-1] in _VOWELS:
+            syllables.append(syllables[-1][-1])
+        else:
+            syllables.append(ROMAJI.get(c, c))
+
+    # っ doubles the consonant that follows it, っち -> tchi
+    result: list[str] = []
+    for i, s in enumerate(syllables):
+        if s != _SOKUON:
+            result.append(s)
+        elif i + 1 < len(syllables) and syllables[i + 1][0] not in _VOWELS:
+            following = syllables[i + 1]
+            result.append("t" if following.startswith("ch") else following[0])
+    return "".join(result)
+
+
+def reading_keys(word: str, pronounce: str | None, romaji: bool = False) -> set[str]:
+    # Lookup keys of a Japanese entry: its normalized reading, the word itself
+    # when it is written in kana, and optionally their romanizations
+    candidates = [word] if pronounce is None else [word, pronounce]
+    keys = {r for r in map(normalize_reading, candidates) if is_kana(r)}
+    if romaji:
+        keys |= {to_romaji(k) for k in keys}
+    return keys
@@ -0,0 +1,46 @@
+from collections import deque
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator
+from helpers import header_end, split_line_ranges
+
+# Target size of one shard of a line-based source file
+SHARD_BYTES = 16 * 1024 * 1024
+
+type ParseJob = tuple[Callable[..., Iterable[Any]], tuple[Any, ...]]
+
+
+def shard_ranges(
+    path: str, skip_header: bool = True, shard_bytes: int | None = None
+) -> list[tuple[int, int]]:
+    if shard_bytes is None:
+        shard_bytes = SHARD_BYTES
+
+    start = header_end(path) if skip_header else 0
+    count = max(1, -(-(os.path.getsize(path) - start) // shard_bytes))
+    return split_line_ranges(path, count, start)
+
+
+def _run_job(job: ParseJob) -> list[Any]:
+    parser, args = job
+    return list(parser(*args))
+
+
+def iter_job_results(
+    jobs: Iterable[ParseJob], workers: int, window: int | None = None
+) -> Iterator[list[Any]]:
+    # Run parser jobs in a process pool and yield their rows in job order,
+    # so staging sees exactly the same row sequence as a serial parse.
+    # At most `window` results are pending at once to bound memory.
+    if window is None:
+        window = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future[list[Any]]] = deque()
+        for job in jobs:
+            pending.append(executor.submit(_run_job, job))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while len(pending) > 0:
+            yield pending.popleft().result()
@@ -0,0 +1,149 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+from itertools import batched
+from types import ModuleType
+from typing import Any, Callable, Iterable, Iterator
+
+# Bump to invalidate every entry, e.g. when the entry format changes
+CACHE_VERSION = 1
+
+# Rows per pickled chunk, entries are written and read in chunks
+CHUNK_SIZE = 10_000
+
+DEFAULT_BUDGET_BYTES = 2 * 1024**3
+
+SUFFIX = ".pickle"
+
+# Modules in this directory are the parsers' code, see _code_sources
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _local_module(value: Any) -> ModuleType | None:
+    # the module of this directory that value is or was defined in
+    if isinstance(value, ModuleType):
+        module: ModuleType | None = value
+    else:
+        module = sys.modules.get(getattr(value, "__module__", None) or "")
+    source_file = getattr(module, "__file__", None)
+    if source_file is None or os.path.dirname(os.path.abspath(source_file)) != HERE:
+        return None
+    return module
+
+
+def _code_sources(module: ModuleType) -> list[str]:
+    # Source files of module and of every module of this directory it uses,
+    # transitively, e.g. helpers.iter_lines or word_forms.bare_form. Only
+    # module-level names are followed.
+    seen: dict[str, ModuleType] = {module.__name__: module}
+    pending = [module]
+    while pending:
+        for value in vars(pending.pop()).values():
+            used = _local_module(value)
+            if used is not None and used.__name__ not in seen:
+                seen[used.__name__] = used
+                pending.append(used)
+    return sorted(m.__file__ for m in seen.values() if m.__file__ is not None)
+
+
+class ParseCache:
+    # Parser output stored under a key derived from the content of the
+    # source file, the code of the parser (its module and the helper modules
+    # it uses) and the remaining arguments, so a changed source or parser is
+    # simply a miss.
+    # Entries are pickles written by this program only; never point the
+    # cache at a directory others can write to.
+    def __init__(
+        self, directory: str, budget_bytes: int = DEFAULT_BUDGET_BYTES
+    ) -> None:
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self._file_hashes: dict[tuple[str, int, int], bytes] = {}
+        self._code_files: dict[str, list[str]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _file_hash(self, path: str) -> bytes:
+        # memoized per (path, size, mtime), large sources are hashed once
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        if memo_key not in self._file_hashes:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    h.update(chunk)
+            self._file_hashes[memo_key] = h.digest()
+        return self._file_hashes[memo_key]
+
+    def key(self, parser: Callable[..., Iterable[Any]], args: tuple[Any, ...]) -> str:
+        # args[0] is the source file of every parser
+        module = inspect.getmodule(parser)
+        assert module is not None
+        if module.__name__ not in self._code_files:
+            self._code_files[module.__name__] = _code_sources(module)
+        h = hashlib.sha256()
+        h.update(f"{CACHE_VERSION} {parser.__qualname__}".encode())
+        for code_file in self._code_files[module.__name__]:
+            h.update(self._file_hash(code_file))
+        h.update(self._file_hash(args[0]))
+        h.update(repr(args[1:]).encode())
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def has(self, parser: Callable[..., Iterable[Any]], args: tuple[Any, ...]) -> bool:
+        return os.path.exists(self.path(self.key(parser, args)))
+
+    def rows(
+        self, parser: Callable[..., Iterable[Any]], args: tuple[Any, ...]
+    ) -> Iterator[Any]:
+        # parser(*args), from the cache if possible
+        path = self.path(self.key(parser, args))
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            yield from self._parse_and_store(path, parser(*args))
+            return
+
+        with f:
+            os.utime(path)  # most recently used, see evict
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    break
+                yield from chunk
+
+    def _parse_and_store(self, path: str, rows: Iterable[Any]) -> Iterator[Any]:
+        # The entry only appears once complete. Workers may write entries
+        # concurrently, the temp name is unique per process.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in batched(rows, CHUNK_SIZE):
+                    pickle.dump(chunk, f, protocol=5)
+                    yield from chunk
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self) -> int:
+        # removes the least recently used entries until the cache fits the
+        # budget, returns the number of bytes freed
+        entries: list[tuple[int, int, str]] = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.budget_bytes:
+                break
+            os.remove(path)
+            freed += size
+        return freed
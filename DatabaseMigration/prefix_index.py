@@ -0,0 +1,229 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Self
+from sqlalchemy.engine import Connection
+
+# File layout, all little-endian, sections 8-byte aligned:
+#   header     MAGIC, version, language count, directory position
+#   per language:
+#     blob     UTF-8 words concatenated in byte order (= SQLite BINARY order)
+#     offsets  u32[count + 1], word i is blob[offsets[i]:offsets[i + 1]]
+#     ids      i32[count], the WordId of word i
+#   directory  one DIRECTORY_ENTRY per language
+MAGIC = b"BWPX"
+VERSION = 1
+HEADER = struct.Struct("<4sIIQ")
+DIRECTORY_ENTRY = struct.Struct("<16sIQQQ")
+
+# array typecodes of the u32 offsets and i32 ids, checked to be 4 bytes
+OFFSET_TYPE = "I"
+ID_TYPE = "i"
+
+# Greater than every byte of a UTF-8 string, so prefix + END is an upper bound
+END = b"\xff"
+
+
+def _align(f: Any) -> None:
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+def _check_itemsize(values: array) -> None:
+    if values.itemsize != 4:
+        raise RuntimeError(f"array({values.typecode!r}) items are not 4 bytes")
+
+
+def _little_endian(values: array) -> bytes:
+    # the file's byte order, whatever the platform's
+    _check_itemsize(values)
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_prefix_index(connection: Connection, path: str) -> dict[str, int]:
+    # Written to a temporary file first, so readers never mmap a partial file
+    languages = [
+        lang
+        for (lang,) in connection.exec_driver_sql(
+            "SELECT DISTINCT SourceLanguage FROM Dictionary "
+            "WHERE DeleteFlag = 0 ORDER BY SourceLanguage"
+        )
+    ]
+    directory: list[bytes] = []
+    counts: dict[str, int] = {}
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(languages), 0))
+        for lang in languages:
+            _align(f)
+            blob_pos = f.tell()
+            offsets = array(OFFSET_TYPE, [0])
+            ids = array(ID_TYPE)
+
+            rows = connection.exec_driver_sql(
+                "SELECT Word, WordId FROM Dictionary "
+                "WHERE SourceLanguage = ? AND DeleteFlag = 0 ORDER BY Word",
+                (lang,),
+            )
+            for word, word_id in rows:
+                encoded = word.encode("utf-8")
+                f.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+                ids.append(word_id)
+
+            _align(f)
+            offsets_pos = f.tell()
+            f.write(_little_endian(offsets))
+            _align(f)
+            ids_pos = f.tell()
+            f.write(_little_endian(ids))
+
+            directory.append(
+                DIRECTORY_ENTRY.pack(
+                    lang.encode("utf-8"), len(ids), offsets_pos, ids_pos, blob_pos
+                )
+            )
+            counts[lang] = len(ids)
+
+        _align(f)
+        directory_pos = f.tell()
+        f.write(b"".join(directory))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(languages), directory_pos))
+
+    os.replace(tmp_path, path)
+    return counts
+
+
+def _section(buffer: memoryview, pos: int, count: int, typecode: str) -> Any:
+    # count 4-byte items at pos: a view into the mapping on little-endian
+    # platforms, a byteswapped copy elsewhere
+    values = array(typecode)
+    _check_itemsize(values)
+    if sys.byteorder == "little":
+        return buffer[pos : pos + count * 4].cast(typecode)
+    values.frombytes(buffer[pos : pos + count * 4])
+    values.byteswap()
+    return values
+
+
+class _WordTable:
+    # Sorted sequence of encoded words, read straight from the mapping
+    def __init__(
+        self,
+        buffer: memoryview,
+        count: int,
+        offsets_pos: int,
+        ids_pos: int,
+        blob_pos: int,
+    ) -> None:
+        # bounds are checked before any view is taken, so a truncated file
+        # leaves nothing to release
+        offsets_end = offsets_pos + (count + 1) * 4
+        if offsets_end > len(buffer) or ids_pos + count * 4 > len(buffer):
+            raise ValueError("truncated prefix index")
+        (blob_size,) = struct.unpack_from("<I", buffer, offsets_end - 4)
+        if blob_pos + blob_size > len(buffer):
+            raise ValueError("truncated prefix index")
+
+        self.offsets = _section(buffer, offsets_pos, count + 1, OFFSET_TYPE)
+        self.ids = _section(buffer, ids_pos, count, ID_TYPE)
+        self.blob = buffer[blob_pos : blob_pos + blob_size]
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i] : self.offsets[i + 1]])
+
+    def release(self) -> None:
+        for view in [self.offsets, self.ids, self.blob]:
+            if isinstance(view, memoryview):
+                view.release()
+
+
+class PrefixIndex:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self._tables: dict[str, _WordTable] = {}
+        try:
+            self._read_directory()
+        except (struct.error, ValueError) as e:
+            # struct.error: the header or directory is cut short
+            self.close()
+            raise ValueError(f"{path} is not a valid prefix index: {e}") from e
+
+    def _read_directory(self) -> None:
+        magic, version, count, directory_pos = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} prefix index")
+
+        for i in range(count):
+            lang, *entry = DIRECTORY_ENTRY.unpack_from(
+                self._buffer, directory_pos + i * DIRECTORY_ENTRY.size
+            )
+            self._tables[lang.rstrip(b"\0").decode("utf-8")] = _WordTable(
+                self._buffer, *entry
+            )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # views into the mapping must be released before it can be closed
+        for table in self._tables.values():
+            table.release()
+        self._tables = {}
+        self._buffer.release()
+        self._mmap.close()
+
+    @property
+    def languages(self) -> list[str]:
+        return list(self._tables)
+
+    def _range(
+        self, source_language: str, prefix: str
+    ) -> tuple[_WordTable | None, int, int]:
+        table = self._tables.get(source_language)
+        if table is None:
+            return None, 0, 0
+
+        key = prefix.encode("utf-8")
+        lo = bisect_left(table, key)
+        hi = bisect_left(table, key + END, lo)
+        return table, lo, hi
+
+    def get(self, source_language: str, word: str) -> int | None:
+        table, lo, hi = self._range(source_language, word)
+        if table is not None and lo < hi and table[lo] == word.encode("utf-8"):
+            return table.ids[lo]
+        return None
+
+    def count(self, source_language: str, prefix: str) -> int:
+        _, lo, hi = self._range(source_language, prefix)
+        return hi - lo
+
+    def complete(
+        self, source_language: str, prefix: str, limit: int = 10
+    ) -> list[tuple[str, int]]:
+        # (Word, WordId) of the first `limit` words starting with prefix,
+        # in the same order as ORDER BY Word
+        table, lo, hi = self._range(source_language, prefix)
+        if table is None:
+            return []
+        return [
+            (table[i].decode("utf-8"), table.ids[i])
+            for i in range(lo, min(hi, lo + limit))
+        ]
@@ -0,0 +1,72 @@
+import os
+import sqlite3
+from typing import Any
+from urllib.parse import quote
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.pool import QueuePool
+
+# Bytes of the database file each connection maps, 0 disables mmap.
+# Mapped pages live in the OS page cache, so every connection (and every
+# process) reading the file shares them.
+MMAP_BYTES = 1024**3
+
+# Connections kept open for concurrent readers
+POOL_SIZE = 8
+
+# Negative cache_size is in KiB. Small: with mmap, reads are served from the
+# mapped pages rather than from each connection's own page cache.
+CACHE_SIZE_KIB = 8 * 1024
+
+
+def database_uri(path: str, immutable: bool = True, shared_cache: bool = False) -> str:
+    # immutable=1 also skips locking and change detection: only for a file
+    # nothing writes to while it is open, e.g. the shipped bear_words.db.
+    # A shared cache lets the connections of this process share one page
+    # cache instead of relying on mmap; SQLite discourages it, so it is off.
+    uri = "file:" + quote(os.path.abspath(path)) + "?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    if shared_cache:
+        uri += "&cache=shared"
+    return uri
+
+
+def connect(
+    path: str,
+    immutable: bool = True,
+    shared_cache: bool = False,
+    mmap_bytes: int = MMAP_BYTES,
+) -> sqlite3.Connection:
+    # Pooled connections move between threads, hence check_same_thread
+    conn = sqlite3.connect(
+        database_uri(path, immutable, shared_cache),
+        uri=True,
+        check_same_thread=False,
+    )
+    conn.execute(f"PRAGMA mmap_size={int(mmap_bytes)};")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB};")
+    conn.execute("PRAGMA query_only=ON;")
+    return conn
+
+
+def create_read_only_engine(
+    path: str,
+    pool_size: int = POOL_SIZE,
+    immutable: bool = True,
+    shared_cache: bool = False,
+    mmap_bytes: int = MMAP_BYTES,
+    **kwargs: Any,
+) -> Engine:
+    # An engine over data_context's tables for readers of a finished build.
+    # Writes fail with "attempt to write a readonly database".
+    if not os.path.exists(path):
+        # mode=ro never creates the file, fail with the path in the message
+        raise FileNotFoundError(path)
+    return create_engine(
+        "sqlite://",
+        creator=lambda: connect(path, immutable, shared_cache, mmap_bytes),
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        **kwargs,
+    )
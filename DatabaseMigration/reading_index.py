@@ -0,0 +1,60 @@
+from itertools import batched
+from typing import Iterator
+from sqlalchemy import Row
+from sqlalchemy.engine import Connection
+from kana import normalize_reading, reading_keys
+
+# Rows inserted per executemany
+CHUNK_SIZE = 10_000
+
+# Sorts after every other character, so key + MAX_CHAR bounds a prefix range
+MAX_CHAR = "\U0010ffff"
+
+
+def _iter_reading_rows(
+    connection: Connection, romaji: bool
+) -> Iterator[tuple[str, int]]:
+    rows = connection.exec_driver_sql(
+        "SELECT WordId, Word, Pronounce FROM Dictionary "
+        "WHERE SourceLanguage = 'ja' AND DeleteFlag = 0"
+    )
+    for word_id, word, pronounce in rows:
+        for key in reading_keys(word, pronounce, romaji):
+            yield (key, word_id)
+
+
+def build_reading_index(connection: Connection, romaji: bool = False) -> int:
+    # Rebuilt from scratch on every run, the table is derived from Dictionary
+    connection.exec_driver_sql("DELETE FROM WordReading;")
+
+    count = 0
+    for chunk in batched(_iter_reading_rows(connection, romaji), CHUNK_SIZE):
+        connection.exec_driver_sql(
+            "INSERT INTO WordReading (Reading, WordId) VALUES (?, ?)", list(chunk)
+        )
+        count += len(chunk)
+    return count
+
+
+def search_readings(
+    connection: Connection, query: str, prefix_only: bool = False, limit: int = 50
+) -> list[Row]:
+    # (WordId, Word, Pronounce) of the words read as the query, which may be
+    # hiragana, katakana or (if built with romaji keys) romaji.
+    # Exact matches come first, then longer readings.
+    key = normalize_reading(query)
+    if key == "":
+        return []
+
+    if prefix_only:
+        condition = "r.Reading >= :key AND r.Reading < :end"
+    else:
+        condition = "r.Reading = :key"
+
+    return connection.exec_driver_sql(
+        "SELECT d.WordId, d.Word, d.Pronounce FROM WordReading r "
+        "JOIN Dictionary d ON d.WordId = r.WordId "
+        f"WHERE {condition} AND d.DeleteFlag = 0 "
+        "GROUP BY d.WordId ORDER BY min(length(r.Reading)), d.Word LIMIT :limit",
+        {"key": key, "end": key + MAX_CHAR, "limit": limit},
+    ).all()
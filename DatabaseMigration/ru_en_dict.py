@@ -1,10 +1,16 @@
 import csv
+from typing import Any, Iterator
+from helpers import ATTRIBUTE, DETAILS, FORM, POSITION
+from word_forms import bare_form
 
 ADJ_PATH = "data/redict/adjectives.csv"
 NOUNS_PATH = "data/redict/nouns.csv"
 VERBS_PATH = "data/redict/verbs.csv"
 OTHERS_PATH = "data/redict/others.csv"
 
+# Part of speech of the words of each source, as WordNet letters
+PARTS_OF_SPEECH = {ADJ_PATH: "a", NOUNS_PATH: "n", VERBS_PATH: "v"}
+
 ADJ_FIELDS = [
     ("comparative", "comparative form (e.g., 'bigger')"),
     ("superlative", "superlative form (e.g., 'biggest')"),
@@ -80,43 +86,140 @@ VERBS_FIELDS = [
 
 OTHERS_FIELDS: list[tuple[str, str]] = []
 
+# Fields holding inflected forms of the word (the rest are attributes)
+NON_FORM_FIELDS = {
+    "gender",
+    "partner",
+    "animate",
+    "indeclinable",
+    "sg_only",
+    "pl_only",
+    "aspect",
+}
+
+
+def iter_rows(path: str) -> Iterator[dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f, delimiter="\t")
+
+
+def row_details(
+    row: dict[str, str], fields: list[tuple[str, str]]
+) -> tuple[str, str, str] | None:
+    word = row["bare"].strip()
+    accented = row["accented"].strip()
+    trans = row["translations_en"].strip()
+
+    if type(word) is not str:
+        return None
+
+    detail: str = ""
+    if type(trans) is str:
+        detail = trans
+
+    lines: list[str] = []
+    for field, field_desc in fields:
+        value = row[field].strip()
+        if type(value) is str and value != '':
+            lines.append(f"[{field_desc}] {value}")
+
+    fields_str = "\n".join(lines)
+    if len(lines) > 0:
+        if detail == "":
+            detail = fields_str
+        else:
+            detail += "\n-----\n" + fields_str
+
+    return (word, accented, detail)
+
+
+def form_fields(fields: list[tuple[str, str]]) -> list[str]:
+    # the fields holding inflected forms of the word
+    return [field for field, _ in fields if field not in NON_FORM_FIELDS]
+
+
+def attribute_fields(fields: list[tuple[str, str]]) -> list[str]:
+    return [field for field, _ in fields if field in NON_FORM_FIELDS]
+
+
+def row_forms(
+    row: dict[str, str], form_columns: list[str]
+) -> Iterator[tuple[str, str, str, str]]:
+    # (word, form, bare form, tag) of the word itself and of every inflected
+    # form, tag being the source column name (e.g. sg_inst) or "lemma"
+    word = row["bare"].strip()
+    accented = row["accented"].strip() or word
+    yield (word, accented, bare_form(accented), "lemma")
+
+    for field in form_columns:
+        # alternatives are comma separated, e.g. "кни'гой, кни'гою"
+        for form in row[field].split(","):
+            form = form.strip()
+            if form != "":
+                yield (word, form, bare_form(form), field)
+
+
+def row_attributes(
+    row: dict[str, str], attribute_columns: list[str], pos: str | None
+) -> Iterator[tuple[str, str, str]]:
+    # (word, key, value) of the part of speech, which is given by the source
+    # file, and of the non-form fields (gender, aspect, animate, ...)
+    word = row["bare"].strip()
+    if pos is not None:
+        yield (word, "pos", pos)
+
+    for field in attribute_columns:
+        value = row[field].strip()
+        if value != "":
+            yield (word, field, value)
+
+
+def get_tagged_rows(
+    path: str, fields: list[tuple[str, str]], pos: str | None = None
+) -> Iterator[tuple[str, Any]]:
+    # an OpenRussian file read once: the rows of get_word_prons_and_details
+    # (DETAILS), get_word_forms (FORM), get_word_attributes (ATTRIBUTE) and
+    # get_word_positions (POSITION)
+    forms = form_fields(fields)
+    attributes = attribute_fields(fields)
+    for position, row in enumerate(iter_rows(path), start=1):
+        details = row_details(row, fields)
+        if details is not None:
+            yield (DETAILS, details)
+        for form in row_forms(row, forms):
+            yield (FORM, form)
+        for attribute in row_attributes(row, attributes, pos):
+            yield (ATTRIBUTE, attribute)
+        yield (POSITION, (row["bare"].strip(), position))
+
 
 def get_word_prons_and_details(
     path: str, fields: list[tuple[str, str]]
-) -> tuple[dict[str, str], dict[str, str]]:
-    word_pron: dict[str, str] = {}
-    word_trans: dict[str, str] = {}
+) -> Iterator[tuple[str, str, str]]:
+    for row in iter_rows(path):
+        details = row_details(row, fields)
+        if details is not None:
+            yield details
 
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter="\t")
-        for row in reader:
-            word = row["bare"].strip()
-            accented = row["accented"].strip()
-            trans = row["translations_en"].strip()
-
-            if type(word) is not str:
-                continue
-            
-            if type(accented) is str: 
-                word_pron[word] = accented
-
-            detail: str = ""
-            if type(trans) is str:
-                detail = trans
-
-            lines: list[str] = []
-            for field, field_desc in fields:
-                value = row[field].strip()
-                if type(value) is str and value != '':
-                    lines.append(f"[{field_desc}] {value}")
-
-            fields_str = "\n".join(lines)
-            if len(lines) > 0:
-                if detail == "":
-                    detail = fields_str
-                else:
-                    detail += "\n-----\n" + fields_str
-
-            word_trans[word] = detail
-
-    return (word_pron, word_trans)
+
+def get_word_forms(
+    path: str, fields: list[tuple[str, str]]
+) -> Iterator[tuple[str, str, str, str]]:
+    forms = form_fields(fields)
+    for row in iter_rows(path):
+        yield from row_forms(row, forms)
+
+
+def get_word_attributes(
+    path: str, fields: list[tuple[str, str]], pos: str | None = None
+) -> Iterator[tuple[str, str, str]]:
+    attributes = attribute_fields(fields)
+    for row in iter_rows(path):
+        yield from row_attributes(row, attributes, pos)
+
+
+def get_word_positions(path: str) -> Iterator[tuple[str, int]]:
+    # (word, row number): the OpenRussian exports list the most frequent
+    # words first (и, в, не, он, ...), the row number is their rank
+    for position, row in enumerate(iter_rows(path), start=1):
+        yield (row["bare"].strip(), position)
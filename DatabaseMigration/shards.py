@@ -0,0 +1,204 @@
+import argparse
+import os
+import sqlite3
+from typing import Sequence
+from sqlalchemy import Engine, Table, create_engine
+from sqlalchemy.engine import Connection
+from data_context import (
+    Base,
+    CompressionDictionary,
+    Dictionary,
+    Language,
+    Translation,
+    TranslationBody,
+    WordAttribute,
+    WordForm,
+    WordReading,
+)
+from read_only import CACHE_SIZE_KIB, MMAP_BYTES, database_uri
+
+SHARD_DIR = "shards"
+
+# Dictionary tables a shard holds, in foreign key order. The user tables
+# live in the server database only.
+SHARD_TABLES: list[Table] = [
+    Language.__table__,
+    CompressionDictionary.__table__,
+    Dictionary.__table__,
+    TranslationBody.__table__,
+    Translation.__table__,
+    WordReading.__table__,
+    WordForm.__table__,
+    WordAttribute.__table__,
+]
+
+_IN_SHARD = "WHERE WordId IN (SELECT WordId FROM shard.Dictionary)"
+
+# Rows of each table that belong to the pair (:source, :target): the words
+# of SourceLanguage :source that have a translation into :target
+_SHARD_ROWS = {
+    "Language": "",
+    "CompressionDictionary": "",
+    "Dictionary": "WHERE SourceLanguage = :source AND EXISTS ("
+    "SELECT 1 FROM main.Translation t WHERE t.WordId = Dictionary.WordId "
+    "AND t.TargetLanguage = :target)",
+    "TranslationBody": "WHERE BodyHash IN (SELECT BodyHash FROM main.Translation "
+    f"{_IN_SHARD} AND TargetLanguage = :target)",
+    "Translation": f"{_IN_SHARD} AND TargetLanguage = :target",
+    "WordReading": _IN_SHARD,
+    "WordForm": _IN_SHARD,
+    "WordAttribute": _IN_SHARD,
+}
+
+
+def shard_name(source: str, target: str) -> str:
+    return f"bear_words.{source}-{target}.db"
+
+
+def list_pairs(connection: Connection) -> list[tuple[str, str]]:
+    return [
+        (source, target)
+        for source, target in connection.exec_driver_sql(
+            "SELECT DISTINCT d.SourceLanguage, t.TargetLanguage FROM Translation t "
+            "JOIN Dictionary d ON d.WordId = t.WordId ORDER BY 1, 2"
+        )
+    ]
+
+
+def write_shard(
+    conn: Connection, path: str, source: str, target: str
+) -> dict[str, int]:
+    # Copies the pair's rows of the database into a new file with the same
+    # schema. WordId and TranslationId are copied as they are, so the shards
+    # of one build can be attached together (connect_shards). Returns the
+    # row count per table.
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=SHARD_TABLES)
+    engine.dispose()
+
+    # conn is in AUTOCOMMIT mode (see write_shards): ATTACH cannot run
+    # inside a transaction, so the one below is explicit
+    conn.exec_driver_sql("ATTACH DATABASE ? AS shard", (path,))
+    try:
+        # written from scratch, a crash just means writing it again
+        conn.exec_driver_sql("PRAGMA shard.journal_mode=OFF;")
+        conn.exec_driver_sql("PRAGMA shard.synchronous=OFF;")
+        conn.exec_driver_sql("BEGIN")
+        counts: dict[str, int] = {}
+        for table in SHARD_TABLES:
+            columns = ", ".join(c.name for c in table.columns)
+            counts[table.name] = conn.exec_driver_sql(
+                f'INSERT INTO shard."{table.name}" ({columns}) '
+                f'SELECT {columns} FROM main."{table.name}" ' + _SHARD_ROWS[table.name],
+                {"source": source, "target": target},
+            ).rowcount
+        conn.exec_driver_sql("COMMIT")
+        conn.exec_driver_sql("ANALYZE shard;")
+    except BaseException:
+        if conn.connection.dbapi_connection.in_transaction:  # type: ignore
+            conn.exec_driver_sql("ROLLBACK")
+        raise
+    finally:
+        conn.exec_driver_sql("DETACH DATABASE shard")
+    return counts
+
+
+def write_shards(
+    engine: Engine,
+    directory: str,
+    pairs: Sequence[tuple[str, str]] | None = None,
+) -> dict[tuple[str, str], dict[str, int]]:
+    # One shard per (SourceLanguage, TargetLanguage) pair, every pair of the
+    # database by default. Returns the row counts per pair.
+    os.makedirs(directory, exist_ok=True)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if pairs is None:
+            pairs = list_pairs(conn)
+        return {
+            (source, target): write_shard(
+                conn,
+                os.path.join(directory, shard_name(source, target)),
+                source,
+                target,
+            )
+            for source, target in pairs
+        }
+
+
+def _select_unique(table: Table, schema: str, earlier: Sequence[str]) -> str:
+    # The rows of one shard that no earlier shard has. A plain UNION would
+    # deduplicate too, but SQLite cannot push a WHERE clause into it: every
+    # lookup through the view would scan all the shards. This way each shard
+    # is searched by its own indexes, then the primary key of the earlier
+    # ones. Translations belong to exactly one pair and are never repeated.
+    sql = f'SELECT x.* FROM {schema}."{table.name}" x'
+    if table is Translation.__table__ or len(earlier) == 0:
+        return sql
+    match = " AND ".join(f"y.{c.name} = x.{c.name}" for c in table.primary_key)
+    return (
+        sql
+        + " WHERE "
+        + " AND ".join(
+            f'NOT EXISTS (SELECT 1 FROM {e}."{table.name}" y WHERE {match})'
+            for e in earlier
+        )
+    )
+
+
+def connect_shards(
+    paths: Sequence[str], mmap_bytes: int = MMAP_BYTES
+) -> sqlite3.Connection:
+    # The shards attached read-only to an in-memory database, each table
+    # behind a temp view of the same name, so the queries written for
+    # bear_words.db run unchanged. Words shared by several shards (every
+    # English shard holds the English words) appear once, as they carry the
+    # same WordId everywhere. SQLite attaches at most 10 databases.
+    conn = sqlite3.connect("file::memory:", uri=True, check_same_thread=False)
+    schemas = [f"shard{n}" for n in range(len(paths))]
+    for schema, path in zip(schemas, paths):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (database_uri(path),))
+        conn.execute(f"PRAGMA {schema}.mmap_size={int(mmap_bytes)};")
+        conn.execute(f"PRAGMA {schema}.cache_size=-{CACHE_SIZE_KIB};")
+
+    for table in SHARD_TABLES:
+        conn.execute(
+            f'CREATE TEMP VIEW "{table.name}" AS '
+            + " UNION ALL ".join(
+                _select_unique(table, schema, schemas[:n])
+                for n, schema in enumerate(schemas)
+            )
+        )
+    conn.execute("PRAGMA query_only=ON;")
+    return conn
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Split bear_words.db into one database per language pair"
+    )
+    arg_parser.add_argument("--db", default="bear_words.db")
+    arg_parser.add_argument("--out", default=SHARD_DIR)
+    args = arg_parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise FileNotFoundError(args.db)
+    # not the read-only engine: its query_only would refuse to write shards
+    engine = create_engine(f"sqlite:///{args.db}")
+    shards = write_shards(engine, args.out)
+    engine.dispose()
+
+    for (source, target), counts in shards.items():
+        name = shard_name(source, target)
+        size = os.path.getsize(os.path.join(args.out, name))
+        print(
+            f"{name:<32}{counts['Dictionary']:>10} words"
+            f"{counts['Translation']:>10} translations{size / 2**20:>10.2f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Iterator
+from sqlalchemy.engine import Connection
+import compression
+from read_only import create_read_only_engine
+from ticks import now_ticks
+
+# Bump when the chunk or manifest layout changes
+FORMAT_VERSION = 1
+
+MANIFEST = "manifest.json"
+CHUNK_SUFFIX = ".ndjson.gz"
+
+# Rows per chunk file
+CHUNK_ROWS = 50_000
+
+# Chunks are gzip (every client platform can read it) with the header's
+# mtime zeroed, so the same rows always give the same bytes
+GZIP_LEVEL = 6
+
+
+@dataclass
+class ExportTable:
+    name: str
+    columns: list[str]
+    # unique and indexed: the chunk order and the keyset paging key
+    key: list[str]
+    # tables without ModifiedAt are small and only exported in full
+    has_modified_at: bool = True
+
+
+# The columns clients sync, see DatabaseMigration.DICTIONARY_COLUMNS.
+# Translations are ordered by word, so a chunk covers a WordId range.
+TABLES = [
+    ExportTable("Language", ["LanguageCode", "LanguageName"], ["LanguageCode"], False),
+    ExportTable(
+        "Dictionary",
+        ["WordId", "Word", "SourceLanguage", "Pronounce", "ModifiedAt", "DeleteFlag"],
+        ["WordId"],
+    ),
+    ExportTable(
+        "Translation",
+        [
+            "TranslationId",
+            "WordId",
+            "TargetLanguage",
+            "TranslationText",
+            "ModifiedAt",
+            "DeleteFlag",
+        ],
+        ["WordId", "TargetLanguage"],
+    ),
+]
+
+
+def _select(table: ExportTable) -> str:
+    # compressed and deduplicated builds keep TranslationText empty, the
+    # body is restored from TranslationBlob or TranslationBody in _iter_rows
+    columns = list(table.columns)
+    if table.name == "Translation":
+        columns += [
+            "TranslationBlob",
+            "CompressionDictionaryId",
+            "(SELECT BodyText FROM TranslationBody b "
+            "WHERE b.BodyHash = Translation.BodyHash)",
+        ]
+    return f'SELECT {", ".join(columns)} FROM "{table.name}"'
+
+
+def _iter_rows(
+    connection: Connection,
+    table: ExportTable,
+    since: int | None = None,
+    until: int | None = None,
+) -> Iterator[tuple[Any, ...]]:
+    # Rows in key order, a page of CHUNK_ROWS at a time. With since/until,
+    # only the rows with since <= ModifiedAt < until.
+    codecs = {
+        dictionary_id: compression.get_codec(codec, data)
+        for dictionary_id, codec, data in connection.exec_driver_sql(
+            "SELECT CompressionDictionaryId, Codec, Data FROM CompressionDictionary"
+        )
+    }
+    key = ", ".join(table.key)
+    conditions: list[str] = []
+    params: list[Any] = []
+    if since is not None and until is not None:
+        conditions.append("ModifiedAt >= ? AND ModifiedAt < ?")
+        params += [since, until]
+
+    last: tuple[Any, ...] | None = None
+    while True:
+        where = list(conditions)
+        page_params = list(params)
+        if last is not None:
+            where.append(f"({key}) > ({', '.join('?' for _ in table.key)})")
+            page_params += last
+        sql = _select(table)
+        if len(where) > 0:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {key} LIMIT ?"
+        rows = connection.exec_driver_sql(sql, (*page_params, CHUNK_ROWS)).all()
+        if len(rows) == 0:
+            return
+
+        for row in rows:
+            if table.name == "Translation":
+                *values, blob, dictionary_id, body = row
+                if blob is not None:
+                    values[3] = codecs[dictionary_id].decompress(blob).decode("utf-8")
+                elif body is not None:
+                    values[3] = body
+                yield tuple(values)
+            else:
+                yield tuple(row)
+        last = tuple(row[table.columns.index(k)] for k in table.key)
+
+
+def _write_chunk(
+    directory: str, table: ExportTable, rows: list[tuple[Any, ...]]
+) -> dict[str, Any]:
+    # Named after the content hash: a chunk's URL never changes meaning,
+    # so it can be cached forever, and unchanged chunks keep their name
+    # from one snapshot to the next
+    lines = [
+        json.dumps(dict(zip(table.columns, row)), ensure_ascii=False) + "\n"
+        for row in rows
+    ]
+    data = gzip.compress("".join(lines).encode("utf-8"), GZIP_LEVEL, mtime=0)
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{table.name}-{digest[:16]}{CHUNK_SUFFIX}"
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    return {
+        "file": name,
+        "rows": len(rows),
+        "bytes": len(data),
+        "sha256": digest,
+        "first": [rows[0][table.columns.index(k)] for k in table.key],
+        "last": [rows[-1][table.columns.index(k)] for k in table.key],
+    }
+
+
+def _export_table(
+    connection: Connection,
+    directory: str,
+    table: ExportTable,
+    since: int | None = None,
+    until: int | None = None,
+) -> dict[str, Any]:
+    chunks: list[dict[str, Any]] = []
+    rows: list[tuple[Any, ...]] = []
+    for row in _iter_rows(connection, table, since, until):
+        rows.append(row)
+        if len(rows) == CHUNK_ROWS:
+            chunks.append(_write_chunk(directory, table, rows))
+            rows = []
+    if len(rows) > 0:
+        chunks.append(_write_chunk(directory, table, rows))
+    return {"columns": table.columns, "key": table.key, "chunks": chunks}
+
+
+def current_version(connection: Connection) -> int:
+    # One past the ModifiedAt of the last completed build: the snapshot holds
+    # every row before it. A build stamps all its rows with the same
+    # ModifiedAt but commits them pair by pair, so the newest ModifiedAt may
+    # belong to one still running. Databases without a Build row fall back
+    # to the newest ModifiedAt.
+    has_builds = connection.exec_driver_sql(
+        "SELECT EXISTS (SELECT 1 FROM sqlite_master "
+        "WHERE type = 'table' AND name = 'Build')"
+    ).scalar_one()
+    if has_builds:
+        built = connection.exec_driver_sql(
+            "SELECT max(StartedAt) FROM Build"
+        ).scalar_one()
+        if built is not None:
+            return built + 1
+
+    newest = max(
+        connection.exec_driver_sql(
+            f'SELECT coalesce(max(ModifiedAt), 0) FROM "{table.name}"'
+        ).scalar_one()
+        for table in TABLES
+        if table.has_modified_at
+    )
+    return newest + 1
+
+
+def read_manifest(directory: str) -> dict[str, Any] | None:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(directory: str, manifest: dict[str, Any]) -> None:
+    # replaced atomically, last, so it only ever names complete chunks
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def _referenced_files(manifest: dict[str, Any]) -> set[str]:
+    parts = [manifest["snapshot"], *manifest["deltas"]]
+    return {
+        chunk["file"]
+        for part in parts
+        for table in part["tables"].values()
+        for chunk in table["chunks"]
+    }
+
+
+def remove_unreferenced(directory: str, manifest: dict[str, Any]) -> int:
+    referenced = _referenced_files(manifest)
+    removed = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith(CHUNK_SUFFIX) and entry.name not in referenced:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+
+def export_snapshot(connection: Connection, directory: str) -> dict[str, Any]:
+    # Every table in full, as of current_version. Run in one transaction
+    # so the tables are consistent with each other.
+    os.makedirs(directory, exist_ok=True)
+    version = current_version(connection)
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": now_ticks(),
+        "snapshot": {
+            "version": version,
+            "tables": {
+                table.name: _export_table(connection, directory, table)
+                for table in TABLES
+            },
+        },
+        "deltas": [],
+    }
+    _write_manifest(directory, manifest)
+    remove_unreferenced(directory, manifest)
+    return manifest
+
+
+def export_delta(connection: Connection, directory: str) -> dict[str, Any] | None:
+    # Rows modified since the newest version in the manifest, appended as
+    # a delta. Returns None when nothing changed.
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"no {MANIFEST} in {directory}, export a snapshot")
+    if manifest["format"] != FORMAT_VERSION:
+        raise ValueError(f"{MANIFEST} has format {manifest['format']}")
+
+    parts = [manifest["snapshot"], *manifest["deltas"]]
+    since = max(part["version"] for part in parts)
+    until = current_version(connection)
+    if until <= since:
+        return None
+
+    tables = {
+        table.name: _export_table(connection, directory, table, since, until)
+        for table in TABLES
+        if table.has_modified_at
+    }
+    # a build that changed nothing still moves the version
+    if all(len(table["chunks"]) == 0 for table in tables.values()):
+        return None
+
+    delta = {"since": since, "version": until, "tables": tables}
+    manifest["deltas"].append(delta)
+    _write_manifest(directory, manifest)
+    return delta
+
+
+def read_chunk(path: str) -> Iterator[dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def verify(directory: str) -> list[str]:
+    # problems found: missing files and size or checksum mismatches
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return [f"{MANIFEST} is missing"]
+
+    problems: list[str] = []
+    for part in [manifest["snapshot"], *manifest["deltas"]]:
+        for table in part["tables"].values():
+            for chunk in table["chunks"]:
+                path = os.path.join(directory, chunk["file"])
+                if not os.path.exists(path):
+                    problems.append(f"{chunk['file']}: missing")
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                if len(data) != chunk["bytes"]:
+                    problems.append(f"{chunk['file']}: size mismatch")
+                elif hashlib.sha256(data).hexdigest() != chunk["sha256"]:
+                    problems.append(f"{chunk['file']}: checksum mismatch")
+    return problems
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Export the dictionary tables as static snapshot files"
+    )
+    arg_parser.add_argument("--db", default="bear_words.db")
+    arg_parser.add_argument("--out", default="snapshot")
+    arg_parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="append the rows modified since the last export instead",
+    )
+    arg_parser.add_argument("--verify", action="store_true")
+    args = arg_parser.parse_args()
+
+    if args.verify:
+        problems = verify(args.out)
+        for problem in problems:
+            print(problem)
+        raise SystemExit(1 if len(problems) > 0 else 0)
+
+    # not immutable: a server database may be written to meanwhile
+    engine = create_read_only_engine(args.db, immutable=False)
+    with engine.begin() as conn:
+        if args.delta:
+            delta = export_delta(conn, args.out)
+            parts = [] if delta is None else [delta]
+        else:
+            parts = [export_snapshot(conn, args.out)["snapshot"]]
+
+    for part in parts:
+        for name, table in part["tables"].items():
+            rows = sum(chunk["rows"] for chunk in table["chunks"])
+            size = sum(chunk["bytes"] for chunk in table["chunks"])
+            print(
+                f"{name:<24}{rows:>10} rows{len(table['chunks']):>6} chunks"
+                f"{size / 2**20:>10.2f} MiB"
+            )
+    if len(parts) == 0:
+        print("No changes since the last export")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import csv
+import json
+import os
+import random
+from typing import Iterator
+import en_zh_dict, ja_ja_dict
+import DatabaseMigration as dm
+
+# Share of the total word count given to English and Japanese sources,
+# the rest goes to Russian
+EN_SHARE = 0.5
+JA_SHARE = 0.2
+
+LATIN = "abcdefghijklmnopqrstuvwxyz"
+CYRILLIC = "абвгдежзийклмнопрстуфхцчшщыэюя"
+KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわん"
+KANJI = "日本語学生先漢字言葉東京都市国人名山川田中大小上下左右"
+
+
+def make_word(i: int, alphabet: str) -> str:
+    # bijective base-N numbering (a, b, ..., z, aa, ab, ...): unique words
+    # without keeping a vocabulary in memory
+    chars: list[str] = []
+    i += 1
+    while i > 0:
+        i, r = divmod(i - 1, len(alphabet))
+        chars.append(alphabet[r])
+    return "".join(reversed(chars))
+
+
+def _write_json_object(path: str, items: Iterator[tuple[str, str]]) -> None:
+    # streamed, so the whole dict is never held in memory
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for n, (key, value) in enumerate(items):
+            f.write(("," if n > 0 else "") + json.dumps(key) + ":" + json.dumps(value))
+        f.write("}")
+
+
+def write_ecdict(path: str, count: int, rng: random.Random) -> None:
+    header = ["word", "phonetic", "definition", "translation", "pos", "collins"]
+    header += ["oxford", "tag", "bnc", "frq", "exchange", "detail", "audio"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(count):
+            word = make_word(i, LATIN)
+            writer.writerow(
+                [
+                    word,
+                    word if rng.random() < 0.7 else "",
+                    f"definition of {word}" if rng.random() < 0.3 else "",
+                    f"n. 词{i}\\nv. 做{word}",
+                    "",
+                    rng.choice(["", "0", "1", "3"]),
+                    rng.choice(["", "1"]),
+                    "",
+                    rng.randint(0, 50000),
+                    rng.randint(0, 50000),
+                    "",
+                    "",
+                    "",
+                ]
+            )
+
+
+def write_wordnet(path: str, count: int, rng: random.Random) -> None:
+    # JSON lines after a credit line, as jpn_wn_lmf_glosses_json_v2.txt
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("synthetic WordNet glosses\n")
+        for i in range(count):
+            synonyms2 = [
+                [make_word(rng.randrange(count), KANJI)]
+                for _ in range(rng.randint(0, 2))
+            ]
+            entry = {
+                "id": f"jpn-{i}",
+                "item": make_word(i, KANJI + KANA),
+                "pos": rng.choice(["n", "v", "a", ""]),
+                "glosses": [f"意味{j}" for j in range(rng.randint(1, 3))],
+                "synonyms": [s for group in synonyms2 for s in group],
+                "synonyms2": synonyms2,
+            }
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def write_furigana(path: str, count: int) -> None:
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write("[")
+        for i in range(count):
+            entry = {
+                "text": make_word(i, KANJI + KANA),
+                "reading": make_word(i, KANA),
+                "furigana": [],
+            }
+            f.write(("," if i > 0 else "") + json.dumps(entry, ensure_ascii=False))
+        f.write("]")
+
+
+def write_openrussian(
+    path: str,
+    fields: list[tuple[str, str]],
+    words: range,
+    rng: random.Random,
+) -> None:
+    # tab separated, as the OpenRussian exports in data/redict
+    header = ["bare", "accented", "translations_en", "translations_de"]
+    header += [field for field, _ in fields]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(header)
+        for i in words:
+            word = make_word(i, CYRILLIC)
+            forms = [
+                word[:1] + "'" + word[1:] + suffix if rng.random() < 0.8 else ""
+                for suffix in rng.choices(
+                    ["а", "ы", "е", "у", "ой", "ом"], k=len(fields)
+                )
+            ]
+            writer.writerow(
+                [word, word[:1] + "'" + word[1:], f"meaning {i}", "", *forms]
+            )
+
+
+def write_corpus(root: str, words: int, seed: int = 0) -> dict[str, int]:
+    # Writes every source read by DatabaseMigration.get_parse_tasks under
+    # root, with paths relative to root as in the module constants.
+    # Returns the number of entries written per file.
+    rng = random.Random(seed)
+    en_count = int(words * EN_SHARE)
+    ja_count = int(words * JA_SHARE)
+    ru_count = words - en_count - ja_count
+
+    def path(relative: str) -> str:
+        full = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        return full
+
+    counts: dict[str, int] = {}
+    write_ecdict(path(en_zh_dict.WORDS_PATH), en_count, rng)
+    counts[en_zh_dict.WORDS_PATH] = en_count
+
+    # The other English sources overlap ECDICT, as the real ones do
+    en_sources = [
+        (dm.EN_EN_PATH, 2, lambda w: f"definition of {w}"),
+        (dm.EN_PRON_PATH, 2, lambda w: f"/{w}/"),
+        (dm.EN_JA_PATH, 3, lambda w: f"{w}の意味"),
+    ]
+    for relative, step, value in en_sources:
+        items = (
+            (make_word(i, LATIN), value(make_word(i, LATIN)))
+            for i in range(0, en_count, step)
+        )
+        _write_json_object(path(relative), items)
+        counts[relative] = len(range(0, en_count, step))
+
+    write_wordnet(path(ja_ja_dict.WORDS_PATH), ja_count, rng)
+    write_furigana(path(ja_ja_dict.PRONS_PATH), ja_count)
+    counts[ja_ja_dict.WORDS_PATH] = counts[ja_ja_dict.PRONS_PATH] = ja_count
+
+    per_file = -(-ru_count // len(dm.RU_SOURCES))
+    for n, (relative, fields) in enumerate(dm.RU_SOURCES):
+        ids = range(n * per_file, min(ru_count, (n + 1) * per_file))
+        write_openrussian(path(relative), fields, ids, rng)
+        counts[relative] = len(ids)
+
+    return counts
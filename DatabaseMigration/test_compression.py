@@ -0,0 +1,75 @@
+from typing import Generator
+import pytest
+from sqlalchemy import Engine, create_engine, select
+from sqlalchemy.orm import Session
+from data_context import Base, Translation
+import compression
+from translation_text import read_text, write_text
+
+TEXTS = [
+    f"n. 词{i}\n-----\n[Collins] {i % 5}\n[BNC] {i * 7}\n[COCA] {i * 13}"
+    for i in range(300)
+] + [
+    "",
+    "[品詞] n\n[同義語・類義語]\n| [1] 日本語, 国語",
+    "book\n-----\n[singular instrumental form] кни'гой, кни'гою",
+]
+
+
+@pytest.fixture
+def engine() -> Generator[Engine, None, None]:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+            "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', NULL, 0, 0)",
+            [(i, f"w{i}") for i in range(len(TEXTS))],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Translation (WordId, TargetLanguage, TranslationText, "
+            "ModifiedAt, DeleteFlag) VALUES (?, 'en', ?, 0, 0)",
+            list(enumerate(TEXTS)),
+        )
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_compressed_translations_read_back(engine: Engine, codec: str) -> None:
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+
+    with engine.begin() as conn:
+        report = compression.compress_translations(conn, codec)
+    assert report["TranslationText bytes"] == sum(len(t.encode()) for t in TEXTS)
+    assert report["TranslationBlob bytes"] < report["TranslationText bytes"] * 0.75
+
+    with Session(engine) as session:
+        translations = session.scalars(
+            select(Translation).order_by(Translation.WordId)
+        ).all()
+        assert all(t.TranslationText == "" for t in translations)
+        assert [read_text(t) for t in translations] == TEXTS
+
+        write_text(translations[0], "changed")
+        session.commit()
+        assert translations[0].TranslationText == ""
+        assert read_text(translations[0]) == "changed"
+
+    with engine.begin() as conn:
+        # nothing left to compress
+        assert compression.compress_translations(conn, codec) == {}
+
+
+def test_uncompressed_translations_are_plain(engine: Engine) -> None:
+    with Session(engine) as session:
+        translation = session.scalars(select(Translation)).first()
+        assert translation is not None
+        assert read_text(translation) == TEXTS[0]
+        write_text(translation, "plain")
+        assert translation.TranslationText == "plain"
+        assert translation.TranslationBlob is None
@@ -0,0 +1,50 @@
+import sqlite3
+import uuid
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+from data_context import Base, Tag, TagCategory, User
+from instrumentation import Instrumentation
+import CreateUser
+
+ROOTS = {"bio": "life", "graph": "write", "tele": "far"}
+
+
+def test_read_user_names() -> None:
+    lines = ["alice\n", "  bob  \n", "\n", "# a comment\n", "carol # class A\n"]
+    assert CreateUser.read_user_names(lines + ["alice\n"]) == ["alice", "bob", "carol"]
+
+
+def test_provision_users(monkeypatch: pytest.MonkeyPatch) -> None:
+    # chunks smaller than the rows, so every table takes several executemany
+    monkeypatch.setattr(CreateUser, "CHUNK_SIZE", 2)
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    names = [f"user{i}" for i in range(5)]
+
+    with Session(engine) as session, session.begin():
+        stats = CreateUser.provision_users(session, names, ROOTS, 1, Instrumentation())
+    assert stats == {"users": 5, "tag categories": 5, "tags": 15}
+
+    with Session(engine) as session:
+        assert session.scalars(select(User.UserName)).all() == names
+        categories = session.scalars(select(TagCategory)).all()
+        assert sorted(c.UserName for c in categories) == names
+        for category in categories:
+            assert category.CategoryName == CreateUser.ROOTS_CATEGORY
+            assert {t.TagName: t.Description for t in category.tags} == ROOTS
+        assert session.scalar(select(func.count(func.distinct(Tag.TagId)))) == 15
+        # time-ordered ids, see ids.new_id
+        tag_ids = session.scalars(text("SELECT TagId FROM Tag ORDER BY rowid")).all()
+        assert {uuid.UUID(i).version for i in tag_ids} == {7}
+        assert tag_ids == sorted(tag_ids)
+
+        # existing users are found, and inserting them again fails as a whole
+        assert CreateUser.existing_user_names(session, ["user1", "dave"]) == {"user1"}
+    with pytest.raises(sqlite3.IntegrityError):
+        with Session(engine) as session, session.begin():
+            CreateUser.provision_users(
+                session, ["dave", "user1"], ROOTS, 2, Instrumentation()
+            )
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(User)) == 5
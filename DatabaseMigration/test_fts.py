@@ -0,0 +1,87 @@
+from typing import Generator
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from data_context import Base
+import fts
+
+
+@pytest.fixture
+def connection() -> Generator[Connection, None, None]:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) "
+            "VALUES ('en', 'English'), ('ja', 'Japanese')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+            "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, ?, ?, 0, 0)",
+            [
+                (1, "abandon", "en", "əˈbændən"),
+                (2, "abandonment", "en", None),
+                (3, "bandana", "en", None),
+                (4, "日本語", "ja", "にほんご"),
+                (5, "100%_pure", "en", None),
+            ],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Translation (TranslationId, WordId, TargetLanguage, "
+            "TranslationText, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', ?, 0, 0)",
+            [(1, 1, "to give up completely"), (2, 4, "the Japanese language")],
+        )
+        fts.create_fts(conn)
+        yield conn
+    engine.dispose()
+
+
+def words(rows: list) -> list[str]:
+    return [row.Word for row in rows]
+
+
+def test_search_words_substring(connection: Connection) -> None:
+    assert words(fts.search_words(connection, "band")) == [
+        "abandon",
+        "bandana",
+        "abandonment",
+    ]
+    assert words(fts.search_words(connection, "band", prefix_only=True)) == ["bandana"]
+    assert words(fts.search_words(connection, "本語")) == ["日本語"]
+    assert words(fts.search_words(connection, "ほんご")) == ["日本語"]
+    assert words(fts.search_words(connection, "band", source_language="ja")) == []
+
+
+def test_search_words_short_and_special(connection: Connection) -> None:
+    # under the trigram length, LIKE is used instead of MATCH
+    assert words(fts.search_words(connection, "ab", prefix_only=True)) == [
+        "abandon",
+        "abandonment",
+    ]
+    assert words(fts.search_words(connection, "%_")) == ["100%_pure"]
+    assert words(fts.search_words(connection, '"a')) == []
+
+
+def test_search_translations(connection: Connection) -> None:
+    assert words(fts.search_translations(connection, "give up")) == ["abandon"]
+    assert words(fts.search_translations(connection, "japanese")) == ["日本語"]
+
+
+def test_triggers_keep_index_in_sync(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "UPDATE Dictionary SET Word = 'forsake' WHERE WordId = 3"
+    )
+    connection.exec_driver_sql(
+        "INSERT INTO Dictionary (WordId, Word, SourceLanguage, Pronounce, "
+        "ModifiedAt, DeleteFlag) VALUES (6, 'bandwidth', 'en', NULL, 0, 0)"
+    )
+    connection.exec_driver_sql("DELETE FROM Translation WHERE TranslationId = 1")
+
+    assert words(fts.search_words(connection, "band", prefix_only=True)) == [
+        "bandwidth"
+    ]
+    assert words(fts.search_words(connection, "forsa")) == ["forsake"]
+    assert fts.search_translations(connection, "give up") == []
+    connection.exec_driver_sql(
+        "INSERT INTO DictionaryFts(DictionaryFts) VALUES ('integrity-check')"
+    )
@@ -0,0 +1,56 @@
+import time
+import uuid
+import pytest
+from sqlalchemy import Column, MetaData, Table, create_engine, select
+import ids
+
+
+def test_uuid7_is_time_ordered() -> None:
+    before = time.time_ns() // 1_000_000
+    made = [ids.new_id() for _ in range(10_000)]
+    after = time.time_ns() // 1_000_000
+
+    assert made == sorted(made)
+    assert len(set(made)) == len(made)
+    for id_ in made[:: len(made) - 1]:
+        u = uuid.UUID(id_)
+        assert str(u) == id_
+        assert u.version == 7 and u.variant == uuid.RFC_4122
+        # within the counter's capacity, so no millisecond was borrowed
+        assert before <= ids.id_time_ms(id_) <= after + len(made) // 2048
+
+
+def test_counter_overflow_borrows_the_next_millisecond(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ids, "_uuid7_sequence", ids._Sequence(12, 11))
+    monkeypatch.setattr(ids.time, "time_ns", lambda: 1_700_000_000_000 * 10**6)
+    made = [ids.uuid7() for _ in range(5_000)]
+    assert made == sorted(made)
+    assert ids.id_time_ms(str(made[-1])) > 1_700_000_000_000
+
+
+def test_ulid() -> None:
+    made = [ids.ulid() for _ in range(10_000)]
+    assert made == sorted(made)
+    assert len(set(made)) == len(made)
+    assert all(len(u) == 26 and set(u) <= set(ids.ULID_ALPHABET) for u in made)
+    # the first 10 characters are the timestamp
+    ms = 0
+    for c in made[0][:10]:
+        ms = ms * 32 + ids.ULID_ALPHABET.index(c)
+    assert abs(ms - time.time_ns() // 1_000_000) < 60_000
+
+
+def test_uuid_blob_column() -> None:
+    engine = create_engine("sqlite:///:memory:")
+    metadata = MetaData()
+    table = Table("t", metadata, Column("Id", ids.UuidBlob, primary_key=True))
+    metadata.create_all(engine)
+    id_ = ids.new_id()
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [{"Id": id_}])
+        assert conn.exec_driver_sql("SELECT Id FROM t").scalar() == ids.to_blob(id_)
+        assert conn.execute(select(table.c.Id)).scalar() == id_
+    assert len(ids.to_blob(id_)) == 16
+    assert ids.from_blob(ids.to_blob(id_)) == id_
@@ -0,0 +1,57 @@
+import json
+import os
+from typing import Any
+import pytest
+import en_zh_dict
+import instrumentation
+from instrumentation import Instrumentation
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_counted_rows_are_unchanged(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(instrumentation, "PROGRESS_ROWS", 10)
+    path = os.path.join(HERE, en_zh_dict.SAMPLE_PATH)
+    expected = list(en_zh_dict.get_word_prons_and_details(path, en_zh_dict.FIELDS))
+
+    instr = Instrumentation()
+    with instr.phase("parse") as phase:
+        rows = list(
+            instr.count(
+                "ecdict",
+                en_zh_dict.get_word_prons_and_details(path, en_zh_dict.FIELDS),
+            )
+        )
+        list(instr.count("ecdict", iter(expected[:5])))
+
+    assert rows == expected
+    assert instr.counters["ecdict"] == len(expected) + 5
+    assert phase.rows == len(expected) + 5
+    assert phase.seconds > 0
+    assert instr.timings == {"parse": phase.seconds}
+
+    # rows counted outside a phase only reach the counter
+    list(instr.count("other", range(3)))
+    assert instr.counters["other"] == 3
+    assert phase.rows == len(expected) + 5
+
+
+def test_report_is_json(tmp_path: Any) -> None:
+    instr = Instrumentation()
+    with instr.phase("insert"):
+        list(instr.count("en-en rows", range(100)))
+    with instr.phase("vacuum"):
+        pass
+
+    path = tmp_path / "report.json"
+    instr.write_report(str(path), {"WordForm rows": 7})
+    report = json.loads(path.read_text(encoding="utf-8"))
+
+    assert [p["name"] for p in report["phases"]] == ["insert", "vacuum"]
+    assert report["phases"][0]["rows"] == 100
+    assert report["phases"][0]["rows_per_sec"] > 0
+    assert report["phases"][1]["rows_per_sec"] is None
+    assert report["counters"] == {"en-en rows": 100}
+    assert report["stats"] == {"WordForm rows": 7}
+    if instrumentation.resource is not None:
+        assert report["peak_rss_bytes"] > 0
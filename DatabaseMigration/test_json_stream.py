@@ -0,0 +1,155 @@
+import json
+import random
+from typing import Any
+import pytest
+import ja_ja_dict
+import json_stream
+import synthetic_data
+
+ARRAY: list[Any] = [
+    {"text": "日本", "reading": "にほん", "furigana": [{"ruby": "日", "rt": "に"}]},
+    {"text": "},{", "reading": '"],["', "furigana": []},
+    12345678901234567890,
+    -1.5e3,
+    'a\\",b',
+    [[], {}, [1, [2, {"k": "},{"}]]],
+    None,
+    True,
+    {"text": "語", "reading": "ご", "furigana": [{"ruby": "語"}, {"rt": "ご"}]},
+]
+
+OBJECT: dict[str, Any] = {
+    "apple": "a fruit",
+    '","': '","',
+    "nested": {"a": [1, 2, {"b": "c"}], "d": {}},
+    "number": 0.25,
+    "empty": "",
+    "last": ["x"],
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def decoder(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_stream, "orjson", None)
+    elif json_stream.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("read_size", [1, 16, 1 << 20])
+def test_iter_array(
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+    decoder: str,
+    indent: int | None,
+    read_size: int,
+) -> None:
+    # small reads split every token across buffer boundaries
+    monkeypatch.setattr(json_stream, "READ_SIZE", read_size)
+    path = tmp_path / "array.json"
+    path.write_text(json.dumps(ARRAY * 20, ensure_ascii=False, indent=indent), "utf-8")
+    assert list(json_stream.iter_array(str(path))) == ARRAY * 20
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("read_size", [1, 1 << 20])
+def test_iter_object(
+    tmp_path: Any,
+    monkeypatch: pytest.MonkeyPatch,
+    decoder: str,
+    indent: int | None,
+    read_size: int,
+) -> None:
+    monkeypatch.setattr(json_stream, "READ_SIZE", read_size)
+    path = tmp_path / "object.json"
+    path.write_text(json.dumps(OBJECT, indent=indent), "utf-8")
+    assert list(json_stream.iter_object(str(path))) == list(OBJECT.items())
+
+
+@pytest.mark.parametrize("text", ["[]", " [ ] ", "\ufeff[ ]"])
+def test_empty_array(tmp_path: Any, text: str) -> None:
+    path = tmp_path / "empty.json"
+    path.write_text(text, "utf-8")
+    assert list(json_stream.iter_array(str(path), "utf-8-sig")) == []
+
+
+def test_repeated_keys_keep_the_last_value(tmp_path: Any) -> None:
+    path = tmp_path / "repeated.json"
+    path.write_text('{"a": 1, "b": 2, "a": 3}', "utf-8")
+    assert dict(json_stream.iter_object(str(path))) == {"a": 3, "b": 2}
+
+
+def test_invalid_json_raises(tmp_path: Any, decoder: str) -> None:
+    path = tmp_path / "invalid.json"
+    path.write_text('[{"a": 1}, {"a": ]', "utf-8")
+    with pytest.raises(ValueError):
+        list(json_stream.iter_array(str(path)))
+
+
+def test_ja_ja_parsers_match_json_load(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch, decoder: str
+) -> None:
+    monkeypatch.setattr(json_stream, "READ_SIZE", 64)
+    furigana = tmp_path / "furigana.json"
+    synthetic_data.write_furigana(str(furigana), 500)
+    with open(furigana, "r", encoding="utf-8-sig") as f:
+        expected = [(d["text"], d["reading"]) for d in json.load(f)]
+    assert list(ja_ja_dict.get_word_prons(str(furigana))) == expected
+
+    wordnet = tmp_path / "wordnet.txt"
+    synthetic_data.write_wordnet(str(wordnet), 200, random.Random(0))
+    with open(wordnet, "r", encoding="utf-8") as f:
+        next(f)
+        records = [json.loads(line) for line in f]
+    assert [ja_ja_dict.ItemEntry(**data) for data in records] == list(
+        ja_ja_dict.iter_entries(str(wordnet))
+    )
+    assert not hasattr(next(ja_ja_dict.iter_entries(str(wordnet))), "__dict__")
+
+
+def test_ja_ja_skips_latin_items(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch, decoder: str
+) -> None:
+    if decoder == "stdlib":
+        monkeypatch.setattr(ja_ja_dict, "_ENTRY_DECODER", None)
+    entries = [
+        ("日本", ["国"], [["日本国"]]),
+        ("Hello world", ["挨拶"], []),
+        ("!?", [], []),
+        ("abc\nあ", ["改行"], []),
+        ("学生", ["学ぶ人", "生徒"], [["生徒"], [], ["学徒", "書生"]]),
+        ("x", ["エックス"], []),
+        ("", [], [[]]),
+    ]
+    path = tmp_path / "wordnet.txt"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("credit line\n")
+        for n, (item, glosses, synonyms2) in enumerate(entries):
+            entry = {
+                "id": f"jpn-{n}",
+                "item": item,
+                "pos": "n" if n % 2 == 0 else "",
+                "glosses": glosses,
+                "synonyms": [s for group in synonyms2 for s in group],
+                "synonyms2": synonyms2,
+            }
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    assert list(ja_ja_dict.get_word_details(str(path))) == [
+        ("日本", "国\n-----\n[品詞] n\n[同義語・類義語] 日本国"),
+        ("abc\nあ", "改行"),
+        (
+            "学生",
+            "[1] 学ぶ人\n[2] 生徒\n-----\n[品詞] n\n[同義語・類義語]\n"
+            "| [1] 生徒\n| [3] 学徒, 書生",
+        ),
+        ("", "[品詞] n"),
+    ]
+    assert [w for w, _ in ja_ja_dict.get_word_synsets(str(path))] == [
+        "日本",
+        "abc\nあ",
+        "学生",
+        "",
+    ]
@@ -0,0 +1,496 @@
+import os
+from collections import Counter
+from typing import Any, Generator
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from data_context import Base, Dictionary, Language, Translation
+import DatabaseMigration as dm
+import en_zh_dict, ja_ja_dict, ru_en_dict, parallel_parse, bulk_load
+import compression
+import translation_body
+from helpers import ATTRIBUTE, DETAILS, FORM, POSITION, SYNSET
+from word_forms import find_lemmas
+from word_attributes import find_words, get_attributes, most_common, top_words
+from synthetic_data import write_corpus
+from translation_text import read_text
+import word_ids
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope="function")
+def session() -> Generator[Session, None, None]:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    db.add_all(
+        [
+            Language(LanguageCode="en", LanguageName="English"),
+            Language(LanguageCode="ja", LanguageName="Japanese"),
+            Language(LanguageCode="ru", LanguageName="Russian"),
+            Language(LanguageCode="zh-Hans", LanguageName="Chinese"),
+        ]
+    )
+    db.commit()
+    dm.create_stage(db)
+    yield db
+    db.close()
+
+
+def test_stage_rows_overwrite_and_merge(session: Session) -> None:
+    dm.stage_rows(session, "base", [("a", "1"), ("b", "2"), ("a", "3")])
+    dm.stage_rows(session, "alt", [("a", "x"), ("c", "y")])
+    dm.merge_stage_without_overwrite(session, "base", "alt")
+
+    rows = list(dm.iter_staged_words(session, "base", "missing"))
+    assert rows == [("a", "3", None), ("b", "2", None), ("c", "y", None)]
+
+
+def test_insert_in_chunks_matches_sorted_dict_build(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(dm, "CHUNK_SIZE", 3)
+    words = {"pear": "p", "apple": "a", "fig": "f", "kiwi": "k", "date": "d"}
+    dm.stage_rows(session, "en_en", words.items())
+    dm.stage_rows(session, "en_pron", [("fig", "/fɪg/")])
+    dm.stage_rows(session, "en_ja", [("kiwi", "キウイ"), ("plum", "すもも")])
+
+    acc = dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "en_en", "en_pron"), "en", "en", 0
+    )
+    acc = dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "en_ja", "en_pron"), "en", "ja", acc
+    )
+
+    ids = {w: i for w, i in session.execute(select(Dictionary.Word, Dictionary.WordId))}
+    assert acc == 6
+    assert ids == {"apple": 1, "date": 2, "fig": 3, "kiwi": 4, "pear": 5, "plum": 6}
+    assert (
+        session.scalar(select(Dictionary.Pronounce).where(Dictionary.Word == "fig"))
+        == "/fɪg/"
+    )
+    assert session.query(Translation).filter_by(TargetLanguage="ja").count() == 2
+
+
+def test_word_ids_are_per_source_language(session: Session) -> None:
+    # WordNet (ja) has Latin headwords too
+    dm.stage_rows(session, "en_en", [("CD", "compact disc"), ("tea", "a drink")])
+    dm.stage_rows(session, "ja_ja", [("CD", "コンパクトディスク"), ("茶", "お茶")])
+    dm.stage_attribute_rows(session, "ja", [("CD", "pos", "n")])
+    acc = dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "en_en", "none"), "en", "en", 0
+    )
+    acc = dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "ja_ja", "none"), "ja", "ja", acc
+    )
+    dm.insert_word_attributes(session)
+
+    words = session.execute(
+        select(Dictionary.WordId, Dictionary.SourceLanguage, Dictionary.Word)
+    ).all()
+    assert acc == 4
+    assert sorted(tuple(w) for w in words) == [
+        (1, "en", "CD"),
+        (2, "en", "tea"),
+        (3, "ja", "CD"),
+        (4, "ja", "茶"),
+    ]
+    assert session.execute(
+        text("SELECT WordId, TranslationText FROM Translation ORDER BY WordId")
+    ).all() == [(1, "compact disc"), (2, "a drink"), (3, "コンパクトディスク"), (4, "お茶")]
+    assert session.execute(text("SELECT WordId FROM WordAttribute")).all() == [(3,)]
+
+
+def test_word_map_spills_to_its_file(tmp_path: Any) -> None:
+    engine = create_engine("sqlite://")
+    with Session(engine) as session:
+        # a budget of 64 KiB for 20k words
+        word_ids.attach_word_map(session, str(tmp_path / "words"), cache_kib=64)
+        words = [f"word{i:05d}" for i in range(20_000)]
+        word_ids.add(session, "en", ((w, i) for i, w in enumerate(words)))
+        word_ids.add(session, "ru", [("word00001", -1)])
+        session.commit()
+        assert os.path.getsize(tmp_path / "words") > 64 * 1024
+
+        resolved = word_ids.resolve(session, "en", words[::-1] + ["missing"])
+        assert resolved == {w: i for i, w in enumerate(words)}
+        assert word_ids.resolve(session, "ru", ["word00001"]) == {"word00001": -1}
+        word_ids.detach_word_map(session)
+    engine.dispose()
+    os.remove(tmp_path / "words")
+
+
+def test_parsers_stream_same_rows_as_dict_build(session: Session) -> None:
+    ecdict_path = os.path.join(HERE, en_zh_dict.SAMPLE_PATH)
+    rows = list(en_zh_dict.get_word_prons_and_details(ecdict_path, en_zh_dict.FIELDS))
+    expected = {w: t for w, _, _, t in rows}
+
+    dm.stage_rows(session, "en_zh", ((w, t) for w, _, _, t in rows))
+    staged = {w: t for w, t, _ in dm.iter_staged_words(session, "en_zh", "none")}
+    assert staged == expected
+
+    others_path = os.path.join(HERE, ru_en_dict.OTHERS_PATH)
+    ru_rows = ru_en_dict.get_word_prons_and_details(
+        others_path, ru_en_dict.OTHERS_FIELDS
+    )
+    assert next(ru_rows)[0] == "и"
+
+
+def test_word_forms_resolve_to_lemma(session: Session, tmp_path: Any) -> None:
+    path = tmp_path / "nouns.csv"
+    header = ["bare", "accented", "translations_en", "translations_de"]
+    header += [field for field, _ in ru_en_dict.NOUNS_FIELDS]
+    row = {"bare": "книга", "accented": "кни'га", "translations_en": "book"}
+    row |= {"gender": "f", "sg_inst": "кни'гой, кни'гою", "pl_nom": "кни'ги"}
+    row |= {"sg_gen": "кни'ги"}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\t".join(header) + "\n")
+        f.write("\t".join(row.get(field, "") for field in header) + "\n")
+
+    forms = list(ru_en_dict.get_word_forms(str(path), ru_en_dict.NOUNS_FIELDS))
+    assert ("книга", "кни'гою", "книгою", "sg_inst") in forms
+    assert all(tag != "gender" for _, _, _, tag in forms)
+
+    dm.stage_ru_rows(
+        session,
+        ru_en_dict.get_word_prons_and_details(str(path), ru_en_dict.NOUNS_FIELDS),
+    )
+    dm.stage_form_rows(session, "ru", forms)
+    dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "ru_en", "ru_pron"), "ru", "en", 0
+    )
+    assert dm.insert_word_forms(session) == len(forms)
+
+    conn = session.connection()
+    assert [(r.Word, r.Tag) for r in find_lemmas(conn, "Кни́гой")] == [
+        ("книга", "sg_inst")
+    ]
+    assert [r.Tag for r in find_lemmas(conn, "книги")] == ["pl_nom", "sg_gen"]
+    assert [r.Tag for r in find_lemmas(conn, "книга")] == ["lemma"]
+    assert find_lemmas(conn, "книгам") == []
+
+
+def test_word_attributes_and_frequencies(
+    session: Session, tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "ecdict.csv"
+    path.write_text(
+        "word,phonetic,definition,translation,pos,collins,oxford,tag,bnc,frq,"
+        "exchange,detail,audio\n"
+        "go,,,v. 去,v:90/n:10,5,1,zk gk,120,80,,,\n"
+        "gone,,,a. 过去的,,0,,,9000,0,,,\n"
+        "gnu,,,n. 角马,n:100,,,,0,0,,,\n",
+        encoding="utf-8",
+    )
+    rows = list(en_zh_dict.get_word_attributes(str(path)))
+    assert ("go", "pos", "n") in rows and ("go", "tag", "gk") in rows
+    assert ("gone", "frq", "0") not in rows
+
+    dm.stage_rows(session, "en_zh", [("gnu", "n."), ("go", "v."), ("gone", "a.")])
+    dm.stage_rows(session, "ru_en", [("идти", "go")])
+    dm.stage_attribute_rows(session, "en", rows)
+    dm.stage_attribute_rows(session, "ru", [("идти", "aspect", "imperf")])
+    acc = dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "en_zh", "none"), "en", "zh-Hans", 0
+    )
+    dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "ru_en", "none"), "ru", "en", acc
+    )
+    assert dm.insert_word_attributes(session) == (6, 2)
+
+    conn = session.connection()
+    assert [r.Word for r in find_words(conn, "pos", "n")] == ["gnu", "go"]
+    assert [r.Word for r in find_words(conn, "aspect", "imperf")] == ["идти"]
+    assert get_attributes(conn, 2) == {"pos": ["n", "v"], "tag": ["gk", "zk"]}
+    assert [tuple(r) for r in top_words(conn, "BncRank")] == [
+        (2, "go", 120),
+        (3, "gone", 9000),
+    ]
+    assert [r.Word for r in top_words(conn, "CocaRank", 1)] == ["go"]
+    assert (
+        session.scalar(select(Dictionary.Collins).where(Dictionary.Word == "go")) == 5
+    )
+
+    # a rebuild updates only the words whose frequencies changed, and leaves
+    # ModifiedAt alone: the frequencies are not synced
+    monkeypatch.setattr(dm, "DT_NOW", dm.DT_NOW + 1)
+    dm.stage_attribute_rows(session, "en", [("go", "bnc", "121"), ("go", "frq", "80")])
+    assert dm.insert_word_attributes(session) == (0, 2)
+    modified = set(session.scalars(select(Dictionary.ModifiedAt)))
+    assert modified == {dm.DT_NOW - 1}
+    assert [tuple(r) for r in top_words(session.connection(), "BncRank")] == [
+        (2, "go", 121)
+    ]
+
+
+def test_ranks_follow_frequency_signals(session: Session) -> None:
+    en = [("be", "v."), ("bee", "n."), ("beer", "n."), ("bet", "v."), ("by", "p.")]
+    ru = [("и", "and"), ("книга", "book"), ("в", "in"), ("дом", "house")]
+    ja = [("木", "き"), ("日", "ひ"), ("本", "ほん")]
+    for name, rows in [("en", en), ("ru", ru), ("ja", ja)]:
+        dm.stage_rows(session, name, rows)
+
+    def stage_signals(frequencies: list[tuple[str, str, str]]) -> None:
+        dm.stage_attribute_rows(session, "en", frequencies)
+        # и 1st of 3 others, книга 1st of 2 nouns, в 2nd of 3 others
+        dm.stage_rank_as("position", "others.csv", "ru")(
+            session, [("и", 1), ("в", 2), ("что", 3)]
+        )
+        dm.stage_rank_as("position", "nouns.csv", "ru")(
+            session, [("книга", 1), ("дом", 2)]
+        )
+        dm.stage_rank_as("synset", "wn", "ja")(
+            session, [("本", "s1"), ("本", "s2"), ("日", "s3"), ("本", "s2")]
+        )
+
+    stage_signals(
+        [("be", "frq", "2"), ("be", "bnc", "1"), ("bet", "bnc", "900")]
+        + [("by", "frq", "30"), ("bee", "collins", "2")]
+    )
+
+    acc = 0
+    for name, lang in [("en", "en"), ("ru", "ru"), ("ja", "ja")]:
+        acc = dm.insert_words_and_translations(
+            session, dm.iter_staged_words(session, name, "none"), lang, "en", acc
+        )
+    dm.insert_word_attributes(session)
+    assert dm.assign_ranks(session) == 12
+
+    conn = session.connection()
+    assert [r.Word for r in most_common(conn, "en")] == [
+        "be",
+        "by",
+        "bet",
+        "bee",
+        "beer",
+    ]
+    assert [r.Word for r in most_common(conn, "ru")] == ["и", "книга", "в", "дом"]
+    assert [r.Word for r in most_common(conn, "ja")] == ["本", "日", "木"]
+    assert [r.Rank for r in most_common(conn, "en", 2, "bee")] == [4, 5]
+
+    # ranks only change for the words that moved
+    stage_signals([("be", "frq", "2"), ("beer", "frq", "1")])
+    dm.insert_word_attributes(session)
+    assert dm.assign_ranks(session) == 4
+    assert [r.Word for r in most_common(session.connection(), "en")] == [
+        "beer",
+        "be",
+        "by",
+        "bee",
+        "bet",
+    ]
+
+
+def test_synthetic_corpus_parses(
+    session: Session, tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    counts = write_corpus(str(tmp_path), 1000)
+    assert counts[en_zh_dict.WORDS_PATH] == 500
+    assert sum(counts[path] for path, _ in dm.RU_SOURCES) == 300
+
+    monkeypatch.chdir(tmp_path)
+    tasks = dm.get_parse_tasks(False)
+    # one pass per source file
+    assert len({t.args[0] for t in tasks}) == len(tasks)
+    dm.run_parse_tasks(session, tasks, 1)
+    staged = dict(
+        session.execute(text("SELECT Name, count(*) FROM Stage GROUP BY Name")).all()
+    )
+    assert staged["en_zh"] == 500
+    assert staged["en_en"] == 250
+    assert staged["ja_ja"] == staged["ja_pron"] == 200
+    assert staged["ru_en"] == 300
+    for table in ["StageAttribute", "StageForm", "StageRank"]:
+        assert session.scalar(text(f"SELECT count(*) FROM {table}")) > 0
+
+
+def test_tagged_rows_match_single_kind_parsers(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    write_corpus(str(tmp_path), 1000)
+    monkeypatch.chdir(tmp_path)
+
+    def by_tag(rows: Any) -> dict[str, list[Any]]:
+        tagged: dict[str, list[Any]] = {}
+        for tag, row in rows:
+            tagged.setdefault(tag, []).append(row)
+        return tagged
+
+    path = en_zh_dict.WORDS_PATH
+    assert by_tag(en_zh_dict.get_tagged_rows(path, en_zh_dict.FIELDS)) == {
+        DETAILS: list(en_zh_dict.get_word_prons_and_details(path, en_zh_dict.FIELDS)),
+        ATTRIBUTE: list(en_zh_dict.get_word_attributes(path)),
+    }
+
+    path = ja_ja_dict.WORDS_PATH
+    assert by_tag(ja_ja_dict.get_tagged_rows(path)) == {
+        DETAILS: list(ja_ja_dict.get_word_details(path)),
+        ATTRIBUTE: list(ja_ja_dict.get_word_attributes(path)),
+        SYNSET: list(ja_ja_dict.get_word_synsets(path)),
+    }
+
+    path, fields = ru_en_dict.NOUNS_PATH, ru_en_dict.NOUNS_FIELDS
+    tagged = by_tag(ru_en_dict.get_tagged_rows(path, fields, "n"))
+    assert tagged == {
+        DETAILS: list(ru_en_dict.get_word_prons_and_details(path, fields)),
+        FORM: list(ru_en_dict.get_word_forms(path, fields)),
+        ATTRIBUTE: list(ru_en_dict.get_word_attributes(path, fields, "n")),
+        POSITION: list(ru_en_dict.get_word_positions(path)),
+    }
+
+
+def test_sharded_parse_matches_serial_parse() -> None:
+    ecdict_path = os.path.join(HERE, en_zh_dict.SAMPLE_PATH)
+    serial = list(en_zh_dict.get_word_prons_and_details(ecdict_path, en_zh_dict.FIELDS))
+
+    ranges = parallel_parse.shard_ranges(ecdict_path, shard_bytes=500)
+    assert len(ranges) > 1
+    jobs = [
+        (en_zh_dict.get_word_prons_and_details, (ecdict_path, en_zh_dict.FIELDS, r))
+        for r in ranges
+    ]
+    sharded = [row for rows in parallel_parse.iter_job_results(jobs, 2) for row in rows]
+    assert sharded == serial
+
+
+def test_bulk_load_defers_unique_indexes(tmp_path: Any) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    bulk_load.use_bulk_pragmas(engine)
+    bulk_load.create_tables_without_indexes(engine)
+
+    with Session(engine) as db:
+        db.add(Language(LanguageCode="en", LanguageName="English"))
+        db.commit()
+        rows = [(1, "a", "en", None, 0, False), (2, "a", "en", None, 0, False)]
+        bulk_load.insert_rows(db, Dictionary.__table__, dm.DICTIONARY_COLUMNS, rows)
+        db.commit()
+
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            bulk_load.create_deferred_indexes(conn)
+
+    assert any(c.name == "uq_dictionary" for c in Dictionary.__table__.constraints)
+
+
+@pytest.mark.parametrize("memory_temp, temp_store", [(False, 0), (True, 2)])
+def test_bulk_load_temp_store(
+    tmp_path: Any, memory_temp: bool, temp_store: int
+) -> None:
+    # staging spills to temp files unless memory_temp is asked for
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    bulk_load.use_bulk_pragmas(engine, memory_temp=memory_temp)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar_one() == temp_store
+
+
+def test_incremental_update_touches_changed_rows_only(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dm.stage_rows(session, "v1", [("apple", "a"), ("fig", "f"), ("kiwi", "k")])
+    dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "v1", "none"), "en", "en", 0
+    )
+
+    monkeypatch.setattr(dm, "DT_NOW", dm.DT_NOW + 1)
+    stats: Counter[str] = Counter()
+    dm.create_incremental_stage(session)
+    dm.stage_rows(session, "v2", [("apple", "a"), ("fig", "fig!"), ("lime", "l")])
+    acc = dm.upsert_words_and_translations(
+        session,
+        dm.iter_staged_words(session, "v2", "none"),
+        "en",
+        "en",
+        dm.get_max_word_id(session),
+        stats,
+    )
+    dm.soft_delete_unseen(session, stats)
+
+    rows = {
+        w: (i, d, m)
+        for w, i, d, m in session.execute(
+            select(
+                Dictionary.Word,
+                Dictionary.WordId,
+                Dictionary.DeleteFlag,
+                Dictionary.ModifiedAt,
+            )
+        )
+    }
+    assert acc == 4
+    assert rows["apple"] == (1, False, dm.DT_NOW - 1)
+    assert rows["kiwi"] == (3, True, dm.DT_NOW)
+    assert rows["lime"] == (4, False, dm.DT_NOW)
+    assert (
+        session.scalar(
+            select(Translation.TranslationText).where(Translation.WordId == 2)
+        )
+        == "fig!"
+    )
+    assert stats == {
+        "Dictionary inserted": 1,
+        "Dictionary updated": 0,
+        "Dictionary deleted": 1,
+        "Translation inserted": 1,
+        "Translation updated": 1,
+        "Translation deleted": 1,
+    }
+
+
+def test_incremental_refuses_compressed_database(session: Session) -> None:
+    dm.stage_rows(session, "v1", [("apple", "a"), ("fig", "f")])
+    dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "v1", "none"), "en", "en", 0
+    )
+    assert dm.get_compact_flags(session) == []
+
+    # compressed rows read back as empty TranslationText
+    compression.compress_translations(session.connection(), "zlib")
+    session.commit()
+    assert dm.get_compact_flags(session) == ["--compress"]
+
+
+def test_incremental_refuses_deduped_database(session: Session) -> None:
+    body = "shared " * 20
+    dm.stage_rows(session, "v1", [("apple", body), ("fig", body), ("kiwi", "k")])
+    dm.insert_words_and_translations(
+        session, dm.iter_staged_words(session, "v1", "none"), "en", "en", 0
+    )
+    translation_body.dedupe_translations(session.connection())
+    session.commit()
+    assert dm.get_compact_flags(session) == ["--dedupe"]
+
+
+def test_compact_copy_leaves_the_database_plain(tmp_path: Any) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'words.db'}")
+    Base.metadata.create_all(engine)
+    shared = "a fruit " * 20
+    rows = [("apple", shared), ("fig", shared), ("kiwi", "a bird")]
+    with Session(engine) as session:
+        session.add(Language(LanguageCode="en", LanguageName="English"))
+        session.commit()
+        dm.create_stage(session)
+        dm.stage_rows(session, "v1", rows)
+        dm.insert_words_and_translations(
+            session, dm.iter_staged_words(session, "v1", "none"), "en", "en", 0
+        )
+
+    compact_path = str(tmp_path / "words.compact.db")
+    dm.copy_database(engine, compact_path)
+    compact = create_engine(f"sqlite:///{compact_path}")
+    with compact.begin() as conn:
+        translation_body.dedupe_translations(conn)
+        compression.compress_translations(conn, "zlib")
+
+    order = select(Translation).order_by(Translation.WordId)
+    with Session(engine) as session:
+        assert dm.get_compact_flags(session) == []
+        assert [t.TranslationText for t in session.scalars(order)] == [
+            trans for _, trans in rows
+        ]
+    with Session(compact) as session:
+        assert dm.get_compact_flags(session) == ["--dedupe", "--compress"]
+        assert [read_text(t) for t in session.scalars(order)] == [
+            trans for _, trans in rows
+        ]
@@ -0,0 +1,88 @@
+import os
+from typing import Any
+import pytest
+import en_zh_dict, ja_ja_dict, ru_en_dict
+import helpers
+import parse_cache
+from parse_cache import ParseCache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_cached_rows_match_parser(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(parse_cache, "CHUNK_SIZE", 7)
+    source = tmp_path / "ecdict.csv"
+    source.write_bytes(open(os.path.join(HERE, en_zh_dict.SAMPLE_PATH), "rb").read())
+    args = (str(source), en_zh_dict.FIELDS)
+    expected = list(en_zh_dict.get_word_prons_and_details(*args))
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    parser = en_zh_dict.get_word_prons_and_details
+    assert not cache.has(parser, args)
+    assert list(cache.rows(parser, args)) == expected
+    assert cache.has(parser, args)
+    assert list(cache.rows(parser, args)) == expected
+
+    # other arguments or parsers are other entries
+    assert not cache.has(parser, (str(source), []))
+    assert not cache.has(en_zh_dict.get_word_attributes, (str(source),))
+
+    # so is a changed source
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("\nzyzzyva,,,n. 象鼻虫,,,,,0,0,,,\n")
+    assert not cache.has(parser, args)
+    assert list(cache.rows(parser, args))[-1][0] == "zyzzyva"
+
+
+def test_changed_helper_is_a_miss(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # en_zh_dict parses with helpers.iter_lines
+    source = tmp_path / "ecdict.csv"
+    source.write_bytes(open(os.path.join(HERE, en_zh_dict.SAMPLE_PATH), "rb").read())
+    args = (str(source), en_zh_dict.FIELDS)
+    parser = en_zh_dict.get_word_prons_and_details
+    cache = ParseCache(str(tmp_path / "cache"))
+    list(cache.rows(parser, args))
+    assert cache.has(parser, args)
+
+    file_hash = cache._file_hash
+    edited = os.path.abspath(helpers.__file__)
+    monkeypatch.setattr(
+        cache,
+        "_file_hash",
+        lambda path: b"edited" if os.path.abspath(path) == edited else file_hash(path),
+    )
+    assert not cache.has(parser, args)
+
+
+def test_partial_read_leaves_no_entry(tmp_path: Any) -> None:
+    source = tmp_path / "wn.txt"
+    source.write_text(
+        "credit\n" + '{"id": "1", "item": "本", "pos": "n", "glosses": [], '
+        '"synonyms": [], "synonyms2": []}\n' * 3,
+        encoding="utf-8",
+    )
+    cache = ParseCache(str(tmp_path / "cache"))
+    rows = cache.rows(ja_ja_dict.get_word_synsets, (str(source),))
+    next(rows)
+    rows.close()
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_evict_least_recently_used(tmp_path: Any) -> None:
+    parser = ru_en_dict.get_word_positions
+    cache = ParseCache(str(tmp_path / "cache"), budget_bytes=0)
+    sources = []
+    for i in range(3):
+        source = tmp_path / f"{i}.csv"
+        source.write_text(f"bare\taccented\nслово{i}\tсло'во\n", encoding="utf-8")
+        sources.append((str(source),))
+        list(cache.rows(parser, sources[-1]))
+        os.utime(cache.path(cache.key(parser, sources[-1])), ns=(i, i))
+
+    cache.budget_bytes = os.path.getsize(cache.path(cache.key(parser, sources[0])))
+    assert cache.evict() > 0
+    assert [cache.has(parser, s) for s in sources] == [False, False, True]
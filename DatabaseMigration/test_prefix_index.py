@@ -0,0 +1,121 @@
+import os
+import struct
+from typing import Generator
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from data_context import Base
+from prefix_index import (
+    DIRECTORY_ENTRY,
+    HEADER,
+    PrefixIndex,
+    write_prefix_index,
+)
+
+WORDS = [
+    (1, "abandon", "en", 0),
+    (2, "abandonment", "en", 0),
+    (3, "Abandon", "en", 0),
+    (4, "abc", "en", 1),
+    (5, "über", "en", 0),
+    (6, "日本", "ja", 0),
+    (7, "日本語", "ja", 0),
+    (8, "にほん", "ja", 0),
+    (9, "дом", "ru", 0),
+]
+
+
+@pytest.fixture
+def connection() -> Generator[Connection, None, None]:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) "
+            "VALUES ('en', ''), ('ja', ''), ('ru', '')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+            "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, ?, NULL, 0, ?)",
+            WORDS,
+        )
+        yield conn
+    engine.dispose()
+
+
+@pytest.fixture
+def index(connection: Connection, tmp_path: str) -> Generator[PrefixIndex, None, None]:
+    path = os.path.join(tmp_path, "words.prefix")
+    assert write_prefix_index(connection, path) == {"en": 4, "ja": 3, "ru": 1}
+    with PrefixIndex(path) as index:
+        yield index
+
+
+def test_complete_matches_sql_order(connection: Connection, index: PrefixIndex) -> None:
+    assert index.languages == ["en", "ja", "ru"]
+    for lang, prefix in [("en", ""), ("en", "a"), ("ja", "日本"), ("ja", "")]:
+        expected = connection.exec_driver_sql(
+            "SELECT Word, WordId FROM Dictionary WHERE SourceLanguage = ? "
+            "AND Word LIKE ? AND DeleteFlag = 0 ORDER BY Word",
+            (lang, prefix + "%"),
+        ).all()
+        if lang == "en" and prefix == "a":
+            # LIKE is case-insensitive, the index is not
+            expected = [row for row in expected if row[0].startswith("a")]
+        assert index.complete(lang, prefix, limit=100) == [tuple(r) for r in expected]
+
+
+def test_lookup(index: PrefixIndex) -> None:
+    assert index.complete("en", "aban", limit=1) == [("abandon", 1)]
+    assert index.count("en", "aban") == 2
+    assert index.count("en", "abc") == 0
+    assert index.get("en", "abandon") == 1
+    assert index.get("en", "aband") is None
+    assert index.get("en", "über") == 5
+    assert index.get("ru", "дом") == 9
+    assert index.get("zh-Hans", "dom") is None
+    assert index.complete("zh-Hans", "") == []
+
+
+def test_rejects_other_files(tmp_path: str) -> None:
+    path = os.path.join(tmp_path, "other")
+    with open(path, "wb") as f:
+        f.write(b"SQLite format 3\0" + b"\0" * 16)
+    with pytest.raises(ValueError):
+        PrefixIndex(path)
+
+
+def test_rejects_truncated_files(connection: Connection, tmp_path: str) -> None:
+    path = os.path.join(tmp_path, "words.prefix")
+    write_prefix_index(connection, path)
+    with open(path, "rb") as f:
+        data = f.read()
+    # cut into the header, the sections and the directory
+    for size in [8, 64, len(data) - 8]:
+        with open(path, "wb") as f:
+            f.write(data[:size])
+        with pytest.raises(ValueError):
+            PrefixIndex(path)
+
+
+def test_sections_are_little_endian(connection: Connection, tmp_path: str) -> None:
+    # decoded with explicit "<" formats, whatever the platform's byte order
+    path = os.path.join(tmp_path, "words.prefix")
+    write_prefix_index(connection, path)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    _, _, count, directory_pos = HEADER.unpack_from(data)
+    entries = [
+        DIRECTORY_ENTRY.unpack_from(data, directory_pos + i * DIRECTORY_ENTRY.size)
+        for i in range(count)
+    ]
+    lang, words, offsets_pos, ids_pos, blob_pos = entries[1]
+    assert lang.rstrip(b"\0") == b"ja"
+    offsets = struct.unpack_from(f"<{words + 1}I", data, offsets_pos)
+    ids = struct.unpack_from(f"<{words}i", data, ids_pos)
+    blob = data[blob_pos : blob_pos + offsets[-1]]
+    assert [
+        (blob[offsets[i] : offsets[i + 1]].decode("utf-8"), ids[i])
+        for i in range(words)
+    ] == [("にほん", 8), ("日本", 6), ("日本語", 7)]
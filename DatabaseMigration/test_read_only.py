@@ -0,0 +1,66 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from data_context import Base, Dictionary
+from read_only import create_read_only_engine, database_uri
+
+
+def build(path: str, words: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, Pronounce, "
+            "ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', NULL, 0, 0)",
+            [(i, f"word{i}") for i in range(words)],
+        )
+    engine.dispose()
+
+
+def test_database_uri() -> None:
+    assert database_uri("/tmp/a b.db") == "file:/tmp/a%20b.db?mode=ro&immutable=1"
+    assert database_uri("/tmp/a.db", immutable=False, shared_cache=True) == (
+        "file:/tmp/a.db?mode=ro&cache=shared"
+    )
+
+
+@pytest.mark.parametrize("immutable", [True, False])
+def test_read_only_engine(tmp_path: Any, immutable: bool) -> None:
+    path = str(tmp_path / "bear_words.db")
+    build(path, 100)
+    engine = create_read_only_engine(path, pool_size=4, immutable=immutable)
+
+    with Session(engine) as session:
+        word = session.scalars(select(Dictionary).where(Dictionary.WordId == 7)).one()
+        assert word.Word == "word7"
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA mmap_size").scalar() > 0
+        with pytest.raises(sqlite3.OperationalError):
+            conn.connection.dbapi_connection.execute("DELETE FROM Dictionary")
+
+    # readers on several threads share the pool's connections
+    def lookup(i: int) -> str:
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(
+                "SELECT Word FROM Dictionary WHERE WordId = ?", (i,)
+            ).scalar_one()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(lookup, range(100))) == [
+            f"word{i}" for i in range(100)
+        ]
+    assert engine.pool.size() == 4
+    engine.dispose()
+
+
+def test_missing_database(tmp_path: Any) -> None:
+    with pytest.raises(FileNotFoundError):
+        create_read_only_engine(str(tmp_path / "missing.db"))
@@ -0,0 +1,100 @@
+import json
+import os
+from typing import Any, Generator
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from data_context import Base
+from kana import hiragana_to_katakana, normalize_reading, to_romaji
+from reading_index import build_reading_index, search_readings
+import ja_ja_dict
+
+# In the JmdictFurigana.json format read by ja_ja_dict.get_word_prons
+FURIGANA = [
+    {"text": "日本語", "reading": "にほんご", "furigana": []},
+    {"text": "東京", "reading": "とうきょう", "furigana": []},
+    {"text": "抹茶", "reading": "まっちゃ", "furigana": []},
+    {"text": "珈琲", "reading": "コーヒー", "furigana": []},
+    {"text": "日本", "reading": "にほん", "furigana": []},
+    {"text": "新聞", "reading": "しんぶん", "furigana": []},
+]
+
+
+@pytest.mark.parametrize(
+    "text, normalized, romaji",
+    [
+        ("きょうと", "きょうと", "kyouto"),
+        ("トウキョウ", "とうきょう", "toukyou"),
+        ("ｶﾀｶﾅ", "かたかな", "katakana"),
+        ("がっこう", "がっこう", "gakkou"),
+        ("まっちゃ", "まっちゃ", "matcha"),
+        ("コーヒー", "こーひー", "koohii"),
+        ("ファイル", "ふぁいる", "fairu"),
+        ("しんぶん", "しんぶん", "shinbun"),
+        ("ジャズ・バンド", "じゃずばんど", "jazubando"),
+    ],
+)
+def test_normalize_reading(text: str, normalized: str, romaji: str) -> None:
+    assert normalize_reading(text) == normalized
+    assert normalize_reading(hiragana_to_katakana(normalized)) == normalized
+    assert to_romaji(text) == romaji
+
+
+@pytest.fixture
+def connection(tmp_path: Any) -> Generator[Connection, None, None]:
+    path = os.path.join(tmp_path, "JmdictFurigana.json")
+    with open(path, "w", encoding="utf-8-sig") as f:
+        json.dump(FURIGANA, f, ensure_ascii=False)
+    prons = list(ja_ja_dict.get_word_prons(path))
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('ja', '日本語')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+            "Pronounce, ModifiedAt, DeleteFlag) VALUES (NULL, ?, 'ja', ?, 0, 0)",
+            prons + [("りんご", None), ("サラダ", None)],
+        )
+        assert build_reading_index(conn, romaji=True) == 2 * (len(prons) + 2)
+        yield conn
+    engine.dispose()
+
+
+def words(rows: list) -> list[str]:
+    return [row.Word for row in rows]
+
+
+def test_every_furigana_reading_finds_its_word(connection: Connection) -> None:
+    for d in FURIGANA:
+        for query in [
+            d["reading"],
+            hiragana_to_katakana(d["reading"]),
+            to_romaji(d["reading"]),
+        ]:
+            assert words(search_readings(connection, query)) == [d["text"]], query
+
+
+def test_kana_words_are_their_own_reading(connection: Connection) -> None:
+    assert words(search_readings(connection, "リンゴ")) == ["りんご"]
+    assert words(search_readings(connection, "sarada")) == ["サラダ"]
+
+
+def test_prefix_search(connection: Connection) -> None:
+    assert words(search_readings(connection, "にほん", prefix_only=True)) == [
+        "日本",
+        "日本語",
+    ]
+    assert words(search_readings(connection, "ニホ")) == []
+    assert words(search_readings(connection, "")) == []
+
+
+def test_rebuild_drops_deleted_words(connection: Connection) -> None:
+    connection.exec_driver_sql(
+        "UPDATE Dictionary SET DeleteFlag = 1 WHERE Word = '東京'"
+    )
+    build_reading_index(connection)
+    assert search_readings(connection, "とうきょう") == []
+    assert search_readings(connection, "nihon") == []
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+from typing import Any
+import pytest
+from sqlalchemy import create_engine
+from data_context import Base
+from shards import connect_shards, list_pairs, shard_name, write_shards
+
+# (WordId, Word, SourceLanguage) and the TargetLanguages of its translations
+WORDS = [
+    (1, "apple", "en", ["en", "ja"]),
+    (2, "pear", "en", ["ja"]),
+    (3, "ringo", "ja", ["ja"]),
+    (4, "yabloko", "ru", ["en"]),
+]
+
+
+def build(path: str) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for code in ["en", "ja", "ru"]:
+            conn.exec_driver_sql(
+                "INSERT INTO Language (LanguageCode, LanguageName) VALUES (?, ?)",
+                (code, code),
+            )
+        for word_id, word, source, targets in WORDS:
+            conn.exec_driver_sql(
+                "INSERT INTO Dictionary (WordId, Word, SourceLanguage, Pronounce, "
+                "ModifiedAt, DeleteFlag) VALUES (?, ?, ?, NULL, 0, 0)",
+                (word_id, word, source),
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO Translation (WordId, TargetLanguage, TranslationText, "
+                "ModifiedAt, DeleteFlag) VALUES (?, ?, ?, 0, 0)",
+                [(word_id, t, f"{word} in {t}") for t in targets],
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO WordAttribute (Key, Value, WordId) VALUES ('pos', 'n', ?)",
+                (word_id,),
+            )
+        conn.exec_driver_sql(
+            "INSERT INTO WordReading (Reading, WordId) VALUES ('りんご', 3)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO WordForm (BareForm, WordId, Tag, Form) "
+            "VALUES ('yabloka', 4, 'gen', 'x')"
+        )
+    engine.dispose()
+
+
+def test_write_shards(tmp_path: Any) -> None:
+    path = str(tmp_path / "bear_words.db")
+    build(path)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        assert list_pairs(conn) == [
+            ("en", "en"),
+            ("en", "ja"),
+            ("ja", "ja"),
+            ("ru", "en"),
+        ]
+    counts = write_shards(engine, str(tmp_path / "shards"))
+    engine.dispose()
+
+    assert counts[("en", "ja")]["Dictionary"] == 2
+    assert counts[("en", "ja")]["Translation"] == 2
+    assert counts[("ja", "ja")]["WordReading"] == 1
+    assert counts[("ru", "en")]["WordForm"] == 1
+
+    # a shard is a database of the same schema, with the build's WordIds
+    shard = sqlite3.connect(str(tmp_path / "shards" / shard_name("en", "en")))
+    assert shard.execute("SELECT WordId, Word FROM Dictionary").fetchall() == [
+        (1, "apple")
+    ]
+    assert shard.execute(
+        "SELECT WordId, TargetLanguage FROM Translation"
+    ).fetchall() == [(1, "en")]
+    assert shard.execute("PRAGMA foreign_key_check").fetchall() == []
+    shard.close()
+
+
+def test_connect_shards(tmp_path: Any) -> None:
+    path = str(tmp_path / "bear_words.db")
+    build(path)
+    engine = create_engine(f"sqlite:///{path}")
+    write_shards(engine, str(tmp_path / "shards"))
+    engine.dispose()
+
+    pairs = [("en", "en"), ("en", "ja"), ("ru", "en")]
+    conn = connect_shards(
+        [str(tmp_path / "shards" / shard_name(s, t)) for s, t in pairs]
+    )
+    # apple is in two shards but listed once, as is its attribute
+    assert conn.execute("SELECT WordId FROM Dictionary ORDER BY 1").fetchall() == [
+        (1,),
+        (2,),
+        (4,),
+    ]
+    assert conn.execute("SELECT count(*) FROM WordAttribute").fetchone() == (3,)
+    assert conn.execute(
+        "SELECT t.TargetLanguage, t.TranslationText FROM Dictionary d "
+        "JOIN Translation t ON t.WordId = d.WordId WHERE d.Word = 'apple' "
+        "ORDER BY 1"
+    ).fetchall() == [("en", "apple in en"), ("ja", "apple in ja")]
+
+    # lookups search each shard's indexes instead of scanning them
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT WordId FROM Dictionary "
+        "WHERE Word = 'apple' AND SourceLanguage = 'en'"
+    ).fetchall()
+    assert not any(row[3].startswith("SCAN") for row in plan)
+
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM Translation")
+    conn.close()
+
+    with pytest.raises(FileNotFoundError):
+        connect_shards([os.path.join(str(tmp_path), "missing.db")])
@@ -0,0 +1,178 @@
+import os
+from typing import Any, Generator
+import pytest
+from sqlalchemy import Engine, create_engine
+import compression
+from data_context import Base
+import snapshot
+import translation_body
+
+WORDS = 10
+
+
+@pytest.fixture
+def engine() -> Generator[Engine, None, None]:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) "
+            "VALUES ('ja', 'Japanese')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+            "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', NULL, 100, 0)",
+            [(i, f"w{i}") for i in range(WORDS)],
+        )
+        # inserted out of key order, ja before en
+        for lang in ["ja", "en"]:
+            conn.exec_driver_sql(
+                "INSERT INTO Translation (WordId, TargetLanguage, TranslationText, "
+                "ModifiedAt, DeleteFlag) VALUES (?, ?, ?, 100, 0)",
+                [(i, lang, f"{lang} {i}") for i in range(WORDS)],
+            )
+    yield engine
+    engine.dispose()
+
+
+def read_part(directory: str, part: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
+    return {
+        name: [
+            row
+            for chunk in table["chunks"]
+            for row in snapshot.read_chunk(os.path.join(directory, chunk["file"]))
+        ]
+        for name, table in part["tables"].items()
+    }
+
+
+def test_snapshot_and_deltas(
+    engine: Engine, tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(snapshot, "CHUNK_ROWS", 3)
+    out = str(tmp_path / "snapshot")
+    with engine.begin() as conn:
+        manifest = snapshot.export_snapshot(conn, out)
+
+    assert manifest["snapshot"]["version"] == 101
+    tables = read_part(out, manifest["snapshot"])
+    assert [row["LanguageCode"] for row in tables["Language"]] == ["en", "ja"]
+    assert [row["WordId"] for row in tables["Dictionary"]] == list(range(WORDS))
+    assert [(r["WordId"], r["TargetLanguage"]) for r in tables["Translation"]] == [
+        (i, lang) for i in range(WORDS) for lang in ["en", "ja"]
+    ]
+    chunks = manifest["snapshot"]["tables"]["Translation"]["chunks"]
+    assert [c["rows"] for c in chunks] == [3] * 6 + [2]
+    assert chunks[1]["first"] == [1, "ja"] and chunks[1]["last"] == [2, "ja"]
+    assert snapshot.verify(out) == []
+
+    # the same rows give the same files
+    files = sorted(os.listdir(out))
+    with engine.begin() as conn:
+        again = snapshot.export_snapshot(conn, out)
+    assert again["snapshot"] == manifest["snapshot"]
+    assert sorted(os.listdir(out)) == files
+
+    with engine.begin() as conn:
+        assert snapshot.export_delta(conn, out) is None
+        conn.exec_driver_sql(
+            "UPDATE Dictionary SET DeleteFlag = 1, ModifiedAt = 200 WHERE WordId = 4"
+        )
+        conn.exec_driver_sql(
+            "UPDATE Translation SET TranslationText = 'new', ModifiedAt = 300 "
+            "WHERE WordId = 7 AND TargetLanguage = 'en'"
+        )
+        delta = snapshot.export_delta(conn, out)
+    assert delta is not None
+    assert (delta["since"], delta["version"]) == (101, 301)
+    changed = read_part(out, delta)
+    assert [(r["WordId"], r["DeleteFlag"]) for r in changed["Dictionary"]] == [(4, 1)]
+    assert [r["TranslationText"] for r in changed["Translation"]] == ["new"]
+    assert snapshot.read_manifest(out)["deltas"] == [delta]
+
+    # a damaged download is caught by the checksums
+    path = os.path.join(out, chunks[0]["file"])
+    data = bytearray(open(path, "rb").read())
+    data[-5] ^= 0xFF
+    open(path, "wb").write(bytes(data))
+    os.remove(os.path.join(out, chunks[1]["file"]))
+    assert snapshot.verify(out) == [
+        f"{chunks[0]['file']}: checksum mismatch",
+        f"{chunks[1]['file']}: missing",
+    ]
+
+
+def test_delta_waits_for_the_running_build(engine: Engine, tmp_path: Any) -> None:
+    out = str(tmp_path / "snapshot")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Build (StartedAt, CompletedAt) VALUES (100, 150)"
+        )
+        assert snapshot.export_snapshot(conn, out)["snapshot"]["version"] == 101
+        # a build with no changes
+        conn.exec_driver_sql(
+            "INSERT INTO Build (StartedAt, CompletedAt) VALUES (120, 130)"
+        )
+        assert snapshot.export_delta(conn, out) is None
+
+    # a build stamping 200 has committed its first language pair only
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE Translation SET TranslationText = 'new', ModifiedAt = 200 "
+            "WHERE TargetLanguage = 'en'"
+        )
+        assert snapshot.export_delta(conn, out) is None
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE Translation SET TranslationText = 'new', ModifiedAt = 200 "
+            "WHERE TargetLanguage = 'ja'"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Build (StartedAt, CompletedAt) VALUES (200, 250)"
+        )
+        delta = snapshot.export_delta(conn, out)
+    assert delta is not None
+    assert (delta["since"], delta["version"]) == (101, 201)
+    changed = read_part(out, delta)["Translation"]
+    assert len(changed) == 2 * WORDS
+    assert {r["TranslationText"] for r in changed} == {"new"}
+
+
+def test_compressed_translations_are_exported_as_text(
+    engine: Engine, tmp_path: Any
+) -> None:
+    out = str(tmp_path / "snapshot")
+    with engine.begin() as conn:
+        compression.compress_translations(conn, "zlib")
+        manifest = snapshot.export_snapshot(conn, out)
+    texts = [
+        r["TranslationText"]
+        for r in read_part(out, manifest["snapshot"])["Translation"]
+    ]
+    assert texts == [f"{lang} {i}" for i in range(WORDS) for lang in ["en", "ja"]]
+
+
+def test_shared_bodies_are_exported_as_text(engine: Engine, tmp_path: Any) -> None:
+    out = str(tmp_path / "snapshot")
+    body = "a body shared by every Japanese translation"
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "UPDATE Translation SET TranslationText = ? WHERE TargetLanguage = 'ja'",
+            (body,),
+        )
+        assert translation_body.dedupe_translations(conn)["TranslationBody rows"] == 1
+        manifest = snapshot.export_snapshot(conn, out)
+    texts = [
+        r["TranslationText"]
+        for r in read_part(out, manifest["snapshot"])["Translation"]
+    ]
+    assert texts == [t for i in range(WORDS) for t in [f"en {i}", body]]
+
+
+def test_delta_needs_a_snapshot(engine: Engine, tmp_path: Any) -> None:
+    with engine.begin() as conn, pytest.raises(FileNotFoundError):
+        snapshot.export_delta(conn, str(tmp_path))
@@ -0,0 +1,154 @@
+import sqlite3
+from typing import Generator
+import pytest
+from sqlalchemy import Engine, create_engine
+from data_context import Base
+
+# The delta queries issued by the server's sync pull (SyncsHandler.cs),
+# with lastPullTime = 100 and userName = 'u0'
+DELTA_QUERIES = {
+    "ix_dictionary_modifiedat": "SELECT * FROM Dictionary WHERE ModifiedAt >= 100",
+    "ix_translation_modifiedat": "SELECT * FROM Translation WHERE ModifiedAt >= 100",
+    "ix_phrase_username_modifiedat": (
+        "SELECT * FROM Phrase WHERE UserName = 'u0' AND ModifiedAt >= 100"
+    ),
+    "ix_bookmark_username_modifiedat": (
+        "SELECT * FROM Bookmark WHERE UserName = 'u0' AND ModifiedAt >= 100"
+    ),
+    "ix_tagcategory_username_modifiedat": (
+        "SELECT * FROM TagCategory WHERE UserName = 'u0' AND ModifiedAt >= 100"
+    ),
+    "ix_tag_tagcategoryid_modifiedat": (
+        "SELECT t.* FROM Tag t "
+        "JOIN TagCategory c ON t.TagCategoryId = c.TagCategoryId "
+        "WHERE c.UserName = 'u0' AND t.ModifiedAt >= 100"
+    ),
+    "ix_bookmarktag_bookmarkid_modifiedat": (
+        "SELECT bt.* FROM BookmarkTag bt "
+        "JOIN Bookmark b ON bt.BookmarkId = b.BookmarkId "
+        "WHERE b.UserName = 'u0' AND bt.ModifiedAt >= 100"
+    ),
+    "ix_phrasetag_phraseid_modifiedat": (
+        "SELECT pt.* FROM PhraseTag pt "
+        "JOIN Phrase p ON pt.PhraseId = p.PhraseId "
+        "WHERE p.UserName = 'u0' AND pt.ModifiedAt >= 100"
+    ),
+}
+
+WORDS = 20_000
+USERS = 20
+ITEMS_PER_USER = 200
+
+
+@pytest.fixture(scope="module")
+def engine() -> Generator[Engine, None, None]:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+
+    # Everything was pulled at ModifiedAt 0, except every 1000th row
+    def modified(i: int) -> int:
+        return 100 if i % 1000 == 0 else 0
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+            "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', NULL, ?, 0)",
+            [(i, f"w{i}", modified(i)) for i in range(WORDS)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Translation (TranslationId, WordId, TargetLanguage, "
+            "TranslationText, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', 't', ?, 0)",
+            [(i, i, modified(i)) for i in range(WORDS)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO User (UserName, CreatedAt) VALUES (?, 0)",
+            [(f"u{u}",) for u in range(USERS)],
+        )
+
+        items = [(u, i) for u in range(USERS) for i in range(ITEMS_PER_USER)]
+        conn.exec_driver_sql(
+            "INSERT INTO Phrase (PhraseId, PhraseText, PhraseLanguage, UserName, "
+            "ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', ?, ?, 0)",
+            [(f"p{u}.{i}", f"text{i}", f"u{u}", modified(i)) for u, i in items],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Bookmark (BookmarkId, UserName, WordId, ModifiedAt, "
+            "DeleteFlag) VALUES (?, ?, ?, ?, 0)",
+            [(f"b{u}.{i}", f"u{u}", i, modified(i)) for u, i in items],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO TagCategory (TagCategoryId, CategoryName, UserName, "
+            "ModifiedAt, DeleteFlag) VALUES (?, 'cat', ?, ?, 0)",
+            [(f"c{u}", f"u{u}", 0) for u in range(USERS)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Tag (TagId, TagName, TagCategoryId, ModifiedAt, DeleteFlag) "
+            "VALUES (?, ?, ?, ?, 0)",
+            [(f"t{u}.{i}", f"tag{i}", f"c{u}", modified(i)) for u, i in items],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO BookmarkTag (BookmarkTagId, BookmarkId, TagId, ModifiedAt, "
+            "DeleteFlag) VALUES (?, ?, ?, ?, 0)",
+            [(f"bt{u}.{i}", f"b{u}.{i}", f"t{u}.{i}", modified(i)) for u, i in items],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO PhraseTag (PhraseTagId, PhraseId, TagId, ModifiedAt, "
+            "DeleteFlag) VALUES (?, ?, ?, ?, 0)",
+            [(f"pt{u}.{i}", f"p{u}.{i}", f"t{u}.{i}", modified(i)) for u, i in items],
+        )
+
+    yield engine
+    engine.dispose()
+
+
+def count_vm_steps(dbapi_connection: sqlite3.Connection, sql: str) -> int:
+    # number of SQLite virtual machine instructions, a deterministic measure
+    # of the work a query does
+    steps = 0
+
+    def progress() -> int:
+        nonlocal steps
+        steps += 1
+        return 0
+
+    dbapi_connection.set_progress_handler(progress, 1)
+    try:
+        dbapi_connection.execute(sql).fetchall()
+    finally:
+        dbapi_connection.set_progress_handler(None, 1)
+    return steps
+
+
+@pytest.mark.parametrize("index_name", DELTA_QUERIES.keys())
+def test_delta_query_plan_uses_index(engine: Engine, index_name: str) -> None:
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + DELTA_QUERIES[index_name]
+        ).all()
+
+    assert any(f"USING INDEX {index_name} " in row[3] for row in plan), plan
+
+
+@pytest.mark.parametrize("index_name", DELTA_QUERIES.keys())
+def test_delta_query_benchmark(engine: Engine, index_name: str) -> None:
+    sql = DELTA_QUERIES[index_name]
+    with engine.connect() as conn:
+        dbapi_connection = conn.connection.dbapi_connection
+        assert isinstance(dbapi_connection, sqlite3.Connection)
+
+        indexed = count_vm_steps(dbapi_connection, sql)
+        dbapi_connection.execute(f"DROP INDEX {index_name}")
+        try:
+            scanned = count_vm_steps(dbapi_connection, sql)
+        finally:
+            conn.rollback()
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    if index.name == index_name:
+                        index.create(conn)
+            conn.commit()
+
+    assert indexed < scanned, f"{index_name}: {scanned} -> {indexed} VM steps"
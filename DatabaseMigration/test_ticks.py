@@ -0,0 +1,84 @@
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from hypothesis import given, strategies as st
+import ticks
+
+ticks_values = st.integers(min_value=0, max_value=ticks.MAX_TICKS)
+ns_ticks_values = st.integers(
+    min_value=ticks.MIN_NS_TICKS, max_value=ticks.MAX_NS_TICKS
+)
+utc_datetimes = st.datetimes(
+    min_value=datetime(1, 1, 1), timezones=st.just(timezone.utc)
+)
+
+
+def test_dotnet_ticks() -> None:
+    # new DateTime(...).Ticks
+    utc = timezone.utc
+    assert ticks.datetime_to_ticks(datetime(1, 1, 1, tzinfo=utc)) == 0
+    assert ticks.datetime_to_ticks(datetime(1970, 1, 1, tzinfo=utc)) == (
+        ticks.UNIX_EPOCH_TICKS
+    )
+    assert ticks.datetime_to_ticks(datetime(2024, 2, 29, 12, tzinfo=utc)) == (
+        638448048000000000
+    )
+    # the float path rounded this to ...000000
+    assert ticks.datetime_to_ticks(datetime(2024, 2, 29, 12, 0, 0, 1, tzinfo=utc)) == (
+        638448048000000010
+    )
+    assert ticks.ticks_to_datetime(ticks.MAX_TICKS) == datetime.max.replace(tzinfo=utc)
+    with pytest.raises(ValueError):
+        ticks.ticks_to_datetime(ticks.MAX_TICKS + 1)
+    with pytest.raises(TypeError):
+        ticks.datetime_to_ticks(datetime(2024, 1, 1))
+
+    now = ticks.now_ticks()
+    assert (
+        abs(now - ticks.datetime_to_ticks(datetime.now(utc))) < ticks.TICKS_PER_SECOND
+    )
+    assert ticks.ticks_to_unix_ns(now) // 10**9 == pytest.approx(time.time(), abs=1)
+
+
+@given(utc_datetimes)
+def test_datetime_round_trip(dt: datetime) -> None:
+    value = ticks.datetime_to_ticks(dt)
+    assert ticks.ticks_to_datetime(value) == dt
+    assert value % ticks.TICKS_PER_MICROSECOND == 0
+
+
+@given(utc_datetimes, utc_datetimes)
+def test_datetime_differences_are_exact(a: datetime, b: datetime) -> None:
+    # a tick difference is the TimeSpan.Ticks of the timedelta
+    difference = ticks.datetime_to_ticks(a) - ticks.datetime_to_ticks(b)
+    assert difference == (a - b) // timedelta(microseconds=1) * 10
+
+
+@given(ticks_values)
+def test_ticks_round_trip(value: int) -> None:
+    assert ticks.unix_ns_to_ticks(ticks.ticks_to_unix_ns(value)) == value
+    # datetime drops the sub-microsecond tick only
+    dt = ticks.ticks_to_datetime(value)
+    assert ticks.datetime_to_ticks(dt) == value - value % 10
+
+
+@given(st.integers(min_value=-(2**63), max_value=2**63 - 1))
+def test_unix_ns_floors_to_ticks(ns: int) -> None:
+    value = ticks.unix_ns_to_ticks(ns)
+    assert ticks.ticks_to_unix_ns(value) <= ns < ticks.ticks_to_unix_ns(value + 1)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@given(values=st.lists(ns_ticks_values, max_size=50))
+def test_arrays_match_scalars(use_numpy: bool, values: list[int]) -> None:
+    if use_numpy and ticks.numpy is None:
+        pytest.skip("numpy is not installed")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        if not use_numpy:
+            monkeypatch.setattr(ticks, "numpy", None)
+
+        ns = ticks.ticks_to_unix_ns_array(values)
+        assert [int(v) for v in ns] == [ticks.ticks_to_unix_ns(v) for v in values]
+        assert [int(v) for v in ticks.unix_ns_to_ticks_array(ns)] == values
+        with pytest.raises(OverflowError):
+            ticks.ticks_to_unix_ns_array(values + [ticks.MAX_NS_TICKS + 1])
@@ -0,0 +1,79 @@
+from typing import Generator
+import pytest
+from sqlalchemy import Engine, create_engine, select
+from sqlalchemy.orm import Session
+from data_context import Base, Translation, TranslationBody
+import compression
+from translation_text import read_text, write_text
+import translation_body
+
+STUB = "past tense of go; see the entry for usage notes"
+TEXTS = [STUB] * 4 + ["n. short"] * 3 + [f"unique body {i}" for i in range(5)]
+
+
+@pytest.fixture
+def engine() -> Generator[Engine, None, None]:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO Language (LanguageCode, LanguageName) VALUES ('en', 'English')"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Dictionary (WordId, Word, SourceLanguage, "
+            "Pronounce, ModifiedAt, DeleteFlag) VALUES (?, ?, 'en', NULL, 0, 0)",
+            [(i, f"w{i}") for i in range(len(TEXTS))],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO Translation (WordId, TargetLanguage, TranslationText, "
+            "ModifiedAt, DeleteFlag) VALUES (?, 'en', ?, 0, 0)",
+            list(enumerate(TEXTS)),
+        )
+    yield engine
+    engine.dispose()
+
+
+def read_texts(engine: Engine) -> list[str]:
+    with Session(engine) as session:
+        return [
+            read_text(t)
+            for t in session.scalars(select(Translation).order_by(Translation.WordId))
+        ]
+
+
+def test_shared_bodies_stored_once(engine: Engine) -> None:
+    with engine.begin() as conn:
+        report = translation_body.dedupe_translations(conn)
+    # the short body costs more to refer to than to repeat
+    assert report["Translation deduplicated"] == 4
+    assert report["TranslationBody rows"] == 1
+    assert report["dedupe bytes saved"] > 0
+    assert read_texts(engine) == TEXTS
+
+    with Session(engine) as session:
+        body = session.scalars(select(TranslationBody)).one()
+        assert body.BodyHash == translation_body.body_hash(STUB)
+        assert body.BodyText == STUB
+        assert len(body.translations) == 4
+
+        # a row given its own text no longer shares the body
+        translation = body.translations[0]
+        write_text(translation, "went")
+        session.commit()
+    assert read_texts(engine) == ["went"] + TEXTS[1:]
+
+    # idempotent
+    with engine.begin() as conn:
+        assert translation_body.dedupe_translations(conn)["TranslationBody rows"] == 1
+
+
+def test_compression_after_dedupe(engine: Engine) -> None:
+    with engine.begin() as conn:
+        translation_body.dedupe_translations(conn)
+        compression.compress_translations(conn, "zlib")
+        shared = conn.exec_driver_sql(
+            "SELECT count(*) FROM Translation "
+            "WHERE BodyHash IS NOT NULL AND TranslationBlob IS NULL"
+        ).scalar_one()
+    assert shared == 4
+    assert read_texts(engine) == TEXTS
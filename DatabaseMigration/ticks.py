@@ -0,0 +1,89 @@
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+try:
+    import numpy
+except ImportError:  # optional, the bulk conversions fall back to array("q")
+    numpy = None
+
+# .NET DateTime ticks: 100 ns intervals since 0001-01-01 00:00 UTC, the unit
+# of every ModifiedAt, CreatedAt and LastPull column
+TICKS_PER_SECOND = 10_000_000
+TICKS_PER_MICROSECOND = 10
+NS_PER_TICK = 100
+
+# DateTime.UnixEpoch.Ticks and DateTime.MaxValue.Ticks
+UNIX_EPOCH_TICKS = 621_355_968_000_000_000
+MAX_TICKS = 3_155_378_975_999_999_999
+
+# Ticks whose Unix nanoseconds fit in an int64 (years 1677 to 2262)
+MIN_NS_TICKS = UNIX_EPOCH_TICKS - 2**63 // NS_PER_TICK
+MAX_NS_TICKS = UNIX_EPOCH_TICKS + (2**63 - 1) // NS_PER_TICK
+
+_EPOCH = datetime(1, 1, 1, tzinfo=timezone.utc)
+
+
+def now_ticks() -> int:
+    # the current time, without building a datetime
+    return UNIX_EPOCH_TICKS + time.time_ns() // NS_PER_TICK
+
+
+def datetime_to_ticks(dt: datetime) -> int:
+    # Exact integer arithmetic: timedelta holds whole days, seconds and
+    # microseconds, where total_seconds() rounds to a float. dt must be
+    # timezone-aware.
+    delta = dt - _EPOCH
+    seconds = delta.days * 86_400 + delta.seconds
+    return seconds * TICKS_PER_SECOND + delta.microseconds * TICKS_PER_MICROSECOND
+
+
+def ticks_to_datetime(ticks: int) -> datetime:
+    # In UTC. datetime stops at microseconds, so the last tick digit is
+    # dropped.
+    if not 0 <= ticks <= MAX_TICKS:
+        raise ValueError(f"ticks out of the DateTime range: {ticks}")
+    return _EPOCH + timedelta(microseconds=ticks // TICKS_PER_MICROSECOND)
+
+
+def unix_ns_to_ticks(ns: int) -> int:
+    # floored, so a tick never lies after the instant it stands for
+    return UNIX_EPOCH_TICKS + ns // NS_PER_TICK
+
+
+def ticks_to_unix_ns(ticks: int) -> int:
+    return (ticks - UNIX_EPOCH_TICKS) * NS_PER_TICK
+
+
+def _int64_array(values: Iterable[int]) -> Any:
+    # arrays are converted without a copy where possible, fromiter takes
+    # any iterable
+    if isinstance(values, numpy.ndarray):
+        return values.astype(numpy.int64, copy=False)
+    return numpy.fromiter(values, dtype=numpy.int64)
+
+
+def unix_ns_to_ticks_array(values: Iterable[int]) -> Any:
+    # unix_ns_to_ticks over many values: an int64 numpy array if numpy is
+    # installed, else an array("q")
+    if numpy is not None:
+        ns = _int64_array(values)
+        # numpy's // floors as python's does
+        return ns // NS_PER_TICK + UNIX_EPOCH_TICKS
+    return array("q", [UNIX_EPOCH_TICKS + v // NS_PER_TICK for v in values])
+
+
+def ticks_to_unix_ns_array(values: Iterable[int]) -> Any:
+    # ticks_to_unix_ns over many values, as above. Raises OverflowError for
+    # ticks outside MIN_NS_TICKS..MAX_NS_TICKS, whose nanoseconds do not fit
+    # in an int64.
+    if numpy is not None:
+        ticks = _int64_array(values)
+        # numpy wraps around silently, so the range is checked first
+        if len(ticks) > 0 and (
+            ticks.min() < MIN_NS_TICKS or ticks.max() > MAX_NS_TICKS
+        ):
+            raise OverflowError("ticks out of the int64 nanosecond range")
+        return (ticks - UNIX_EPOCH_TICKS) * NS_PER_TICK
+    return array("q", [(t - UNIX_EPOCH_TICKS) * NS_PER_TICK for t in values])
@@ -0,0 +1,78 @@
+import hashlib
+from collections import Counter
+from itertools import batched
+from sqlalchemy.engine import Connection
+
+# Rows inserted or updated per executemany
+CHUNK_SIZE = 10_000
+
+# Approximate bytes a row pays for referring to a body (the BodyHash value
+# and its record header entry) and for one TranslationBody row besides the
+# text. A body is only moved out when that costs less than its copies.
+REFERENCE_BYTES = 9
+BODY_ROW_BYTES = 12
+
+
+def body_hash(text: str) -> int:
+    # The first 8 bytes of the SHA-256 of the text as a signed 64-bit
+    # integer, so it is the INTEGER PRIMARY KEY of TranslationBody. The same
+    # body has the same key in every build, which keeps synced references
+    # valid across rebuilds.
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], signed=True)
+
+
+def _saved_bytes(size: int, count: int) -> int:
+    return (count - 1) * size - count * REFERENCE_BYTES - BODY_ROW_BYTES
+
+
+def dedupe_translations(connection: Connection) -> dict[str, int]:
+    # Stores each TranslationText shared by several rows once in
+    # TranslationBody; those rows keep an empty TranslationText (it is NOT
+    # NULL) and refer to it by BodyHash. Compressed rows are left alone, and
+    # so is a body whose hash collides with another one. Returns row counts
+    # and the bytes saved.
+    connection.exec_driver_sql(
+        "CREATE TEMP TABLE DuplicateBody ("
+        "BodyText TEXT PRIMARY KEY, BodyHash INTEGER NOT NULL) WITHOUT ROWID"
+    )
+    duplicates = connection.exec_driver_sql(
+        "SELECT TranslationText, length(CAST(TranslationText AS BLOB)), count(*) "
+        "FROM Translation WHERE BodyHash IS NULL AND TranslationBlob IS NULL "
+        "GROUP BY TranslationText HAVING count(*) > 1"
+    )
+    for chunk in batched(duplicates, CHUNK_SIZE):
+        rows = [
+            (text, body_hash(text))
+            for text, size, count in chunk
+            if _saved_bytes(size, count) > 0
+        ]
+        if len(rows) > 0:
+            connection.exec_driver_sql("INSERT INTO DuplicateBody VALUES (?, ?)", rows)
+
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO TranslationBody (BodyHash, BodyText) "
+        "SELECT BodyHash, BodyText FROM DuplicateBody"
+    )
+    # a body that lost a hash collision has no TranslationBody row of its own
+    connection.exec_driver_sql(
+        "DELETE FROM DuplicateBody WHERE NOT EXISTS (SELECT 1 FROM TranslationBody "
+        "b WHERE b.BodyHash = DuplicateBody.BodyHash "
+        "AND b.BodyText = DuplicateBody.BodyText)"
+    )
+    report: Counter[str] = Counter()
+    report["Translation deduplicated"] = connection.exec_driver_sql(
+        "UPDATE Translation SET TranslationText = '', BodyHash = d.BodyHash "
+        "FROM DuplicateBody d WHERE Translation.TranslationText = d.BodyText "
+        "AND Translation.BodyHash IS NULL AND Translation.TranslationBlob IS NULL"
+    ).rowcount
+
+    for size, count in connection.exec_driver_sql(
+        "SELECT length(CAST(b.BodyText AS BLOB)), count(*) FROM TranslationBody b "
+        "JOIN Translation t ON t.BodyHash = b.BodyHash GROUP BY b.BodyHash"
+    ):
+        report["TranslationBody rows"] += 1
+        report["dedupe bytes saved"] += _saved_bytes(size, count)
+
+    connection.exec_driver_sql("DROP TABLE DuplicateBody")
+    return dict(report)
@@ -0,0 +1,30 @@
+import compression
+from data_context import Translation
+
+# The text of a Translation row whatever the build stored: plain
+# TranslationText, a shared TranslationBody (translation_body.py) or a blob
+# compressed with a CompressionDictionary (compression.py). Kept out of
+# data_context so the models do not load the codecs.
+
+
+def read_text(translation: Translation) -> str:
+    if translation.body is not None:
+        return translation.body.BodyText
+    d = translation.compression_dictionary
+    if translation.TranslationBlob is None or d is None:
+        return translation.TranslationText
+    return compression.decompress(translation.TranslationBlob, d.Codec, d.Data)
+
+
+def write_text(translation: Translation, value: str) -> None:
+    # compressed with the row's dictionary, if it has one. The row no longer
+    # shares a body.
+    translation.body = None
+    d = translation.compression_dictionary
+    if d is None:
+        translation.TranslationText = value
+        translation.TranslationBlob = None
+        return
+    codec = compression.get_codec(d.Codec, d.Data)
+    translation.TranslationText = ""
+    translation.TranslationBlob = codec.compress(value.encode("utf-8"))
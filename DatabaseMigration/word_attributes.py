@@ -0,0 +1,64 @@
+from sqlalchemy import Row
+from sqlalchemy.engine import Connection
+
+# en_zh_dict.FREQUENCY_FIELDS -> the Dictionary column they are stored in
+FREQUENCY_COLUMNS = {
+    "collins": "Collins",
+    "oxford": "Oxford",
+    "bnc": "BncRank",
+    "frq": "CocaRank",
+}
+RANK_COLUMNS = ["BncRank", "CocaRank"]
+
+
+def find_words(
+    connection: Connection, key: str, value: str, limit: int = 1000
+) -> list[Row]:
+    # (WordId, Word, SourceLanguage) of the words having an attribute,
+    # e.g. ("gender", "f"), read off the WordAttribute primary key
+    return connection.exec_driver_sql(
+        "SELECT d.WordId, d.Word, d.SourceLanguage FROM WordAttribute a "
+        "JOIN Dictionary d ON d.WordId = a.WordId "
+        "WHERE a.Key = ? AND a.Value = ? AND d.DeleteFlag = 0 "
+        "ORDER BY a.WordId LIMIT ?",
+        (key, value, limit),
+    ).all()
+
+
+def get_attributes(connection: Connection, word_id: int) -> dict[str, list[str]]:
+    attributes: dict[str, list[str]] = {}
+    for key, value in connection.exec_driver_sql(
+        "SELECT Key, Value FROM WordAttribute WHERE WordId = ? ORDER BY Key, Value",
+        (word_id,),
+    ):
+        attributes.setdefault(key, []).append(value)
+    return attributes
+
+
+def top_words(
+    connection: Connection, column: str = "CocaRank", limit: int = 5000
+) -> list[Row]:
+    # (WordId, Word, rank) of the most frequent words, walking the partial
+    # index of the rank column instead of sorting the table
+    if column not in RANK_COLUMNS:
+        raise ValueError(f"not a rank column: {column}")
+    return connection.exec_driver_sql(
+        f"SELECT WordId, Word, {column} FROM Dictionary "
+        f"WHERE {column} IS NOT NULL AND DeleteFlag = 0 "
+        f"ORDER BY {column} LIMIT ?",
+        (limit,),
+    ).all()
+
+
+def most_common(
+    connection: Connection, lang: str, limit: int = 10, prefix: str = ""
+) -> list[Row]:
+    # (WordId, Word, Rank) of the most common words of a language, walking
+    # ix_dictionary_sourcelanguage_rank, optionally only those with a prefix
+    return connection.exec_driver_sql(
+        "SELECT WordId, Word, Rank FROM Dictionary "
+        "WHERE SourceLanguage = ? AND Rank IS NOT NULL AND DeleteFlag = 0 "
+        "AND Word >= ? AND Word < ? || char(1114111) "
+        "ORDER BY Rank LIMIT ?",
+        (lang, prefix, prefix, limit),
+    ).all()
@@ -0,0 +1,24 @@
+from sqlalchemy import Row
+from sqlalchemy.engine import Connection
+
+# Stress is marked with an apostrophe after the vowel in the redict sources
+# (кни'га), or with a combining acute accent (кни́га) in user input
+STRESS_MARKS = str.maketrans("", "", "'\u0301")
+
+
+def bare_form(form: str) -> str:
+    # lookup key of a Russian surface form: no stress marks, lower case,
+    # and ё spelled as е, as it usually is in running text
+    return form.translate(STRESS_MARKS).strip().lower().replace("ё", "е")
+
+
+def find_lemmas(connection: Connection, form: str, limit: int = 50) -> list[Row]:
+    # (WordId, Word, Tag, Form) of every dictionary word that has the given
+    # surface form, e.g. книгой -> (…, книга, sg_inst, кни'гой)
+    return connection.exec_driver_sql(
+        "SELECT d.WordId, d.Word, f.Tag, f.Form FROM WordForm f "
+        "JOIN Dictionary d ON d.WordId = f.WordId "
+        "WHERE f.BareForm = ? AND d.DeleteFlag = 0 "
+        "ORDER BY d.WordId, f.Tag LIMIT ?",
+        (bare_form(form), limit),
+    ).all()
@@ -0,0 +1,85 @@
+from itertools import batched
+from typing import Iterable, Sequence
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+# Schema the word map is attached as, and its table
+SCHEMA = "word_map"
+TABLE = f"{SCHEMA}.WordIdMap"
+
+# Memory the word map's pages may use before they spill to its file.
+# Negative cache_size is in KiB.
+CACHE_SIZE_KIB = 64 * 1024
+
+# Words resolved or added per statement
+CHUNK_SIZE = 10_000
+
+
+def attach_word_map(
+    session: Session, path: str = "", cache_kib: int = CACHE_SIZE_KIB
+) -> None:
+    # (SourceLanguage, Word) -> WordId of every word of the build, keyed as
+    # Dictionary's uq_dictionary is: the same spelling in two languages is
+    # two words. Kept in its own database rather than in a dict so that it
+    # scales past memory. With a path, only cache_kib of it stays in memory
+    # whatever the temp_store setting; "" is a private temporary database,
+    # which --memory-temp keeps in memory.
+    # ATTACH cannot run inside a transaction: call it before writing.
+    session.execute(text(f"ATTACH DATABASE :path AS {SCHEMA}"), {"path": path})
+    if path != "":
+        # rebuilt on every run, nothing to recover after a crash
+        session.execute(text(f"PRAGMA {SCHEMA}.journal_mode=OFF;"))
+        session.execute(text(f"PRAGMA {SCHEMA}.synchronous=OFF;"))
+    session.execute(text(f"PRAGMA {SCHEMA}.cache_size=-{int(cache_kib)};"))
+    session.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    session.execute(
+        text(
+            f"CREATE TABLE {TABLE} ("
+            "SourceLanguage TEXT NOT NULL, Word TEXT NOT NULL, "
+            "WordId INTEGER NOT NULL, PRIMARY KEY (SourceLanguage, Word)) "
+            "WITHOUT ROWID"
+        )
+    )
+
+
+def detach_word_map(session: Session) -> None:
+    # the map's file can be removed once detached
+    session.commit()
+    session.execute(text(f"DETACH DATABASE {SCHEMA}"))
+
+
+def load_existing(session: Session) -> None:
+    # the words of an existing database, for incremental builds
+    session.execute(
+        text(
+            f"INSERT OR IGNORE INTO {TABLE} "
+            "SELECT SourceLanguage, Word, WordId FROM Dictionary "
+            "ORDER BY SourceLanguage, Word"
+        )
+    )
+
+
+def resolve(session: Session, source_lang: str, words: Sequence[str]) -> dict[str, int]:
+    # WordId of the given words that have one. Looked up in key order, so
+    # that once the map spills, consecutive lookups read neighbouring pages.
+    stmt = text(
+        f"SELECT Word, WordId FROM {TABLE} "
+        "WHERE SourceLanguage = :lang AND Word IN :words"
+    ).bindparams(bindparam("words", expanding=True))
+    word_id_map: dict[str, int] = {}
+    for chunk in batched(sorted(set(words)), CHUNK_SIZE):
+        for word, word_id in session.execute(
+            stmt, {"lang": source_lang, "words": chunk}
+        ):
+            word_id_map[word] = word_id
+    return word_id_map
+
+
+def add(session: Session, source_lang: str, rows: Iterable[tuple[str, int]]) -> None:
+    # (word, WordId) of new words, which must not be in the map yet
+    stmt = text(f"INSERT INTO {TABLE} VALUES (:lang, :word, :word_id)")
+    for chunk in batched(rows, CHUNK_SIZE):
+        session.execute(
+            stmt,
+            [{"lang": source_lang, "word": w, "word_id": i} for w, i in chunk],
+        )